@@ -26,6 +26,7 @@ CENTER_INDEX_Y = X_COORDS + Y_COORDS_HALF
 # Calibration Criteria (General)
 CRIT = (cv2.TERM_CRITERIA_EPS, 0, 1e-11)
 CRIT_STEREO = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-3)
+REPROJ_ERROR_TARGET = 1.0  # RMS pixels; a reticle detection attempt at or below this is accepted at once
 
 # 4 shanks
 MIN_SHANK_DIST_MM = 0.20
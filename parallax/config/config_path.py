@@ -37,6 +37,7 @@ session_file = data_dir / "session.yaml"
 settings_file = data_dir / "settings.yaml"
 stage_server_config_file = data_dir / "stage_server_config.json"
 reticle_metadata_file = data_dir / "reticle_metadata.yaml"
+reticle_cache_file = data_dir / "reticle_cache.json"
 img_processing_config_file = project_root / "parallax" / "config" / "image_processing_config.json"
 
 # CNN-specific directories and string paths for subprocess/argparse
@@ -166,6 +166,7 @@ class ControlPanel(QWidget):
         self.probe_calibration.transM_info.connect(self.probe_calib_handler.update_probe_calib_status)  # Logic -> UI
         self.probe_calib_handler.clearRequested.connect(self.probe_calibration.clear)  # UI -> Logic
         self.probe_calib_handler.resetCalibRequested.connect(self.probe_calibration.reset_calib)  # UI -> Logic
+        self.probe_calib_handler.flushPointsRequested.connect(self.probe_calibration.flush_points)  # UI -> Logic
         self.probe_calib_handler.probeCalibRequest.connect(self.probe_calibration.update)  # UI -> Logic
 
         self.stageListener.start()
@@ -30,6 +30,7 @@ class ProbeCalibrationHandler(QWidget):
     probeCalibRequest = pyqtSignal(StageObj, dict)  # Emits stage global data and debug info
     clearRequested = pyqtSignal(str)
     resetCalibRequested = pyqtSignal()
+    flushPointsRequested = pyqtSignal()  # Points file is written in the background; flush before reading it
 
     def __init__(
         self,
@@ -835,6 +836,7 @@ class ProbeCalibrationHandler(QWidget):
             if not calib_info:
                 logger.error(f"No calibration info found for {self.selected_stage_id}")
                 return
+            self.flushPointsRequested.emit()
             PointMesh.show(self.selected_stage_id, calib_info.trajectory_file)
         except Exception as e:
             logger.error(f"Failed to open 3D trajectory for '{self.selected_stage_id}': {e}")
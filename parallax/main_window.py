@@ -26,6 +26,8 @@ from parallax.config.config_path import fira_font_dir, ui_dir
 from parallax.control_panel.control_panel import ControlPanel, MenuActions
 from parallax.handlers.point_mesh import PointMesh
 from parallax.handlers.recording_manager import RecordingManager
+from parallax.reticle_detection.cnn_matcher import CNNReticleMatcher
+from parallax.reticle_detection.detection_pool import ReticleDetectionPool
 from parallax.screens.screen_widget_manager import ScreenWidgetManager
 from ui.resources import rc  # noqa
 
@@ -266,4 +268,6 @@ class MainWindow(QMainWindow):
         self.model.close_reticle_metadata_instance()
         self.model.close_stage_ipconfig_instance()
         PointMesh.close_all()
+        ReticleDetectionPool.instance().shutdown(wait=False)
+        CNNReticleMatcher.instance().shutdown(wait=False)
         event.accept()
@@ -20,6 +20,7 @@ from parallax.config.schemas import CameraSettings, ReticleMetadataSchema
 from parallax.session.session_manager import SessionManager
 from parallax.session.session_state import ArcAngle, CameraParams, StageCalibration, StageObj
 from parallax.stages.stage_listener import PathfinderServer
+from parallax.utils.compute_budget import ComputeBudget
 
 
 class Model:
@@ -113,6 +114,7 @@ class Model:
             stage_sn (str): The serial number of the stage to select.
         """
         self.selected_stage_sn = stage_sn
+        ComputeBudget.instance().set_selected(stage_sn=stage_sn)
 
     def get_selected_stage_sn(self):
         """Get the currently selected stage in the UI.
@@ -424,6 +426,27 @@ class Model:
         cam = self.session.cameras.get(camera_sn)
         return cam.probe_detect_algorithm if cam else "yolo"
 
+    def set_probe_detect_multi_probe(self, camera_sn: str, enabled: bool):
+        """
+        Update whether OpenCV detection tracks all probes of a camera in the session data.
+
+        Args:
+            camera_sn (str): The serial number of the camera.
+            enabled (bool): Track every locked probe instead of only the selected one.
+        """
+        if camera_sn in self.session.cameras:
+            self.session.cameras[camera_sn].probe_detect_multi_probe = enabled
+
+    def get_probe_detect_multi_probe(self, camera_sn: str) -> bool:
+        """
+        Get whether OpenCV detection tracks all probes of a camera.
+
+        Returns:
+            bool: Defaults to False if not set.
+        """
+        cam = self.session.cameras.get(camera_sn)
+        return cam.probe_detect_multi_probe if cam else False
+
     # =========================
     # Reticle Metadata
     # =========================
@@ -503,6 +526,7 @@ class Model:
         if camera_sn in self.session.cameras:
             # Direct attribute access on the Pydantic model
             self.session.cameras[camera_sn].is_triangulation_candidate = status
+        ComputeBudget.instance().set_selected(camera_sns=self.get_camera_triangulation_candidate())
         self.save_session()
 
     def get_camera_triangulation_candidate(self) -> list[str]:
@@ -517,6 +541,7 @@ class Model:
         """
         for sn, cam in self.session.cameras.items():
             cam.is_triangulation_candidate = False
+        ComputeBudget.instance().set_selected(camera_sns=())
         self.save_session()
 
     # =========================
@@ -0,0 +1,293 @@
+"""
+CalibrationPointStore: In-memory probe calibration points with a background CSV writer.
+
+ProbeCalibration.update used to read the whole points CSV to check for duplicates, read it
+again to fit the transform, and rewrite it with the expected global coordinates, so every
+update cost more than the one before. The points now live in growable numpy columns per
+stage, with a set of row keys for the duplicate check, and adding a point is O(1) amortized.
+The CSV is rewritten from a snapshot by a background thread, at most once per flush interval,
+so a burst of updates costs a single write.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from parallax.utils.coords_converter import apply_inverse_rigid_transform
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+COLUMNS = [
+    "sn",
+    "local_x",
+    "local_y",
+    "local_z",
+    "global_x",
+    "global_y",
+    "global_z",
+    "global_x_exp",
+    "global_y_exp",
+    "global_z_exp",
+    "l2_distance",
+    "ts_local_coords",
+    "ts_img_captured",
+    "cam0",
+    "pt0",
+    "cam1",
+    "pt1",
+]
+TEXT_COLUMNS = ["ts_local_coords", "ts_img_captured", "cam0", "pt0", "cam1", "pt1"]
+
+
+class StagePoints:
+    """Append-only columns of one stage's calibration points."""
+
+    def __init__(self, capacity=64):
+        """
+        Initialize empty columns.
+
+        Args:
+            capacity (int): Rows allocated up front; the columns double when full.
+        """
+        self._local = np.empty((capacity, 3))
+        self._global = np.empty((capacity, 3))
+        self._seq = np.empty(capacity, dtype=np.int64)  # Position in the store across stages
+        self._text = {name: [] for name in TEXT_COLUMNS}
+        self._keys = set()
+        self._n = 0
+        self.transform = None  # 4x4 GLOBAL->LOCAL transform for the expected global coordinates
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def local_pts(self) -> np.ndarray:
+        """(N, 3) view of the local points."""
+        return self._local[: self._n]
+
+    @property
+    def global_pts(self) -> np.ndarray:
+        """(N, 3) view of the global points."""
+        return self._global[: self._n]
+
+    def append(self, local_pt, global_pt, text, seq) -> bool:
+        """
+        Add a point unless the same observation was added before.
+
+        A point is a duplicate if its local-coordinates timestamp, global point and
+        cameras match an earlier one.
+
+        Returns:
+            bool: True if the point was added.
+        """
+        key = (text["ts_local_coords"], *map(float, global_pt), text["cam0"], text["cam1"])
+        if key in self._keys:
+            return False
+        if self._n == len(self._seq):
+            self._grow()
+        self._local[self._n] = local_pt
+        self._global[self._n] = global_pt
+        self._seq[self._n] = seq
+        for name in TEXT_COLUMNS:
+            self._text[name].append(text[name])
+        self._keys.add(key)
+        self._n += 1
+        return True
+
+    def _grow(self):
+        capacity = 2 * len(self._seq)
+        for name in ("_local", "_global", "_seq"):
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[: self._n] = old[: self._n]
+            setattr(self, name, new)
+
+    def expected_global_pts(self) -> Optional[np.ndarray]:
+        """(N, 3) global coordinates of the local points under the stage transform, or None without one."""
+        if self.transform is None or not np.all(np.isfinite(self.transform)):
+            return None
+        return np.round(apply_inverse_rigid_transform(self.transform, self.local_pts), 1)
+
+    def columns(self, sn) -> dict:
+        """Copy of the points as columns, keyed by CSV column name, plus "seq"."""
+        n = self._n
+        expected = self.expected_global_pts()
+        if expected is None:
+            expected, l2_distance = np.full((n, 3), np.nan), np.full(n, np.nan)
+        else:
+            l2_distance = np.round(np.linalg.norm(expected - self.global_pts, axis=1), 1)
+        columns = {"sn": np.full(n, sn, dtype=object)}
+        for i, axis in enumerate("xyz"):
+            columns[f"local_{axis}"] = self.local_pts[:, i].copy()
+            columns[f"global_{axis}"] = self.global_pts[:, i].copy()
+            columns[f"global_{axis}_exp"] = expected[:, i]
+        columns["l2_distance"] = l2_distance
+        for name in TEXT_COLUMNS:
+            columns[name] = np.array(self._text[name], dtype=object)
+        columns["seq"] = self._seq[:n].copy()
+        return columns
+
+
+class CalibrationPointStore:
+    """Calibration points of all stages, mirrored to a points CSV by a background writer."""
+
+    def __init__(self, path: Optional[Path] = None, flush_interval=1.0):
+        """
+        Initialize an empty store.
+
+        Args:
+            path (Path): CSV file the points are written to. None keeps them in memory only.
+            flush_interval (float): Seconds changes are gathered before the file is rewritten.
+        """
+        self.path = Path(path) if path is not None else None
+        self.flush_interval = flush_interval
+        self._stages = {}  # sn -> StagePoints
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._version = 0  # Bumped by every change
+        self._written = 0  # Version of the last snapshot written
+        self._flush_requested = False
+        self._closed = False
+        self._writer = None
+        self.writes = 0
+
+    def set_path(self, path: Path):
+        """Write the points to a new CSV file, starting with its header."""
+        with self._cond:
+            self.path = Path(path)
+            self._changed()
+
+    def add(self, sn, local_pt, global_pt, **text) -> bool:
+        """
+        Add a calibration point of a stage.
+
+        Args:
+            sn (str): Stage serial number.
+            local_pt (array-like): Local (stage) coordinates.
+            global_pt (array-like): Global (reticle) coordinates.
+            **text: Values of the text columns (timestamps, cameras and image points); missing ones are "".
+
+        Returns:
+            bool: True if added, False if the point duplicates an earlier one.
+        """
+        text = {name: str(text.get(name, "")) for name in TEXT_COLUMNS}
+        with self._cond:
+            stage = self._stages.setdefault(sn, StagePoints())
+            if not stage.append(local_pt, global_pt, text, self._seq):
+                return False
+            self._seq += 1
+            self._changed()
+            return True
+
+    def set_transform(self, sn, transform):
+        """Set the stage transform the expected global coordinates are computed with."""
+        with self._cond:
+            stage = self._stages.get(sn)
+            if stage is None:
+                return
+            stage.transform = None if transform is None else np.array(transform, dtype=float)
+            self._changed()
+
+    def remove(self, sn=None):
+        """Forget the points of one stage, or of all stages."""
+        with self._cond:
+            if sn is None:
+                self._stages.clear()
+            else:
+                self._stages.pop(sn, None)
+            self._changed()
+
+    def count(self, sn) -> int:
+        """Number of points of a stage."""
+        with self._cond:
+            stage = self._stages.get(sn)
+            return 0 if stage is None else len(stage)
+
+    def points(self, sn):
+        """
+        Copies of a stage's points.
+
+        Returns:
+            tuple: (local_pts, global_pts), (N, 3) arrays.
+        """
+        with self._cond:
+            stage = self._stages.get(sn) or StagePoints(capacity=0)
+            return stage.local_pts.copy(), stage.global_pts.copy()
+
+    def frame(self, sn) -> pd.DataFrame:
+        """A stage's points as a DataFrame with the CSV columns."""
+        with self._cond:
+            stage = self._stages.get(sn) or StagePoints(capacity=0)
+            columns = stage.columns(sn)
+        return pd.DataFrame(columns, columns=COLUMNS)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write pending changes now and wait for them. Returns False on timeout."""
+        with self._cond:
+            target = self._version
+            if self._written >= target or self._writer is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Write pending changes and stop the writer. Later changes stay in memory."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
+
+    def _changed(self):
+        """Record a change and wake the writer. Called with the lock held."""
+        self._version += 1
+        if self.path is None or self._closed:
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, daemon=True, name="CalibrationPointStore")
+            self._writer.start()
+            atexit.register(self.flush, 5.0)
+        self._cond.notify_all()
+
+    def _run(self):
+        """Writer loop: gather changes for one flush interval, then rewrite the file from a snapshot."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._version != self._written or self._closed)
+                if self._version == self._written:
+                    return  # Closed with nothing pending
+                self._cond.wait_for(lambda: self._flush_requested or self._closed, timeout=self.flush_interval)
+                self._flush_requested = False
+                version, path = self._version, self.path
+                snapshot = [stage.columns(sn) for sn, stage in self._stages.items()]
+            if path is not None:
+                self._write(path, snapshot)
+            with self._cond:
+                self._written = version
+                self._cond.notify_all()
+
+    def _write(self, path, snapshot):
+        """Rewrite the CSV atomically with the points of all stages, in the order they were added."""
+        if snapshot:
+            df = pd.DataFrame({name: np.concatenate([s[name] for s in snapshot]) for name in [*COLUMNS, "seq"]})
+            df = df.sort_values("seq", kind="stable")[COLUMNS]
+        else:
+            df = pd.DataFrame(columns=COLUMNS)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            self.writes += 1
+        except OSError as e:
+            logger.warning(f"Failed to write calibration points {path}: {e}")
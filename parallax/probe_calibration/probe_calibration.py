@@ -3,7 +3,6 @@ ProbeCalibration: Handles the transformation of probe coordinates from local (st
 It supports calibrating the transformation between local and global coordinates through various techniques.
 """
 
-import csv
 import datetime
 import logging
 import os
@@ -15,10 +14,11 @@ import pandas as pd
 
 from parallax.config.config_path import stages_dir
 from parallax.probe_calibration.bundle_adjustment import BALOptimizer, BALProblem
+from parallax.probe_calibration.point_store import CalibrationPointStore
 from parallax.utils.coords_converter import local_to_global
 from parallax.utils.rotations import apply_affine, apply_inverse_affine, make_homogeneous_transform
 from parallax.utils.signals import Signal
-from parallax.utils.transforms import fit_params
+from parallax.utils.transforms import RigidFitStats, fit_params
 
 # Set logger name
 logger = logging.getLogger(__name__)
@@ -39,6 +39,7 @@ class ProbeCalibration:
     THRESHOLD_MIN_MAX_Z = 100
     THRESHOLD_AVG_ERROR = 40
     THRESHOLD_N_PTS = 6
+    POLISH_FIT = False  # Refine the closed-form transform with least squares
 
     # 20 um diff on +8mm point e.g less than (0, 8020, 0) on (0, 8000, 0) is okay
     # center:  +10mm point (10, 10, 10) on (0, 0, 0)
@@ -64,7 +65,8 @@ class ProbeCalibration:
         self.calib_complete = Signal()
         self.transM_info = Signal()  # Will emit (sn, transM, L2_err, dist_travel)
         self.model = model
-        self.df = None
+        self.points = CalibrationPointStore()  # Points of all stages, mirrored to points_file
+        self.fit_stats = {}  # sn -> RigidFitStats of the stage's points
         self.inliers = []
         self.stage = None
 
@@ -94,33 +96,7 @@ class ProbeCalibration:
         self.log_dir = Path(stages_dir) / f"log_{self.timestamp}"
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.points_file = self.log_dir / "points.csv"
-        if self.points_file.exists():
-            self.points_file.unlink()  # Deletes the file
-
-        # Create a new file and write column names
-        with open(self.points_file, "w", newline="") as file:
-            writer = csv.writer(file)
-            # Define column names
-            self.column_names = [
-                "sn",
-                "local_x",
-                "local_y",
-                "local_z",
-                "global_x",
-                "global_y",
-                "global_z",
-                "global_x_exp",
-                "global_y_exp",
-                "global_z_exp",
-                "l2_distance",
-                "ts_local_coords",
-                "ts_img_captured",
-                "cam0",
-                "pt0",
-                "cam1",
-                "pt1",
-            ]
-            writer.writerow(self.column_names)
+        self.points.set_path(self.points_file)  # Rewritten in the background, starting with the header
 
     def clear(self, sn=None):
         """
@@ -134,62 +110,37 @@ class ProbeCalibration:
         if sn:
             self.model.add_transform(sn, self.transM_LR)
 
-        if self.log_dir is None:
-            return
-
+        self.points.remove(sn)
         if sn is None:
-            if self.points_file.exists():
-                self.points_file.unlink()  # Deletes the file
+            self.fit_stats.clear()
+            if self.points_file is not None:
+                # Start the next point in an empty file, in the same log directory
+                self.points.flush()
+                self.points_file.unlink(missing_ok=True)
         else:
-            if self.points_file.exists():
-                self.df = pd.read_csv(self.points_file)
-                self.df = self.df[self.df["sn"] != sn]
-                self.df.to_csv(self.points_file, index=False)
+            self.fit_stats.pop(sn, None)
 
-    def _remove_duplicates(self, df):
+    def flush_points(self, timeout: Optional[float] = 5.0) -> bool:
         """
-        Remove duplicate entries from a DataFrame based on unique local and global coordinates.
-
-        Args:
-            df (pd.DataFrame): The DataFrame containing the calibration points.
+        Write pending calibration points to the points file and wait for it, so readers
+        of a stage's trajectory file see every point added so far.
 
         Returns:
-            pd.DataFrame: The DataFrame without duplicates.
+            bool: False if the write did not finish within the timeout.
         """
-        logger.debug(f"Original rows: {self.df.shape[0]}")
-        df.drop_duplicates(subset=["sn", "ts_local_coords", "global_x", "global_y", "global_z"])
-        logger.debug(f"Unique rows: {self.df.shape[0]}")
-
-        return df
+        return self.points.flush(timeout)
 
     def _filter_df_by_sn(self, sn):
         """
-        Filters the calibration points in the CSV file by stage serial number.
+        Returns the calibration points of a stage.
 
         Args:
             sn (str): The serial number of the stage.
 
         Returns:
-            pd.DataFrame: Filtered DataFrame containing only the rows for the specified stage.
-        """
-        self.df = pd.read_csv(self.points_file)
-        return self.df[self.df["sn"] == sn]
-
-    def _get_local_global_points(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
-        """
-        Retrieve local and global points from the DataFrame.
-        Args:
-            df (pd.DataFrame): The DataFrame containing the points.
-        Returns:
-            tuple: Arrays of local points and global points. (Nx3 numpy arrays)
+            pd.DataFrame: DataFrame containing only the rows for the specified stage.
         """
-        # Extract local and global points, which initially creates Nx3 arrays
-        local_pts = df[["local_x", "local_y", "local_z"]].values
-        global_pts = df[["global_x", "global_y", "global_z"]].values
-        local_pts = np.asarray(local_pts, dtype=float)
-        global_pts = np.asarray(global_pts, dtype=float)
-
-        return local_pts, global_pts
+        return self.points.frame(sn)
 
     def _get_l2_distance(self, local_pts: np.ndarray, global_pts: np.ndarray):
         """
@@ -232,37 +183,28 @@ class ProbeCalibration:
         # The output l2_distance is an (N,) array, which is the required row vector of distances.
         return l2_distance
 
-    def _remove_outliers(self, df, threshold=30):
+    def _inlier_mask(self, local_pts: np.ndarray, global_pts: np.ndarray, threshold=30) -> np.ndarray:
         """
-        Remove outliers based on L2 distance threshold.
+        Mark the points within an L2 distance threshold of the current transform.
 
         Args:
-            df (pd.DataFrame): DataFrame containing local and global points.
+            local_pts (np.ndarray): The local points (Nx3 numpy array).
+            global_pts (np.ndarray): The global points (Nx3 numpy array).
             threshold (float): The L2 distance threshold for outlier removal.
 
         Returns:
-            pd.DataFrame: The DataFrame containing only the inlier points.
+            np.ndarray: (N,) boolean mask of the inlier points.
         """
-        # Ensure df is not empty before processing
-        if df.empty:
-            logger.warning("Input DataFrame is empty, returning empty DataFrame.")
-            return df
-
-        # This function relies on self._get_local_global_points to handle extraction and shape.
-        local_points, global_points = self._get_local_global_points(df)  # pts are Nx3 arrays
+        if len(global_pts) == 0:
+            logger.warning("No points given, returning an empty mask.")
+            return np.zeros(0, dtype=bool)
 
         # Get the l2 distance (returns an (N,) array of distances)
-        l2_distance = self._get_l2_distance(local_points, global_points)
-
-        # Filter out points where L2 distance is greater than the threshold
+        l2_distance = self._get_l2_distance(local_pts, global_pts)
         valid_indices = l2_distance <= threshold
 
-        # Apply filter to the original DataFrame
-        df_filtered = df[valid_indices].reset_index(drop=True)
-
         # Log statistics only if there are valid points remaining
         if np.any(valid_indices):
-            # Calculate mean and std using only the distances corresponding to valid_indices
             l2_inliers = l2_distance[valid_indices]
             mean_l2 = np.mean(l2_inliers)
             std_l2 = np.std(l2_inliers)
@@ -273,15 +215,17 @@ class ProbeCalibration:
         else:
             logger.warning("All points were filtered out as outliers based on the threshold.")
 
-        # Return the filtered DataFrame
-        return df_filtered
+        return valid_indices
 
-    def _get_transM(self, local_pts: np.ndarray, global_pts: np.ndarray) -> np.ndarray:
+    def _get_transM(
+        self, local_pts: np.ndarray, global_pts: np.ndarray, stats: Optional[RigidFitStats] = None
+    ) -> np.ndarray:
         """
         Computes the transformation matrix from local coordinates (stage) to global coordinates (reticle).
         Args:
             global_pts (np.ndarray): The global points (Nx3 numpy array).
             local_pts (np.ndarray): The local points (Nx3 numpy array).
+            stats (RigidFitStats, optional): Running sums of the same points, kept as they are added.
         Returns:
             np.ndarray: The 4x4 homogeneous transformation matrix.
         """
@@ -293,7 +237,7 @@ class ProbeCalibration:
 
         # local = R @ global + t, where local shape and global shape are 3xN.
         # pts should be 3xN column vectors to fit the fit_params function
-        self.origin, self.R, self.avg_err = fit_params(local_pts.T, global_pts.T)
+        self.origin, self.R, self.avg_err = fit_params(local_pts.T, global_pts.T, stats=stats, polish=self.POLISH_FIT)
         logger.debug(f"avg err: {self.avg_err}")
         transM = make_homogeneous_transform(self.R, self.origin)
 
@@ -334,33 +278,18 @@ class ProbeCalibration:
 
     def _write_local_global_points(self, stage, debug_info=None):
         """
-        Updates the CSV file with a new set of local and global points from the current stage position.
+        Adds a new pair of local and global points from the current stage position, unless it is a duplicate.
         """
-        if self.log_dir is None or not self.points_file.exists():
+        if self.log_dir is None:
             self._create_file()
 
         # Check if stage_z_global is under 0 microns
         if stage.stage_z_global < 0:
             return  # Do not update if condition is met (to avoid noise)
 
-        new_row_data = {
-            "sn": stage.sn,
-            "local_x": stage.stage_x,
-            "local_y": stage.stage_y,
-            "local_z": stage.stage_z,
-            "global_x": round(stage.stage_x_global, 0),
-            "global_y": round(stage.stage_y_global, 0),
-            "global_z": round(stage.stage_z_global, 0),
-            "global_x_exp": "",
-            "global_y_exp": "",
-            "global_z_exp": "",
-            "l2_distance": "",
+        text = {
             "ts_local_coords": debug_info.get("ts_local_coords", "") if debug_info else "",
             "ts_img_captured": debug_info.get("ts_img_captured", "") if debug_info else "",
-            "cam0": "",
-            "pt0": "",
-            "cam1": "",
-            "pt1": "",
         }
         if debug_info:
             cam_info = [
@@ -369,35 +298,14 @@ class ProbeCalibration:
             ]
             cam_info.sort(key=lambda x: x[0])  # Sort by camera name
             for i, (cam, pt) in enumerate(cam_info):
-                new_row_data[f"cam{i}"] = cam
-                new_row_data[f"pt{i}"] = pt
+                text[f"cam{i}"] = cam
+                text[f"pt{i}"] = pt
 
-        # Read the entire CSV file to check for duplicates
-        try:
-            with open(self.points_file, "r", newline="") as file:
-                reader = list(csv.DictReader(file))
-                for row in reversed(reader):
-                    if (
-                        row["sn"] == new_row_data["sn"]
-                        and row["ts_local_coords"] == new_row_data["ts_local_coords"]
-                        and round(float(row["global_x"]), 0) == new_row_data["global_x"]
-                        and round(float(row["global_y"]), 0) == new_row_data["global_y"]
-                        and round(float(row["global_z"]), 0) == new_row_data["global_z"]
-                        and row["cam0"] == new_row_data["cam0"]
-                        and row["cam1"] == new_row_data["cam1"]
-                    ):
-                        return  # Do not update if it is a duplicate
-                    if row["ts_local_coords"] != new_row_data["ts_local_coords"]:
-                        break
-
-        except FileNotFoundError:
-            logger.error("File does not exist")
-
-        # Write the new row to the CSV file
-        with open(self.points_file, "a", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=new_row_data.keys())
-            writer.writerow(new_row_data)
-            logger.debug(f"New point added: {new_row_data}")
+        local_pt = [stage.stage_x, stage.stage_y, stage.stage_z]
+        global_pt = [round(stage.stage_x_global, 0), round(stage.stage_y_global, 0), round(stage.stage_z_global, 0)]
+        if self.points.add(stage.sn, local_pt, global_pt, **text):
+            self.fit_stats.setdefault(stage.sn, RigidFitStats()).add(local_pt, global_pt)
+            logger.debug(f"New point added: {stage.sn} {local_pt} {global_pt}")
 
     def _is_criteria_met_transM(self):
         """
@@ -488,18 +396,21 @@ class ProbeCalibration:
         if (calib_info.max_z - calib_info.min_z > self.THRESHOLD_MIN_MAX_Z) and not calib_info.status_z:
             calib_info.status_z = True
 
-    def _is_criteria_number_of_points(self, df):
+    def _is_criteria_number_of_points(self, global_pts):
         """
         Checks if the number of calibration points for the current stage is sufficient.
 
+        Args:
+            global_pts (np.ndarray): The global points (Nx3 numpy array).
+
         Returns:
             bool: True if more than 5 points are available, False otherwise.
         """
         try:
-            if len(df) > self.THRESHOLD_N_PTS:
+            if len(global_pts) > self.THRESHOLD_N_PTS:
                 return True
             else:
-                logger.debug(f"Not enough points: {len(df)} (need > {self.THRESHOLD_N_PTS})")
+                logger.debug(f"Not enough points: {len(global_pts)} (need > {self.THRESHOLD_N_PTS})")
                 return False
         except Exception as e:
             logger.error(f"Error in _is_criteria_number_of_points: {e}")
@@ -556,7 +467,7 @@ class ProbeCalibration:
         self.LR_err_L2_current = np.linalg.norm(transformed_point_global - global_point)
         return
 
-    def _is_enough_points(self, df):
+    def _is_enough_points(self, global_pts):
         """
         Determines whether enough points have been collected for calibration.
 
@@ -564,15 +475,18 @@ class ProbeCalibration:
         - Minimum range of movement in x, y, z directions.
         - Stable transformation matrix across iterations.
 
+        Args:
+            global_pts (np.ndarray): The global points of the inliers (Nx3 numpy array).
+
         Returns:
             bool: True if enough points have been collected for calibration, otherwise False.
         """
 
-        if not self._is_criteria_number_of_points(df):
+        if not self._is_criteria_number_of_points(global_pts):
             logger.debug("Not enough points collected for calibration.")
             return False
 
-        if not self._is_trajectory_distance_sufficient(df):
+        if not self._is_trajectory_distance_sufficient(global_pts):
             logger.debug("Not enough movement range in X, Y, or Z.")
             return False
 
@@ -736,16 +650,16 @@ class ProbeCalibration:
         self._write_local_global_points(stage, debug_info)  # Do no update if it is duplicates
         self._update_min_max_x_y_z(stage)  # update min max x,y,z and emit signals if criteria met
         self._update_movement(sn)
-        df = self._filter_df_by_sn(sn)
-        local_pts, global_pts = self._get_local_global_points(df)
-        self.transM_LR = self._get_transM(local_pts, global_pts)
+        local_pts, global_pts = self.points.points(sn)
+        self.transM_LR = self._get_transM(local_pts, global_pts, stats=self.fit_stats.get(sn))
         if self.transM_LR is None:
             return
 
         # Remove outlier points iteratively from large to small threshold
+        keep = np.ones(len(local_pts), dtype=bool)
         if (
             self._is_criteria_met_points_min_max(sn)
-            and len(df) >= self.THRESHOLD_N_PTS
+            and len(local_pts) >= self.THRESHOLD_N_PTS
             and self.R is not None
             and self.origin is not None
         ):
@@ -754,51 +668,62 @@ class ProbeCalibration:
             # Get transM without removing outliers
             thresholds = [500, 300, 100, 70, 50, 45, 40]
             for threshold in thresholds:
-                df_ = self._remove_outliers(df, threshold=threshold)
-                if not self._is_trajectory_distance_sufficient(df_) or len(df_) < self.THRESHOLD_N_PTS:
+                keep_ = keep & self._inlier_mask(local_pts, global_pts, threshold=threshold)
+                n_kept = np.count_nonzero(keep_)
+                if not self._is_trajectory_distance_sufficient(global_pts[keep_]) or n_kept < self.THRESHOLD_N_PTS:
                     break
-                df = df_
-                local_pts, global_pts = self._get_local_global_points(df)
-                self.transM_LR = self._get_transM(local_pts, global_pts)
-                logger.debug(f"len(df): {len(df)}, threshold: {threshold}, average error: {self.avg_err}")
+                keep = keep_
+                self.transM_LR = self._get_transM(local_pts[keep], global_pts[keep])
+                logger.debug(f"n_pts: {n_kept}, threshold: {threshold}, average error: {self.avg_err}")
             logger.debug("===============")
 
         self._update_l2_error_current_point()
         self._update_info_ui(sn)  # update transformation matrix and overall LR in UI
-        # Update expected global points into the file
-        self._write_transformed_global_points(sn, self.points_file)
+        # Update expected global points in the points file
+        self.points.set_transform(sn, self.model.get_transform(sn))
         self._update_trajectory_file(sn, self.points_file)
 
-        if self.transM_LR is None or len(df) < self.THRESHOLD_N_PTS:
-            logger.debug(f"Not enough points for calibration. {self.transM_LR} = len(df) {len(df)}")
+        n_pts = np.count_nonzero(keep)
+        if self.transM_LR is None or n_pts < self.THRESHOLD_N_PTS:
+            logger.debug(f"Not enough points for calibration. {self.transM_LR} = n_pts {n_pts}")
             return
 
         # Check criteria
-        if self._is_enough_points(df):  # if ret, complete calibration
+        if self._is_enough_points(global_pts[keep]):  # if ret, complete calibration
+            df = self._filter_df_by_sn(sn)[keep].reset_index(drop=True)
             self.complete_calibration(sn, df)
 
-    def _is_trajectory_distance_sufficient(self, df):
-        if df.empty:
+    def _is_trajectory_distance_sufficient(self, global_pts: np.ndarray):
+        """
+        Checks if the global points cross both axes and span the reticle far enough.
+
+        Args:
+            global_pts (np.ndarray): The global points (Nx3 numpy array).
+
+        Returns:
+            bool: True if the trajectory is sufficient for calibration, otherwise False.
+        """
+        if len(global_pts) == 0:
             logger.debug("Trajectory data is empty.")
             return False
 
-        if min(df["global_x"]) > 0 or max(df["global_x"]) < 0 or min(df["global_y"]) > 0 or max(df["global_y"]) < 0:
+        min_x, min_y, min_z = global_pts.min(axis=0)
+        max_x, max_y, max_z = global_pts.max(axis=0)
+        if min_x > 0 or max_x < 0 or min_y > 0 or max_y < 0:
             logger.debug(
-                f"Trajectory distance not cross to axis."
-                f"min_x: {min(df['global_x'])}, max_x: {max(df['global_x'])},"
-                f"min_y: {min(df['global_y'])}, max_y: {max(df['global_y'])}"
+                f"Trajectory distance not cross to axis.min_x: {min_x}, max_x: {max_x},min_y: {min_y}, max_y: {max_y}"
             )
             return False
 
         # Compute span in each local axis
-        df_x = max(df["global_x"]) - min(df["global_x"]) > self.THRESHOLD_MIN_MAX
-        df_y = max(df["global_y"]) - min(df["global_y"]) > self.THRESHOLD_MIN_MAX
-        df_z = max(df["global_z"]) - min(df["global_z"]) > self.THRESHOLD_MIN_MAX_Z
-        if df_x and df_y and df_z:
+        span_x = max_x - min_x > self.THRESHOLD_MIN_MAX
+        span_y = max_y - min_y > self.THRESHOLD_MIN_MAX
+        span_z = max_z - min_z > self.THRESHOLD_MIN_MAX_Z
+        if span_x and span_y and span_z:
             logger.debug("Trajectory distance is sufficient for calibration.")
-            logger.debug(f"X span: {max(df['global_x'])} - {min(df['global_x'])}")
-            logger.debug(f"Y span: {max(df['global_y'])} - {min(df['global_y'])}")
-            logger.debug(f"Z span: {max(df['global_z'])} - {min(df['global_z'])}")
+            logger.debug(f"X span: {max_x} - {min_x}")
+            logger.debug(f"Y span: {max_y} - {min_y}")
+            logger.debug(f"Z span: {max_z} - {min_z}")
             return True
 
         return False
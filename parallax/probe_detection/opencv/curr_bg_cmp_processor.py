@@ -18,13 +18,12 @@ Usage:
 """
 
 import logging
-import os
 
 import cv2
 import numpy as np
 
-from parallax.config.config_path import debug_img_dir
 from parallax.probe_detection.utils.probe_fine_tip_detector import ProbeFineTipDetector
+from parallax.utils.debug_sink import DebugImageSink
 from parallax.utils.utils import UtilsCoords, UtilsCrops
 
 # Set logger name
@@ -35,7 +34,7 @@ logger.setLevel(logging.WARNING)
 class CurrBgCmpProcessor:
     """Finding diff image using Current and Background Comparison"""
 
-    def __init__(self, cam_name, ProbeDetector, original_size, resized_size, reticle_zone=None):
+    def __init__(self, cam_name, ProbeDetector, original_size, resized_size, reticle_zone=None, bg_learning_rate=0.2):
         """
         Initialize the CurrBgCmpProcessor.
 
@@ -44,6 +43,7 @@ class CurrBgCmpProcessor:
             original_size (tuple): The original size of the image (height, width).
             resized_size (tuple): The resized size of the image (height, width).
             reticle_zone (numpy.ndarray, optional): The reticle zone image. Defaults to None.
+            bg_learning_rate (float): Weight of the current frame in the running background model.
         """
         self.cam_name = cam_name
         self.diff_img = None
@@ -51,12 +51,16 @@ class CurrBgCmpProcessor:
         self.curr = None
         self.mask = None
         self.bg = None
+        self.bg_model = None  # Running average of the binary frames, where no probe is seen
+        self.bg_learning_rate = bg_learning_rate
+        self._bg_probe_line = None  # Probe line excluded from the last background update
         self.org_img = None
         self.IMG_SIZE = resized_size
         self.IMG_SIZE_ORIGINAL = original_size
         self.ProbeDetector = ProbeDetector
         self.reticle_zone = reticle_zone
         self.crop_init = 50
+        self.roi = None
 
         # Debug
         self.top_fine, self.bottom_fine, self.left_fine, self.right_fine = None, None, None, None
@@ -100,37 +104,45 @@ class CurrBgCmpProcessor:
 
         if ret:
             # ret_precise_tip = self._get_precise_tip(org_img)
-            self.bg = cv2.bitwise_not(cv2.bitwise_xor(self.diff_img, self.curr_img), mask=self.mask)
+            background = cv2.bitwise_xor(self.diff_img, self.curr_img)
+            self.bg_model = background.astype(np.float32)
+            self._bg_probe_line = None
+            self.bg = cv2.bitwise_not(background, mask=self.mask)
 
         return ret
 
-    def update_cmp(self, curr_img, mask, org_img, get_fine_tip=True, running_flag=lambda: True, ts=None):
+    def update_cmp(self, curr_img, mask, org_img, get_fine_tip=True, running_flag=lambda: True, ts=None, roi=None):
         """Update the comparison.
 
         Args:
             curr_img (numpy.ndarray): Current image.
             mask (numpy.ndarray): Mask image.
             org_img (numpy.ndarray): Original image.
+            roi (tuple, optional): (top, bottom, left, right) region around the last probe line.
+                Only this region is compared and its background updated; None uses the full frame.
 
         Returns:
             bool: True if probe is detected and precise tip is found, False otherwise.
         """
+        if self.bg is None:
+            roi = None  # The background has to be created from a full frame
+        self.roi = roi
         self.mask = mask
         self.ProbeDetector.probe_tip_org = None
         self.curr_img = curr_img
-        self.curr_img = self._get_binary(self.curr_img)
+        self.curr_img = self._get_binary(self.curr_img, roi=roi)
         if self.bg is None:
             self._create_bg(self.curr_img)
         if not running_flag():
             return False
 
-        self._preprocess_diff_image(self.curr_img)
+        self._preprocess_diff_image(self.curr_img, roi=roi)
         if not running_flag():
             return False
 
         # self._save_debug_img(ts=ts)  # tmp debug
 
-        ret = self._update_crop(ts=ts)
+        ret = self._update_crop(ts=ts, roi=roi)
         if not running_flag():
             return False
         if ret:
@@ -141,9 +153,49 @@ class CurrBgCmpProcessor:
                 return False
             # if ret_precise_tip_ret:
             self._update_bg(extended_offset=10)
+        else:
+            # Probe not found: learn the background only where nothing changed
+            foreground = cv2.dilate(self.diff_img, np.ones((5, 5), np.uint8))
+            self._accumulate_bg(self._bg_probe_line, exclude=foreground)
 
         return ret
 
+    def shared_diff(self, curr_img, mask, roi=None):
+        """Compute the difference image without detecting a probe in it.
+
+        Used when several probes are tracked in one pass: the binary image and the
+        difference against this processor's background are computed once, and the
+        probes are found in it by the caller.
+
+        Args:
+            curr_img (numpy.ndarray): Current image.
+            mask (numpy.ndarray): Mask image.
+            roi (tuple, optional): (top, bottom, left, right) region covering all probes.
+                None uses the full frame.
+
+        Returns:
+            numpy.ndarray: Binary difference image, zero outside roi.
+        """
+        if self.bg is None:
+            roi = None  # The background has to be created from a full frame
+        self.roi = roi
+        self.mask = mask
+        self.curr_img = self._get_binary(curr_img, roi=roi)
+        if self.bg is None:
+            self._create_bg(self.curr_img)
+        self._preprocess_diff_image(self.curr_img, roi=roi)
+        return self.diff_img
+
+    def learn_background(self, probe_lines, exclude=None):
+        """Update the background after shared_diff(), except along the found probes.
+
+        Args:
+            probe_lines (numpy.ndarray): Non-zero along every probe found in the frame.
+            exclude (numpy.ndarray, optional): Non-zero around probes that were not found,
+                which may still be in the frame.
+        """
+        self._accumulate_bg(probe_lines, exclude=exclude)
+
     def _update_bg(self, extended_offset=10):
         """Update the background image."""
         kernel = np.ones((3, 3), np.uint8)
@@ -180,13 +232,60 @@ class CurrBgCmpProcessor:
             thickness=10,
         )
 
-        # Combine the processed image with the current image to extract the background
-        self.bg = cv2.bitwise_and(self.curr_img, cv2.bitwise_not(diff_img))
-        self.bg = cv2.bitwise_not(self.bg, mask=self.mask)
+        # Learn the background everywhere except along the probe
+        self._accumulate_bg(diff_img)
+
+    def _accumulate_bg(self, probe_line, exclude=None):
+        """
+        Blend the current binary frame into the running background model.
+
+        Pixels along the probe line are always treated as foreground (background 255, as
+        when the background was captured from a single frame) and keep their history.
+        Pixels the probe has just left have no valid history, so they restart from the
+        current frame. Everything else inside the mask is blended in, restricted to the
+        compared region so the cost is proportional to it.
 
-    def _update_crop(self, ts=None):
+        Args:
+            probe_line (numpy.ndarray or None): Non-zero along the detected probe.
+            exclude (numpy.ndarray, optional): Non-zero where the frame changed and may contain
+                an undetected probe; these pixels are not learned.
+        """
+        region = self.roi if self.roi is not None else (0, self.curr_img.shape[0], 0, self.curr_img.shape[1])
+        top, bottom, left, right = region
+        curr = self.curr_img[top:bottom, left:right]
+        model = self.bg_model[top:bottom, left:right]
+        mask = UtilsCrops.crop(self.mask, region)
+        line = UtilsCrops.crop(probe_line, region)
+
+        learn = np.full(curr.shape, 255, np.uint8) if mask is None else mask.copy()
+        if line is not None:
+            learn[line > 0] = 0
+        if exclude is not None:
+            learn[exclude[top:bottom, left:right] > 0] = 0
+
+        previous_line = UtilsCrops.crop(self._bg_probe_line, region)
+        if previous_line is not None:
+            released = (previous_line > 0) & (learn > 0)
+            model[released] = curr[released]
+        cv2.accumulateWeighted(curr, model, self.bg_learning_rate, mask=learn)
+
+        # Background edges are the pixels lit in more than half of the recent frames,
+        # widened by a pixel so edge jitter between frames does not show up as difference
+        _, background = cv2.threshold(model, 127, 255, cv2.THRESH_BINARY)
+        background = cv2.dilate(background.astype(np.uint8), np.ones((3, 3), np.uint8))
+        bg = cv2.bitwise_not(background, mask=mask)
+        if line is not None:
+            bg[(line > 0) if mask is None else (line > 0) & (mask > 0)] = 255
+        self.bg[top:bottom, left:right] = bg
+        self._bg_probe_line = probe_line
+
+    def _update_crop(self, ts=None, roi=None):
         """Update the crop region.
 
+        Args:
+            roi (tuple, optional): Region the diff image was computed in. Crops stop growing once
+                they cover it.
+
         Returns:
             bool: True if probe is detected, False otherwise.
         """
@@ -220,6 +319,8 @@ class CurrBgCmpProcessor:
 
             if ret:
                 break
+            if roi is not None and UtilsCrops.covers((self.top, self.bottom, self.left, self.right), roi):
+                break  # Nothing left to find outside the compared region
 
             crop_size += 100
 
@@ -298,15 +399,23 @@ class CurrBgCmpProcessor:
         """Get the fine tip boundary."""
         return self.top_fine, self.bottom_fine, self.left_fine, self.right_fine
 
-    def _get_binary(self, curr_img):
+    def _get_binary(self, curr_img, roi=None):
         """Get binary image.
 
         Args:
             curr_img (numpy.ndarray): Current image.
+            roi (tuple, optional): (top, bottom, left, right) region to binarize. The binary
+                image is zero outside of it.
 
         Returns:
             numpy.ndarray: Binary image.
         """
+        if roi is not None:
+            top, bottom, left, right = roi
+            binary = np.zeros_like(curr_img)
+            binary[top:bottom, left:right] = self._get_binary(curr_img[top:bottom, left:right])
+            return binary
+
         curr_img = cv2.adaptiveThreshold(
             curr_img,
             255,
@@ -320,13 +429,22 @@ class CurrBgCmpProcessor:
 
     def _create_bg(self, curr_img):
         """Create background image."""
+        self.bg_model = curr_img.astype(np.float32)
+        self._bg_probe_line = None
         self.bg = cv2.bitwise_not(curr_img)
 
-    def _preprocess_diff_image(self, curr_img):
-        """Preprocess difference image."""
-        self.diff_img = cv2.bitwise_and(curr_img, self.bg, mask=self.mask)
+    def _preprocess_diff_image(self, curr_img, roi=None):
+        """Preprocess difference image, only inside roi if one is given."""
+        if roi is None:
+            self.diff_img = cv2.bitwise_and(curr_img, self.bg, mask=self.mask)
+            return
+
+        top, bottom, left, right = roi
+        self.diff_img = np.zeros_like(curr_img)
+        self.diff_img[top:bottom, left:right] = cv2.bitwise_and(
+            curr_img[top:bottom, left:right], self.bg[top:bottom, left:right], mask=UtilsCrops.crop(self.mask, roi)
+        )
 
     def _save_debug_img(self, frame, ts=None):
         if logger.getEffectiveLevel() == logging.DEBUG:
-            save_path = os.path.join(debug_img_dir, f"{self.cam_name}_{ts}.jpg")
-            cv2.imwrite(save_path, frame)
+            DebugImageSink.instance().save(frame, camera=self.cam_name, ts=ts, tag="bg")
@@ -17,13 +17,12 @@ Usage:
 """
 
 import logging
-import os
 
 import cv2
 import numpy as np
 
-from parallax.config.config_path import debug_img_dir
 from parallax.probe_detection.utils.probe_fine_tip_detector import ProbeFineTipDetector
+from parallax.utils.debug_sink import DebugImageSink
 from parallax.utils.utils import UtilsCoords, UtilsCrops
 
 # Set logger name
@@ -88,7 +87,9 @@ class CurrPrevCmpProcessor:
 
         return ret
 
-    def update_cmp(self, curr_img, prev_img, mask, org_img, get_fine_tip=True, running_flag=lambda: True, ts=None):
+    def update_cmp(
+        self, curr_img, prev_img, mask, org_img, get_fine_tip=True, running_flag=lambda: True, ts=None, roi=None
+    ):
         """Update the comparison.
 
         Args:
@@ -96,22 +97,24 @@ class CurrPrevCmpProcessor:
             prev_img (numpy.ndarray): Previous image.
             mask (numpy.ndarray): Mask image.
             org_img (numpy.ndarray): Original image.
+            roi (tuple, optional): (top, bottom, left, right) region around the last probe line.
+                Only this region is compared; None compares the full frame.
 
         Returns:
             bool: True if probe is detected and precise tip is found, False otherwise.
         """
         self.mask = mask
-        self._preprocess_diff_images(curr_img, prev_img)  # Subtraction
+        self._preprocess_diff_images(curr_img, prev_img, roi=roi)  # Subtraction
         if not running_flag():
             return False
 
-        ret = self._apply_threshold()
+        ret = self._apply_threshold(roi=roi)
         if not ret or not running_flag():
             return False
 
         # self._save_debug_img(ts=ts)  # tmp debug
 
-        ret = self._update_crop(ts=ts)
+        ret = self._update_crop(ts=ts, roi=roi)
         if not running_flag():
             return False
         if ret:
@@ -122,9 +125,13 @@ class CurrPrevCmpProcessor:
                     return False
         return ret
 
-    def _update_crop(self, ts=None):
+    def _update_crop(self, ts=None, roi=None):
         """Update the crop region.
 
+        Args:
+            roi (tuple, optional): Region the diff image was computed in. Crops stop growing once
+                they cover it.
+
         Returns:
             bool: True if probe is detected, False otherwise.
         """
@@ -152,6 +159,8 @@ class CurrPrevCmpProcessor:
                 self.right,
             ):
                 ret = False
+            if not ret and roi is not None and UtilsCrops.covers((self.top, self.bottom, self.left, self.right), roi):
+                break  # Nothing left to find outside the compared region
             crop_size += 100
 
         return ret
@@ -219,34 +228,56 @@ class CurrPrevCmpProcessor:
         """Get the fine tip boundary."""
         return self.top_fine, self.bottom_fine, self.left_fine, self.right_fine
 
-    def _preprocess_diff_images(self, curr_img, prev_img):
+    def _preprocess_diff_images(self, curr_img, prev_img, roi=None):
         """Subtract current image from previous image to find differences.
 
         Args:
             curr_img (numpy.ndarray): Current image.
             prev_img (numpy.ndarray): Previous image.
+            roi (tuple, optional): (top, bottom, left, right) region to compare. The diff
+                image is zero outside of it.
         """
-        self.diff_img = cv2.subtract(prev_img, curr_img, mask=self.mask)
+        if roi is None:
+            self.diff_img = cv2.subtract(prev_img, curr_img, mask=self.mask)
+            return
+
+        top, bottom, left, right = roi
+        self.diff_img = np.zeros_like(curr_img)
+        self.diff_img[top:bottom, left:right] = cv2.subtract(
+            prev_img[top:bottom, left:right],
+            curr_img[top:bottom, left:right],
+            mask=UtilsCrops.crop(self.mask, roi),
+        )
 
-    def _apply_threshold(self):
+    def _apply_threshold(self, roi=None):
         """Apply threshold to suppress shadows and check significant differences.
 
+        Args:
+            roi (tuple, optional): (top, bottom, left, right) region of the diff image to threshold.
+
         Returns:
             bool: True if significant differences are found, False otherwise.
         """
-        max_value = np.max(self.diff_img)
+        top, bottom, left, right = roi if roi is not None else (0, self.diff_img.shape[0], 0, self.diff_img.shape[1])
+        diff_img = self.diff_img[top:bottom, left:right]
+        mask = UtilsCrops.crop(self.mask, roi)
+
+        max_value = np.max(diff_img)
         if max_value < 20:
             logger.debug(f"Not strong pattern detected on diff image. max_value: {max_value}")
             return False
 
         threshold_value = self.shadow_threshold * max_value
-        self.diff_img[self.diff_img < threshold_value] = 0
-        _, self.diff_img = cv2.threshold(self.diff_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        self.diff_img = cv2.bitwise_and(self.diff_img, self.diff_img, mask=self.mask)
+        diff_img[diff_img < threshold_value] = 0
+        _, diff_img = cv2.threshold(diff_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        diff_img = cv2.bitwise_and(diff_img, diff_img, mask=mask)
+        if roi is None:
+            self.diff_img = diff_img
+        else:
+            self.diff_img[top:bottom, left:right] = diff_img
 
         return True
 
     def _save_debug_img(self, ts=None):
         if logger.getEffectiveLevel() == logging.DEBUG:
-            save_path = os.path.join(debug_img_dir, f"{self.cam_name}_{ts}.jpg")
-            cv2.imwrite(save_path, self.diff_img)
+            DebugImageSink.instance().save(self.diff_img, camera=self.cam_name, ts=ts, tag="diff")
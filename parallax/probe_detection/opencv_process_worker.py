@@ -1,13 +1,18 @@
 import logging
 import threading
 import time
+from typing import Optional
 
 import cv2
+import numpy as np
 
 from parallax.probe_detection.opencv.curr_bg_cmp_processor import CurrBgCmpProcessor
 from parallax.probe_detection.opencv.curr_prev_cmp_processor import CurrPrevCmpProcessor
+from parallax.probe_detection.opencv.multi_probe_tracker import MultiProbeTracker
 from parallax.probe_detection.opencv.probe_detector import ProbeDetector
+from parallax.probe_detection.opencv.tracking_roi import TrackingROI
 from parallax.reticle_detection.mask_generator import MaskGenerator
+from parallax.utils.compute_budget import ComputeBudget
 
 # Set logger
 logger = logging.getLogger(__name__)
@@ -50,6 +55,7 @@ class OpenCVProcessWorker:
         self.probe_stopped = True
         self.stopped_first_frame = True
         self.copy_last_detected_frame = False
+        self.multi_probe = False  # Track every locked probe in one pass while moving
 
         # --- Data Containers ---
         self.frame = None
@@ -68,11 +74,19 @@ class OpenCVProcessWorker:
         self.reticle_zone = None
         self.probes = {}  # Cache for switching probes
 
+        # Scratch buffers reused across frames, reallocated only when the resolution changes.
+        # Gray and blurred images are double-buffered: the previous frame stays valid while
+        # the next one is written (prev_img for comparison, gray_img for manual clicks).
+        self._buffers = {}
+        self._frame_count = 0
+
         # --- Processors ---
         self.mask_detect = MaskGenerator()
         self.probeDetect = None
         self.currPrevCmpProcess = None
         self.currBgCmpProcess = None
+        self.tracking_roi = TrackingROI(self.IMG_SIZE)  # Lock-on search region after the first detection
+        self.multiProbeTracker = MultiProbeTracker(self.name, self.IMG_SIZE)
 
     # =========================================================
     #  Thread Management
@@ -84,6 +98,7 @@ class OpenCVProcessWorker:
             print(f"{self.name} - OpenCV Process worker thread already running")
             return
         self.running = True
+        ComputeBudget.instance().register(f"{self.name}-opencv")
         self.worker_thread = threading.Thread(target=self._run_loop, daemon=True, name=f"OpenCVWorker-{self.name}")
         self.worker_thread.start()
         print(f"{self.name} - OpenCV Process worker thread started")
@@ -97,6 +112,7 @@ class OpenCVProcessWorker:
         self.stop()
 
     def stop(self):
+        ComputeBudget.instance().unregister(f"{self.name}-opencv")
         if self.worker_thread and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=1.0)
 
@@ -108,7 +124,9 @@ class OpenCVProcessWorker:
             try:
                 if self.new_frame_available:
                     if self.is_detection_on:
-                        self.process()
+                        budget = ComputeBudget.instance()
+                        with budget.slot(self.name, budget.priority_for(camera_sn=self.name, stage_sn=self.sn)):
+                            self.process()
                     self.new_frame_available = False
                 else:
                     time.sleep(0.01)  # Short sleep to prevent CPU hogging
@@ -133,6 +151,8 @@ class OpenCVProcessWorker:
 
     def update_sn(self, sn):
         """Update the serial number and initialize/switch probe detectors."""
+        if sn != self.sn:
+            self.tracking_roi.reset()
         if sn not in self.probes:
             self.sn = sn
             # Initialize core logic classes
@@ -179,30 +199,53 @@ class OpenCVProcessWorker:
     def cache_last_detected_frame(self):
         self.copy_last_detected_frame = True
 
+    def set_multi_probe(self, enabled):
+        """Track all probes seen by this camera in one pass, instead of only the selected one."""
+        self.multi_probe = enabled
+        self.multiProbeTracker.reset()
+
     # =========================================================
     #  Internal Processing Logic
     # =========================================================
 
+    def _buffer(self, name, shape, dtype=np.uint8):
+        """Return the scratch buffer `name`, reallocating it if the shape changed."""
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+
     def _prepare_current_image(self):
         """Pre-process image: Grayscale, Resize, Blur, Mask."""
         if self.frame is None:
             return
 
+        slot = self._frame_count % 2
+        self._frame_count += 1
+
         if self.frame.ndim > 2:
-            self.gray_img = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+            gray = self._buffer(f"gray{slot}", self.frame.shape[:2])
+            self.gray_img = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY, dst=gray)
         else:
             self.gray_img = self.frame
 
-        self.curr_img = cv2.resize(self.gray_img, self.IMG_SIZE)
+        size = (self.IMG_SIZE[1], self.IMG_SIZE[0])
+        resized = cv2.resize(self.gray_img, self.IMG_SIZE, dst=self._buffer("resized", size))
+
+        # Never overwrite the buffer still held as the previous image
+        curr = self._buffer("curr0", size)
+        if curr is self.prev_img:
+            curr = self._buffer("curr1", size)
 
         # Smoothing based on shank count
         if self.probeDetect and self.probeDetect.nShanks == 1:
-            self.curr_img = cv2.GaussianBlur(self.curr_img, (9, 9), 0)
+            self.curr_img = cv2.GaussianBlur(resized, (9, 9), 0, dst=curr)
         else:
-            self.curr_img = cv2.GaussianBlur(self.curr_img, (3, 3), 0)
+            self.curr_img = cv2.GaussianBlur(resized, (3, 3), 0, dst=curr)
 
         # Generate Mask
-        self.mask = self.mask_detect.process(self.curr_img)
+        self.mask = self.mask_detect.process(self.curr_img, dst=self._buffer("mask", size))
 
     def process(self):
         """Main processing pipeline executed by the thread."""
@@ -219,6 +262,9 @@ class OpenCVProcessWorker:
         if self.probeDetect.angle is None:
             # Phase 1: Initial Detection (First Comparison)
             self._run_first_cmp()
+        elif self.multi_probe and not self.probe_stopped and len(self._locked_detectors()) > 1:
+            # Phase 2, several probes: one shared pass for all of them
+            self._run_multi_probe_cmp()
         else:
             # Phase 2: Tracking
             self._run_tracking_cmp()
@@ -239,31 +285,51 @@ class OpenCVProcessWorker:
 
         if ret:
             logger.debug(f"{self.name} - First comparison successful")
+            self.tracking_roi.lock(self.probeDetect.probe_tip, self.probeDetect.probe_base)
             self._trigger_callback("on_status", "update")
             return True
         return False
 
     def _run_tracking_cmp(self) -> bool:
-        """Run comparison for tracking (Moving vs Stopped logic)."""
+        """Run comparison for tracking, inside the lock-on region when one is set."""
+        roi = self.tracking_roi.region()
+        ret = self._run_tracking_cmp_in(roi)
+        if ret:
+            self.tracking_roi.lock(self.probeDetect.probe_tip, self.probeDetect.probe_base)
+        elif ret is not None and roi is not None:
+            self.tracking_roi.miss()
+        return bool(ret)
+
+    def _run_tracking_cmp_in(self, roi) -> Optional[bool]:
+        """Run comparison for tracking (Moving vs Stopped logic).
+
+        Args:
+            roi (tuple or None): (top, bottom, left, right) region to compare, None for the full frame.
+
+        Returns:
+            bool or None: Whether the probe was found, or None if the frame was skipped.
+        """
 
         # --- Case A: Probe Stopped (Calibration Mode) ---
         if self.probe_stopped:
             if not self.stopped_first_frame:
-                return False
+                return None
 
             # Consistency Check: Is stage time newer than image time?
             if (self.stage_ts is not None and self.img_ts is not None) and (self.stage_ts - self.img_ts > 0):
                 logger.debug(f"{self.name} - Stage ts future: {self.stage_ts}, img ts: {self.img_ts}")
-                return False
+                return None
 
             # 1. Try Current vs Previous
             ret = self.currPrevCmpProcess.update_cmp(
-                self.curr_img, self.prev_img, self.mask, self.gray_img, ts=self.stage_ts
+                self.curr_img, self.prev_img, self.mask, self.gray_img, ts=self.stage_ts, roi=roi
             )
 
             # 2. Try Current vs Background if (1) failed
             if not ret:
-                ret = self.currBgCmpProcess.update_cmp(self.curr_img, self.mask, self.gray_img, ts=self.stage_ts)
+                ret = self.currBgCmpProcess.update_cmp(
+                    self.curr_img, self.mask, self.gray_img, ts=self.stage_ts, roi=roi
+                )
 
             # Debug Saving
             if logger.getEffectiveLevel() == logging.DEBUG:
@@ -292,7 +358,7 @@ class OpenCVProcessWorker:
 
         # --- Case B: Probe Moving ---
         else:
-            ret = self.currBgCmpProcess.update_cmp(self.curr_img, self.mask, self.gray_img, get_fine_tip=False)
+            ret = self.currBgCmpProcess.update_cmp(self.curr_img, self.mask, self.gray_img, get_fine_tip=False, roi=roi)
 
             if ret:
                 self._trigger_callback(
@@ -305,6 +371,41 @@ class OpenCVProcessWorker:
                 return True
             return False
 
+    def _locked_detectors(self):
+        """Return the detectors of all cached probes whose line is known, by serial number."""
+        return {
+            sn: probe["probeDetector"]
+            for sn, probe in self.probes.items()
+            if probe["probeDetector"].angle is not None and probe["probeDetector"].probe_tip != (0, 0)
+        }
+
+    def _run_multi_probe_cmp(self) -> bool:
+        """Track every locked probe with one difference image and one Hough pass.
+
+        The selected probe's background processor provides the shared difference image,
+        restricted to the region around all predicted probe lines, and learns the background
+        around all found probes.
+
+        Returns:
+            bool: True if any probe was found.
+        """
+        detectors = self._locked_detectors()
+        roi = self.multiProbeTracker.region(detectors, margin=self.tracking_roi.margin)
+        diff_img = self.currBgCmpProcess.shared_diff(self.curr_img, self.mask, roi=roi)
+        found = self.multiProbeTracker.update(diff_img, detectors)
+        missed = [sn for sn in detectors if sn not in found]
+        self.currBgCmpProcess.learn_background(
+            self.multiProbeTracker.draw_lines(detectors, found),
+            exclude=self.multiProbeTracker.draw_lines(detectors, missed, thickness=30) if missed else None,
+        )
+
+        for sn in found:
+            detector = detectors[sn]
+            self._trigger_callback("on_tip_moving", self.img_ts, sn, detector.probe_tip_org, detector.probe_base_org)
+        if self.sn in found:
+            self.tracking_roi.lock(self.probeDetect.probe_tip, self.probeDetect.probe_base)
+        return bool(found)
+
     def clicked_position(self, pt):
         """Handle manual click for calibration."""
         if self.probeDetect is None:
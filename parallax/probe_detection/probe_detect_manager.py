@@ -53,6 +53,7 @@ class DrawWorker(QRunnable):
         self.frame = None
         self.tip_coords, self.base_coords = None, None
         self.tip_coords_color, self.base_coords_color = None, None
+        self.moving_coords = {}  # sn -> (tip, base) of each probe tracked while stages move
         self.h = None
         self.w = None
         self.status = "first_detect"
@@ -221,6 +222,16 @@ class DrawWorker(QRunnable):
         if self.base_coords is not None and self.frame is not None:
             cv2.circle(self.frame, self.base_coords, 5, self.base_coords_color, -1)
 
+        if self.frame is None:
+            return
+        moving_coords = self.moving_coords
+        for sn, (tip, base) in moving_coords.items():
+            cv2.circle(self.frame, tip, 5, (255, 255, 0), -1)
+            if base is not None:
+                cv2.circle(self.frame, base, 5, (0, 255, 0), -1)
+            if len(moving_coords) > 1:
+                cv2.putText(self.frame, sn, (tip[0] + 10, tip[1]), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
+
     def _draw_detection_status(self):
         """
         Draws a boundary on the frame to indicate detection status:
@@ -261,6 +272,20 @@ class DrawWorker(QRunnable):
         # if self.frame is not None and base_coords is not None:
         #    cv2.circle(self.frame, base_coords, 5, color, -1)
 
+    def update_moving_coords(self, sn, tip_coords, base_coords=None):
+        """Update the tip (and base) of one probe tracked while its stage moves.
+        Args:
+            sn (str): Serial number of the stage.
+            tip_coords (tuple): Pixel coordinates of the probe tip.
+            base_coords (tuple): Pixel coordinates of the probe base, or None to draw only the tip.
+        """
+        # Replaced, not mutated, so the draw loop never sees the dict change size
+        self.moving_coords = {**self.moving_coords, sn: (tip_coords, base_coords)}
+
+    def clear_moving_coords(self):
+        """Clear the tips of the probes tracked while stages move."""
+        self.moving_coords = {}
+
     def update_status(self, status):
         """Update the status of the worker."""
         self.status = status
@@ -308,6 +333,9 @@ class ProbeDetectManager(QObject):
         self.last_detected_frame = None
         self.detect_algorithm = "yolo"  # Default algorithm
 
+        # Load and warm up the YOLO models now so starting detection does not block
+        YoloProcessWorker.preload(self.name)
+
     def _init_draw_thread(self):
         """Initialize the draw worker thread."""
         reticle_coords, reticle_coords_debug = self.get_reticle_coords(self.name)
@@ -324,9 +352,10 @@ class ProbeDetectManager(QObject):
         self.opencvProcessWorker = OpenCVProcessWorker(
             self.name, camera_resolution, test=self.model.test, callbacks=self.receive_opencv_detections()
         )
+        self.opencvProcessWorker.set_multi_probe(self.model.get_probe_detect_multi_probe(self.name))
 
         # YOLO Process Worker
-        # init and warmup the model but no thread running yet
+        # models are preloaded in the background; frames queue until they are ready
         self.yoloProcessWorker = YoloProcessWorker(
             self.name,
             camera_resolution,
@@ -444,8 +473,17 @@ class ProbeDetectManager(QObject):
         elif self.detect_algorithm == "yolo" and self.yoloProcessWorker is not None:
             sn = self.model.get_selected_stage_sn()
             self.yoloProcessWorker.update_sn(sn)  # TODO set real sn
+            self.yoloProcessWorker.set_priority_class(self._get_probe_class(sn))
             self.yoloProcessWorker.start_running()  # running thread
 
+    def _get_probe_class(self, sn):
+        """Map the shank count of a stage to the YOLO class name of its probe."""
+        stage = self.model.get_stage(sn) if sn else None
+        if stage is None:
+            return None
+        shank_cnt = getattr(stage, "shank_cnt", None) or 1
+        return "1shank" if shank_cnt == 1 else f"{shank_cnt}shanks"
+
     def get_mask(self):
         """Save the current image and global mask."""
         return self.worker.mask_bool.astype(np.uint8) * 255
@@ -466,6 +504,7 @@ class ProbeDetectManager(QObject):
         if self.worker is not None:
             self.worker.update_tip_coords(None, None)
             self.worker.update_base_coords(None, None)
+            self.worker.clear_moving_coords()
             self.worker.clear_yolo_detections()
 
     def stop(self):
@@ -551,11 +590,9 @@ class ProbeDetectManager(QObject):
             sn (str): Serial number of the device.
             tip_coords (tuple): Pixel coordinates of the detected probe tip.
         """
-        # Update into screen
+        # Update into screen; with multi-probe tracking each probe keeps its own overlay
         if self.worker is not None:
-            self.worker.update_tip_coords(tip_coords, color=(255, 255, 0))
-        if self.model.test:
-            self.worker.update_base_coords(base_coords, color=(0, 255, 0))
+            self.worker.update_moving_coords(sn, tip_coords, base_coords if self.model.test else None)
 
     def start_detection(self, sn):  # Call from stage listener. (stage is moving)
         """Start the probe detection for a specific serial number.
@@ -569,6 +606,7 @@ class ProbeDetectManager(QObject):
         if self.worker is not None:  # Clear current tip/base coords and mask
             self.worker.update_tip_coords(None, None)
             self.worker.update_base_coords(None, None)
+            self.worker.clear_moving_coords()
             self.worker.clear_yolo_detections()
 
         if self.detect_algorithm == "opencv":
@@ -585,6 +623,20 @@ class ProbeDetectManager(QObject):
                 self.yoloProcessWorker.update_sn(sn)
                 self.yoloProcessWorker.start_detection()  # is_detection_on = True, and processing frame
 
+    def set_multi_probe(self, enabled):
+        """Let the OpenCV worker track all locked probes in one pass while stages move.
+
+        The setting is read from the model when the worker starts; this applies it to a
+        running worker.
+
+        Args:
+            enabled (bool): Track every probe instead of only the selected one.
+        """
+        if self.opencvProcessWorker is not None:
+            self.opencvProcessWorker.set_multi_probe(enabled)
+        if self.worker is not None:
+            self.worker.clear_moving_coords()
+
     def enable_calibration(self, stage_ts, sn):  # Call from stage listener. (stage is stopped)
         """
         Enable calibration mode for the worker. (stage is stopped)
@@ -596,6 +648,7 @@ class ProbeDetectManager(QObject):
         if self.worker is not None:
             self.worker.update_tip_coords(None, None)
             self.worker.update_base_coords(None, None)
+            self.worker.clear_moving_coords()
             self.worker.clear_yolo_detections()
         if self.opencvProcessWorker is not None and self.detect_algorithm == "opencv":
             self.opencvProcessWorker.update_stage_timestamp(stage_ts)
@@ -603,6 +656,8 @@ class ProbeDetectManager(QObject):
         if self.yoloProcessWorker is not None and self.detect_algorithm == "yolo":
             self.yoloProcessWorker.update_stage_timestamp(stage_ts)
             self.yoloProcessWorker.enable_calib()
+        if self.yoloProcessWorker is not None:
+            self.yoloProcessWorker.set_stage_moving(sn, False)
 
     def disable_calibration(self, sn):  # Call from stage listener. (stage is moving)
         """Disable calibration mode for the worker. (stage is moving)
@@ -616,6 +671,13 @@ class ProbeDetectManager(QObject):
             self.opencvProcessWorker.disable_calib()
         if self.yoloProcessWorker is not None:
             self.yoloProcessWorker.disable_calib()
+            self.yoloProcessWorker.set_stage_moving(sn, True)
+
+    def get_effective_fps(self):
+        """Return the rate frames are sent to the global YOLO model, or None if it is not running."""
+        if self.yoloProcessWorker is None:
+            return None
+        return self.yoloProcessWorker.get_effective_fps()
 
     def set_name(self, camera_name):
         """
@@ -624,7 +686,10 @@ class ProbeDetectManager(QObject):
         Args:
             camera_name (str): Name of the camera.
         """
-        self.name = camera_name
+        if camera_name != self.name:
+            YoloProcessWorker.release(self.name)  # Models are per camera name; free the old pair
+            self.name = camera_name
+            YoloProcessWorker.preload(self.name)
         if self.worker is not None:
             reticle_coords, reticle_coords_debug = self.get_reticle_coords(self.name)
             self.worker.set_name_coords(self.name, reticle_coords, reticle_coords_debug)
@@ -0,0 +1,99 @@
+"""
+ModelLoader: Background loading and warmup of detection models.
+
+Loading YOLO weights and running the warmup inferences takes seconds per model. The
+loader runs both on a small background pool so the GUI never blocks on them, and hands
+out one future per model key. Asking for the same key again returns the same future,
+so models can be preloaded at application start and picked up later by the workers.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+from parallax.utils.compute_budget import ComputeBudget
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class ModelLoader:
+    """Shared background pool loading and warming up models, one future per key."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Initialize the loader.
+
+        Args:
+            max_workers (int): Number of models loaded concurrently.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ModelLoader")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.timings = {}  # key -> {"load_s": float, "warmup_s": float}
+
+    @classmethod
+    def instance(cls) -> "ModelLoader":
+        """Return the shared loader."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def submit(self, key: Hashable, load_fn: Callable, warmup_fn: Optional[Callable] = None) -> Future:
+        """
+        Load a model in the background, or return the pending/loaded future for the key.
+
+        A key whose previous load failed is loaded again.
+
+        Args:
+            key: Identifies the model, e.g. (role, camera name, weights path).
+            load_fn (callable): Returns the loaded model.
+            warmup_fn (callable): Called with the loaded model before it is reported ready.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the loaded model.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                return future
+            future = self._executor.submit(self._load, key, load_fn, warmup_fn)
+            self._futures[key] = future
+            return future
+
+    def get(self, key: Hashable) -> Optional[Future]:
+        """Return the future for a key, if it was submitted."""
+        with self._lock:
+            return self._futures.get(key)
+
+    def forget(self, key: Hashable = None):
+        """Drop one cached future, or all of them if no key is given."""
+        with self._lock:
+            if key is None:
+                self._futures.clear()
+                self.timings.clear()
+            else:
+                self._futures.pop(key, None)
+                self.timings.pop(key, None)
+
+    def _load(self, key, load_fn, warmup_fn):
+        """Load and warm up one model, recording the timings."""
+        budget = ComputeBudget.instance()
+        with budget.slot(str(key)):
+            t0 = time.perf_counter()
+            model = load_fn()
+            t1 = time.perf_counter()
+            if warmup_fn is not None and model is not None:
+                warmup_fn(model)
+            t2 = time.perf_counter()
+
+        self.timings[key] = {"load_s": t1 - t0, "warmup_s": t2 - t1}
+        logger.info(f"{key} - model ready: load {t1 - t0:.2f}s, warmup {t2 - t1:.2f}s")
+        return model
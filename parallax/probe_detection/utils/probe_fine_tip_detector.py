@@ -5,13 +5,12 @@ Static version - no instantiation required.
 
 import json
 import logging
-import os
-import time
 
 import cv2
 import numpy as np
 
-from parallax.config.config_path import debug_img_dir, img_processing_config_file
+from parallax.config.config_path import img_processing_config_file
+from parallax.utils.debug_sink import DebugImageSink
 
 # Set logger name
 logger = logging.getLogger(__name__)
@@ -276,25 +275,14 @@ class ProbeFineTipDetector:
         return (cx, cy)
 
     @classmethod
-    def get_precise_tip(
-        cls, img, tip=None, base=None, offset_x=0, offset_y=0, direction="S", cam_name="cam", check_validity=True
-    ):
-        """Get the precise tip coordinates from the image."""
-        config = cls._ensure_config_loaded()
-        debug_config = config.get("debug", {})
-        refinement_config = config.get("tip_refinement", {})
-
-        if logger.getEffectiveLevel() == logging.DEBUG and debug_config.get("save_images", True):
-            img_before = img.copy()
-            cv2.circle(img_before, (tip[0] - offset_x, tip[1] - offset_y), 1, (0, 0, 255), -1)
-            save_path = os.path.join(debug_img_dir, f"{cam_name}_{tip}_{time.time()}_before.jpg")
-            cv2.imwrite(save_path, img_before)
-
-        img = cls._preprocess_image(img)
+    def _refine(cls, img, tip, base, offset_x, offset_y, direction):
+        """
+        Refine the tip on a preprocessed (binary) window.
 
-        if check_validity and not cls._is_valid(img):
-            logger.debug("Boundary check failed.")
-            return False, tip
+        Returns:
+            tuple: (ret, precise_tip_extended, precise_tip, base)
+        """
+        refinement_config = cls._ensure_config_loaded().get("tip_refinement", {})
 
         # TODO: base is none, get base from contour centroid and direction from tip and base
         precise_tip = cls._detect_closest_centroid(img, tip, offset_x, offset_y, direction)
@@ -312,8 +300,32 @@ class ProbeFineTipDetector:
                 base = cls._get_base(img, precise_tip, offset_x, offset_y)
                 if base is None:
                     logger.debug("Could not determine base for tip refinement.")
-                    return False, precise_tip
+                    return False, precise_tip, precise_tip, None
             precise_tip_extended = cls.add_L2_offset_to_tip(precise_tip, base)
+        return True, precise_tip_extended, precise_tip, base
+
+    @classmethod
+    def get_precise_tip(
+        cls, img, tip=None, base=None, offset_x=0, offset_y=0, direction="S", cam_name="cam", check_validity=True
+    ):
+        """Get the precise tip coordinates from the image."""
+        config = cls._ensure_config_loaded()
+        debug_config = config.get("debug", {})
+
+        if logger.getEffectiveLevel() == logging.DEBUG and debug_config.get("save_images", True):
+            img_before = img.copy()
+            cv2.circle(img_before, (tip[0] - offset_x, tip[1] - offset_y), 1, (0, 0, 255), -1)
+            DebugImageSink.instance().save(img_before, camera=cam_name, tag=f"tip{tip[0]}-{tip[1]}_before")
+
+        img = cls._preprocess_image(img)
+
+        if check_validity and not cls._is_valid(img):
+            logger.debug("Boundary check failed.")
+            return False, tip
+
+        ret, precise_tip_extended, precise_tip, base = cls._refine(img, tip, base, offset_x, offset_y, direction)
+        if not ret:
+            return False, precise_tip
 
         if logger.getEffectiveLevel() == logging.DEBUG and debug_config.get("save_images", True):
             x, y = precise_tip_extended[0] - offset_x, precise_tip_extended[1] - offset_y
@@ -329,8 +341,7 @@ class ProbeFineTipDetector:
             if base is not None:
                 x, y = base[0] - offset_x, base[1] - offset_y
                 cv2.circle(img, (x, y), 1, (255, 0, 0), thickness)  # base
-            save_path = os.path.join(debug_img_dir, f"{cam_name}_{tip}_{time.time()}_after.jpg")
-            cv2.imwrite(save_path, img)
+            DebugImageSink.instance().save(img, camera=cam_name, tag=f"tip{tip[0]}-{tip[1]}_after")
 
         return True, precise_tip_extended
 
@@ -375,3 +386,151 @@ class ProbeFineTipDetector:
         global_base = (local_base[0] + offset_x, local_base[1] + offset_y)
 
         return global_base
+
+    # =========================================================
+    #  Batched API
+    # =========================================================
+    @classmethod
+    def get_precise_tips(cls, img, tips, crop_size=25, direction="S", cam_name="cam", check_validity=True):
+        """
+        Refine all tip candidates of one frame at once.
+
+        The windows around every tip are extracted with a single strided gather, and gray
+        conversion, blur, Otsu threshold and the boundary check run on the whole stack.
+        Windows near the image border are shifted inward so all windows share one size.
+
+        Args:
+            img (np.ndarray): Full frame (gray or BGR).
+            tips (array-like): (N, 2) tip candidates (x, y) in frame pixels.
+            crop_size (int): Half-size of the window around each tip.
+            direction (str): Probe direction passed to the refinement.
+            cam_name (str): Camera name for debug images.
+            check_validity (bool): Run the boundary check.
+
+        Returns:
+            tuple: (points, ok) where points is an (N, 2) float array of refined tips
+                (the input tip where refinement failed) and ok is an (N,) bool array.
+        """
+        tips = np.asarray(tips, dtype=np.float64).reshape(-1, 2)
+        points = tips.copy()
+        ok = np.zeros(len(tips), dtype=bool)
+        if len(tips) == 0:
+            return points, ok
+
+        height, width = img.shape[:2]
+        size = 2 * crop_size
+        if height < size or width < size:
+            # Frame smaller than a window: refine one by one on clipped windows
+            for k, (x, y) in enumerate(tips.astype(int)):
+                ret, tip = cls.get_precise_tip(
+                    img, tip=(x, y), offset_x=0, offset_y=0, cam_name=cam_name, check_validity=check_validity
+                )
+                if ret:
+                    ok[k], points[k] = True, tip
+            return points, ok
+
+        windows, origins = cls._gather_windows(img, tips.astype(int), crop_size)
+        binary = cls._preprocess_batch(windows)
+        valid = cls._is_valid_batch(binary) if check_validity else np.ones(len(tips), dtype=bool)
+
+        debug_config = cls._ensure_config_loaded().get("debug", {})
+        if logger.getEffectiveLevel() == logging.DEBUG and debug_config.get("save_images", True):
+            DebugImageSink.instance().save(np.hstack(binary), camera=cam_name, tag="tips_binary")
+
+        for k in np.flatnonzero(valid):
+            tip = (int(tips[k, 0]), int(tips[k, 1]))
+            offset_x, offset_y = int(origins[k, 0]), int(origins[k, 1])
+            ret, tip_extended, _, _ = cls._refine(binary[k], tip, None, offset_x, offset_y, direction)
+            if ret:
+                ok[k] = True
+                points[k] = tip_extended
+        return points, ok
+
+    @staticmethod
+    def _gather_windows(img, tips, crop_size):
+        """
+        Extract equally sized windows around the tips with one strided gather.
+
+        Returns:
+            tuple: (windows (N, 2c, 2c[, C]), origins (N, 2) as (left, top))
+        """
+        height, width = img.shape[:2]
+        size = 2 * crop_size
+        left = np.clip(tips[:, 0] - crop_size, 0, width - size)
+        top = np.clip(tips[:, 1] - crop_size, 0, height - size)
+        view = np.lib.stride_tricks.sliding_window_view(img, (size, size), axis=(0, 1))
+        windows = view[top, left]  # (N, [C,] size, size)
+        if windows.ndim == 4:
+            windows = np.moveaxis(windows, 1, -1)
+        return np.ascontiguousarray(windows), np.stack([left, top], axis=1)
+
+    @classmethod
+    def _preprocess_batch(cls, windows):
+        """Vectorized _preprocess_image over a stack of equally sized windows."""
+        n, h, w = windows.shape[:3]
+        if windows.ndim == 4 and windows.shape[3] == 3:
+            windows = cv2.cvtColor(windows.reshape(n * h, w, 3), cv2.COLOR_BGR2GRAY).reshape(n, h, w)
+
+        preprocess_config = cls._ensure_config_loaded().get("preprocessing", {})
+        blur_config = preprocess_config.get("gaussian_blur", {})
+        kx, ky = tuple(blur_config.get("kernel_size", [7, 7]))
+        sigma = blur_config.get("sigma", 0)
+
+        # Blur all windows in one call: pad each with its own reflection (OpenCV's default
+        # border) so no pixel sees a neighbouring window, then cut the interiors back out
+        px, py = kx // 2, ky // 2
+        padded = np.pad(windows, ((0, 0), (py, py), (px, px)), mode="reflect")
+        mosaic = cv2.GaussianBlur(padded.reshape(n * (h + 2 * py), w + 2 * px), (kx, ky), sigma)
+        blurred = mosaic.reshape(n, h + 2 * py, w + 2 * px)[:, py : py + h, px : px + w]
+
+        threshold_config = preprocess_config.get("threshold", {})
+        max_value = threshold_config.get("max_value", 255)
+        if threshold_config.get("type", "OTSU") == "OTSU":
+            thresh = cls._otsu_batch(blurred)
+        else:
+            thresh = np.full(n, threshold_config.get("threshold_value", 0))
+        return np.where(blurred > thresh[:, None, None], max_value, 0).astype(np.uint8)
+
+    @staticmethod
+    def _otsu_batch(imgs):
+        """Per-image Otsu threshold of a uint8 stack, following cv2.THRESH_OTSU."""
+        n = len(imgs)
+        hist = np.zeros((n, 256), dtype=np.float64)
+        np.add.at(hist, (np.repeat(np.arange(n), imgs[0].size), imgs.reshape(-1)), 1)
+        p = hist / imgs[0].size
+        levels = np.arange(256, dtype=np.float64)
+        q1 = np.cumsum(p, axis=1)
+        m1 = np.cumsum(p * levels, axis=1)
+        mu = m1[:, -1:]
+        q2 = 1.0 - q1
+        eps = np.finfo(np.float32).eps
+        usable = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mu1 = m1 / q1
+            mu2 = (mu - m1) / q2
+            sigma = np.where(usable, q1 * q2 * (mu1 - mu2) ** 2, -1.0)
+        return np.argmax(sigma, axis=1)
+
+    @classmethod
+    def _is_valid_batch(cls, imgs):
+        """
+        Vectorized _is_valid: count the 8-connected runs of background pixels on the
+        window border and reject windows with max_contours or more of them.
+        """
+        boundary_config = cls._ensure_config_loaded().get("validation", {}).get("boundary_check", {})
+        if not boundary_config.get("enable", True):
+            return np.ones(len(imgs), dtype=bool)
+        max_contours = boundary_config.get("max_contours", 2)
+
+        # Border pixels in clockwise order, starting at the top-left corner
+        ring = np.concatenate([imgs[:, 0, :], imgs[:, 1:, -1], imgs[:, -1, -2::-1], imgs[:, -2:0:-1, 0]], axis=1)
+        bg = ring == 0
+        h, w = imgs.shape[1:3]
+        n_runs = np.count_nonzero(bg & ~np.roll(bg, 1, axis=1), axis=1)
+
+        # Runs meeting diagonally across a foreground corner pixel are one contour
+        corners = np.array([0, w - 1, w + h - 2, 2 * w + h - 3])
+        joins = np.count_nonzero(~bg[:, corners] & bg[:, corners - 1] & bg[:, (corners + 1) % ring.shape[1]], axis=1)
+        n_contours = np.where(n_runs > 0, np.maximum(n_runs - joins, 1), 0)
+        n_contours[bg.all(axis=1)] = 1
+        return n_contours < max_contours
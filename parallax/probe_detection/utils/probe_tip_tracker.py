@@ -0,0 +1,213 @@
+"""
+ProbeTipTracker: Constant-velocity Kalman tracker for YOLO probe tip keypoints.
+
+Each camera owns one tracker. Tracks are keyed by the ultralytics track id carried
+in the detection dicts, and the filter state of every track lives in a single
+compact array so the per-camera footprint stays small.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# State row layout: [x, y, vx, vy, P(4x4 row-major), t_last, step_last]
+_X = slice(0, 4)
+_P = slice(4, 20)
+_T = 20
+_STEP = 21  # Filtered displacement (px) of the last update
+_ROW = 22
+
+# Chi-square 99% gate for a 2-dof innovation
+_GATE_CHI2 = 9.21
+
+
+class ProbeTipTracker:
+    """Per-camera Kalman tracker smoothing tip keypoints across frames."""
+
+    def __init__(
+        self,
+        movement_threshold=8.0,
+        process_noise=5.0,
+        measurement_noise=2.0,
+        max_age=30.0,
+        capacity=8,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            movement_threshold (float): Filtered displacement (px) since the previous update
+                above which a track is classified as moving.
+            process_noise (float): Acceleration noise spectral density (px/s^2).
+            measurement_noise (float): Keypoint measurement std (px).
+            max_age (float): Seconds without an update before a track is dropped. None keeps
+                tracks until they are removed, e.g. when updates come only once per stage stop.
+            capacity (int): Initial number of track rows to allocate.
+        """
+        self.movement_threshold = movement_threshold
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_age = max_age
+
+        self.state = np.zeros((capacity, _ROW), dtype=np.float64)
+        self.track_ids = {}  # track id -> row index
+        self._free_rows = list(range(capacity - 1, -1, -1))
+
+        self._H = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]])
+        self._R = np.eye(2) * measurement_noise**2
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    def __contains__(self, track_id):
+        return track_id in self.track_ids
+
+    def reset(self):
+        """Drop all tracks."""
+        self.state[:] = 0.0
+        self.track_ids.clear()
+        self._free_rows = list(range(len(self.state) - 1, -1, -1))
+
+    def remove(self, track_id):
+        """Remove a single track."""
+        row = self.track_ids.pop(track_id, None)
+        if row is not None:
+            self.state[row] = 0.0
+            self._free_rows.append(row)
+
+    def update(self, track_id, point, ts: float) -> np.ndarray:
+        """
+        Fuse a new tip measurement into the track.
+
+        Args:
+            track_id: Ultralytics track id of the detection.
+            point (tuple): Measured (x, y) tip position in original image pixels.
+            ts (float): Image timestamp in seconds.
+
+        Returns:
+            numpy.ndarray: Filtered (x, y) position.
+        """
+        z = np.asarray(point, dtype=np.float64)[:2]
+        self._drop_stale(ts)
+
+        row = self.track_ids.get(track_id)
+        if row is None:
+            row = self._new_track(track_id, z, ts)
+            return self.state[row, 0:2].copy()
+
+        s = self.state[row]
+        dt = max(ts - s[_T], 0.0)
+        x_prior, P_prior = s[_X], s[_P].reshape(4, 4)
+        x, P = self._predict(x_prior, P_prior, dt)
+
+        y = z - self._H @ x
+        S = self._H @ P @ self._H.T + self._R
+        S_inv = np.linalg.inv(S)
+        if dt > 0 and y @ S_inv @ y > _GATE_CHI2:
+            # Manoeuvre: the tip jumped further than the model expects. Reopen the
+            # velocity uncertainty before predicting so the jump is explained by motion.
+            P_prior = P_prior.copy()
+            P_prior[2:, 2:] += np.eye(2) * (y @ y) / (dt * dt)
+            x, P = self._predict(x_prior, P_prior, dt)
+            S = self._H @ P @ self._H.T + self._R
+            S_inv = np.linalg.inv(S)
+
+        K = P @ self._H.T @ S_inv
+        x = x + K @ y
+        P = (np.eye(4) - K @ self._H) @ P
+
+        s[_STEP] = np.hypot(*(x[:2] - s[0:2]))
+        s[_X] = x
+        s[_P] = P.ravel()
+        s[_T] = ts
+        return x[:2].copy()
+
+    def position(self, track_id) -> Optional[np.ndarray]:
+        """Return the filtered (x, y) position of a track."""
+        row = self.track_ids.get(track_id)
+        if row is None:
+            return None
+        return self.state[row, 0:2].copy()
+
+    def velocity(self, track_id) -> Optional[np.ndarray]:
+        """Return the filtered (vx, vy) velocity of a track in px/s."""
+        row = self.track_ids.get(track_id)
+        if row is None:
+            return None
+        return self.state[row, 2:4].copy()
+
+    def is_moving(self, track_id) -> bool:
+        """
+        Classify a track as moving when its filtered position moved more than the
+        movement threshold since the previous update.
+
+        The displacement is measured between updates rather than extrapolated from the
+        velocity, so sparse updates (one per stage stop, seconds apart) are classified by
+        how far the tip actually went, not by how fast it went between earlier stops.
+        """
+        row = self.track_ids.get(track_id)
+        if row is None:
+            return False
+        return bool(self.state[row, _STEP] > self.movement_threshold)
+
+    def predict(self, track_id, ts: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Predict the tip position of a track at a future timestamp.
+
+        Returns:
+            tuple: (xy, std_xy) predicted position and its 1-sigma uncertainty,
+                or None if the track is unknown.
+        """
+        row = self.track_ids.get(track_id)
+        if row is None:
+            return None
+        s = self.state[row]
+        x, P = self._predict(s[_X], s[_P].reshape(4, 4), max(ts - s[_T], 0.0))
+        return x[:2], np.sqrt(np.diag(P)[:2])
+
+    def _predict(self, x, P, dt):
+        """Constant-velocity prediction step."""
+        if dt <= 0:
+            return x.copy(), P.copy()
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        q = self.process_noise
+        dt2, dt3 = dt * dt, dt * dt * dt
+        Q = q * np.array(
+            [
+                [dt3 / 3, 0.0, dt2 / 2, 0.0],
+                [0.0, dt3 / 3, 0.0, dt2 / 2],
+                [dt2 / 2, 0.0, dt, 0.0],
+                [0.0, dt2 / 2, 0.0, dt],
+            ]
+        )
+        return F @ x, F @ P @ F.T + Q
+
+    def _new_track(self, track_id, z, ts):
+        """Allocate a state row for a new track."""
+        if not self._free_rows:
+            capacity = len(self.state)
+            self.state = np.vstack([self.state, np.zeros((capacity, _ROW))])
+            self._free_rows = list(range(2 * capacity - 1, capacity - 1, -1))
+        row = self._free_rows.pop()
+        P = np.diag([self.measurement_noise**2] * 2 + [1e4, 1e4])
+        self.state[row] = 0.0
+        self.state[row, 0:2] = z
+        self.state[row, _P] = P.ravel()
+        self.state[row, _T] = ts
+        self.track_ids[track_id] = row
+        logger.debug(f"New track {track_id} at {z}")
+        return row
+
+    def _drop_stale(self, ts):
+        """Remove tracks that have not been updated for max_age seconds."""
+        if self.max_age is None:
+            return
+        stale = [tid for tid, row in self.track_ids.items() if ts - self.state[row, _T] > self.max_age]
+        for tid in stale:
+            self.remove(tid)
@@ -0,0 +1,93 @@
+"""
+AdaptiveFrameRate: Stage-motion driven frame rate for the global YOLO model.
+
+While any stage moves, frames are sent at the full rate. When all stages stop, the rate
+decays exponentially to a low idle rate. The rate is always capped by the measured
+inference latency, so the model is never fed faster than it can keep up.
+"""
+
+import math
+import time
+from typing import Optional
+
+_INTERVAL_TOLERANCE_S = 1e-3
+
+
+class AdaptiveFrameRate:
+    """Frame-rate controller for one camera's global YOLO client."""
+
+    def __init__(self, moving_fps=10.0, idle_fps=2.0, decay_s=3.0, latency_headroom=0.8, smoothing=0.2):
+        """
+        Initialize the controller.
+
+        Args:
+            moving_fps (float): Rate while any stage is moving.
+            idle_fps (float): Rate once all stages have been stationary for a while.
+            decay_s (float): Time constant of the decay from moving_fps to idle_fps.
+            latency_headroom (float): Fraction of the inference-bound rate that may be used.
+            smoothing (float): EWMA weight of new latency and interval samples.
+        """
+        self.moving_fps = float(moving_fps)
+        self.idle_fps = min(float(idle_fps), self.moving_fps)
+        self.decay_s = decay_s
+        self.latency_headroom = latency_headroom
+        self.smoothing = smoothing
+
+        self.moving = False
+        self.stopped_at = None  # monotonic time the last stage stopped
+        self.latency = None  # EWMA inference latency (s)
+        self.effective_fps = 0.0
+        self._last_accepted = None
+
+    def set_moving(self, moving: bool, now: Optional[float] = None):
+        """Report whether any stage is moving."""
+        now = time.monotonic() if now is None else now
+        if self.moving and not moving:
+            self.stopped_at = now
+        self.moving = moving
+
+    def record_latency(self, seconds: float):
+        """Fold one inference latency sample into the running estimate."""
+        if seconds is None or seconds <= 0:
+            return
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+
+    def target_fps(self, now: Optional[float] = None) -> float:
+        """Return the rate frames should currently be sent at."""
+        now = time.monotonic() if now is None else now
+        if self.moving:
+            fps = self.moving_fps
+        elif self.stopped_at is None or not self.decay_s:
+            fps = self.idle_fps
+        else:
+            weight = math.exp(-(now - self.stopped_at) / self.decay_s)
+            fps = self.idle_fps + (self.moving_fps - self.idle_fps) * weight
+
+        if self.latency:
+            fps = min(fps, self.latency_headroom / self.latency)
+        return fps
+
+    def accept(self, now: Optional[float] = None) -> bool:
+        """
+        Decide whether a frame captured at `now` should be processed.
+
+        Args:
+            now (float): Frame time in seconds. Defaults to the monotonic clock.
+
+        Returns:
+            bool: True if the frame should be sent to the model.
+        """
+        now = time.monotonic() if now is None else now
+        if self._last_accepted is not None:
+            interval = now - self._last_accepted
+            # Small tolerance so camera rates that are exact multiples are not rounded down
+            if interval + _INTERVAL_TOLERANCE_S < 1.0 / self.target_fps(now):
+                return False
+            if interval > 0:
+                sample = 1.0 / interval
+                self.effective_fps += self.smoothing * (sample - self.effective_fps)
+        self._last_accepted = now
+        return True
@@ -1,7 +1,9 @@
 import logging
+import time
 
 import numpy as np
 
+from parallax.probe_detection.yolo_global.rate_controller import AdaptiveFrameRate
 from parallax.probe_detection.yolo_global.utils import preprocessing
 from parallax.probe_detection.yolo_global.yolo_server import YoloSegmentation
 
@@ -15,6 +17,15 @@ class YOLOClient:
         self.dim = config.get("yolo", {}).get("img_dim", [640, 640])
         self.current_time = None
 
+        # Full rate while a stage moves, decaying to idle_fps once all stages stop
+        self.rate = AdaptiveFrameRate(
+            moving_fps=self.fps,
+            idle_fps=config.get("idle_fps", 2),
+            decay_s=config.get("fps_decay_s", 3.0),
+        )
+        self.rate_log_interval = config.get("fps_log_interval_s", 10.0)
+        self._last_rate_log = None
+
         # Create YOLO segmentator, passing the detection callback
         yolo_config = config.get("yolo", {})
         self.yolo_worker = YoloSegmentation(
@@ -32,13 +43,43 @@ class YOLOClient:
             return False
 
     def newframe_captured(self, frame: np.ndarray, current: float = None):
-        """Put new frame at the specified FPS rate"""
+        """Put new frame at the adaptive FPS rate"""
+        # Frame timestamps are wall-clock seconds; the rate runs on the same clock
+        now = time.time() if current is None else current
+
+        # Cap the rate by the measured inference latency of the worker
+        latency = getattr(self.yolo_worker, "inference_latency", None)
+        if isinstance(latency, float):
+            self.rate.record_latency(latency)
+
         # Rate limit the frames sent to the YOLO worker
-        if self.current_time is None or current - self.current_time > (1 / self.fps):
+        if self.rate.accept(now):
             frame_resized, crop_info = preprocessing(frame, target_size=self.dim)
             self.yolo_worker.process_frame(frame_resized, crop_info, ts=current)  # Reisized to 640x640
         self.current_time = current
 
+        if self._last_rate_log is None:
+            self._last_rate_log = now
+        elif now - self._last_rate_log >= self.rate_log_interval:
+            self._last_rate_log = now
+            self.logger.info(
+                f"{self.name}: frames sent at {self.get_effective_fps():.1f} fps "
+                f"(target {self.rate.target_fps(now):.1f} fps)"
+            )
+
+    def set_stage_moving(self, moving: bool):
+        """Raise the rate while any stage moves; decay to the idle rate once all stop"""
+        now = time.time()
+        changed = moving != self.rate.moving
+        self.rate.set_moving(moving, now)
+        if changed:
+            state = "moving" if moving else "stopped"
+            self.logger.info(f"{self.name}: stage {state}, target {self.rate.target_fps(now):.1f} fps")
+
+    def get_effective_fps(self) -> float:
+        """Rate at which frames are currently sent to the model"""
+        return self.rate.effective_fps
+
     def stop(self):
         """Stop the YOLO worker"""
         if self.yolo_worker:
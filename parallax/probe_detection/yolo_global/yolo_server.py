@@ -1,12 +1,16 @@
 import logging
 import time
 from collections import deque
-from threading import Thread  # Using Event for better thread signaling
+from concurrent.futures import Future
+from threading import Event, Thread
 
 import numpy as np
 import torch
 from ultralytics import YOLO
 
+from parallax.probe_detection.utils.model_loader import ModelLoader
+from parallax.utils.compute_budget import ComputeBudget
+
 
 class YoloSegmentation:
     """YOLO segmentation worker that runs in its own thread"""
@@ -31,29 +35,81 @@ class YoloSegmentation:
         self.frame_queue = deque(maxlen=1)
         self.running = False
         self.worker_thread = None
+        self.inference_latency = None  # seconds, last measured inference
 
         # New: Store the callback function
         self.detection_callback = detection_callback
         self.finished_callback = finished_callback
 
+        # Load and warm up in the background; frames wait in the queue until ready
+        self.model_ready = Event()
+        self.model_future = self.load_model(name, config)
+        self.model_future.add_done_callback(self._on_model_loaded)
+
+    @classmethod
+    def load_model(cls, name, config) -> Future:
+        """
+        Start loading the model for a camera in the background.
+
+        Returns the pending future if the same model is already loading or loaded,
+        so this can be called at application start to preload the weights.
+        """
+        img_dim = config.get("img_dim", [640, 480])
+        return ModelLoader.instance().submit(
+            cls._model_key(name, config),
+            lambda: cls._create_model(config),
+            lambda model: cls._warmup_model(model, img_dim),
+        )
+
+    @classmethod
+    def release_model(cls, name, config):
+        """
+        Drop the loader's reference to a camera's model, e.g. after the camera is renamed.
+
+        Workers that already picked up the model keep using it.
+        """
+        ModelLoader.instance().forget(cls._model_key(name, config))
+
+    @staticmethod
+    def _model_key(name, config):
+        """Loader key of a camera's model. Models are per camera, as the tracker state lives in the model."""
+        weights_path = config.get("weights_path", r"external/YoloV11/tip_keypoint_detection_fast.pt")
+        return ("yolo_global", name, weights_path)
+
+    @classmethod
+    def _create_model(cls, config):
+        """Load the YOLO weights and apply the inference overrides."""
+        logger = logging.getLogger(cls.__name__)
+        weights_path = config.get("weights_path", r"external/YoloV11/tip_keypoint_detection_fast.pt")
+        logger.debug(f"weights_path: {weights_path}")
+        model = YOLO(weights_path)
+        model.overrides["conf"] = config.get("conf_thresh", 0.5)
+        model.overrides["iou"] = config.get("iou_thresh", 0.45)
+        model.overrides["max_det"] = config.get("max_det", 30)
+        model.overrides["imgsz"] = config.get("img_size", 640)
+        model.overrides["verbose"] = False
+        model.to("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"YOLO model loaded from: {weights_path}")
+        logger.info(f"Model is running on: {model.device}")
+        return model
+
+    def _on_model_loaded(self, future: Future):
+        """Pick up the loaded model, or fall back to dummy mode if loading failed."""
         try:
-            self.logger.debug(f"weights_path: {self.weights_path}")
-            self.model = YOLO(self.weights_path)
-            self.model.overrides["conf"] = self.conf_thresh
-            self.model.overrides["iou"] = self.iou_thresh
-            self.model.overrides["max_det"] = self.max_det
-            self.model.overrides["imgsz"] = self.img_size
-            self.model.overrides["verbose"] = False
-            self.model.to("cuda" if torch.cuda.is_available() else "cpu")
-            self.logger.info(f"YOLO model loaded from: {self.weights_path}")
-            self.logger.info(f"Model is running on: {self.model.device}")
-
-            # Warmup the model
-            self._warmup_model()
+            self.model = future.result()
             self.logger.info("YOLO model warmup completed")
         except Exception as e:
             self.logger.error(f"Failed to load YOLO model: {e}, running yolo in dummy mode")
             self.model = None
+        self.model_ready.set()
+
+    def is_ready(self) -> bool:
+        """Return True once the model is loaded and warmed up (or failed to load)."""
+        return self.model_ready.is_set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until the model is ready. Returns False on timeout."""
+        return self.model_ready.wait(timeout)
 
     def start(self):
         """Start the YOLO segmentation thread"""
@@ -61,24 +117,27 @@ class YoloSegmentation:
             return True
 
         self.running = True
+        ComputeBudget.instance().register(f"{self.name}-yolo_global")
         # Use a standard Thread
         self.worker_thread = Thread(target=self._process_frames, daemon=True)
         self.worker_thread.start()
         self.logger.info("YOLO segmentation thread started")
         return True
 
-    def _warmup_model(self):
+    @classmethod
+    def _warmup_model(cls, model, img_dim):
         """Warm up the model with dummy inference to avoid first-frame delay"""
-        if self.model is None:
+        if model is None:
             return
 
-        self.logger.info("Warming up YOLO model...")
+        logger = logging.getLogger(cls.__name__)
+        logger.info("Warming up YOLO model...")
         warmup_start = time.time()
 
-        if not YoloSegmentation._info_printed and hasattr(self.model, "names"):
+        if not YoloSegmentation._info_printed and hasattr(model, "names"):
             print("--- Available Model Classes for global Yolo ---")
-            # self.model.names is a dictionary mapping ID (int) to Name (str)
-            sorted_class_names = sorted(self.model.names.items())
+            # model.names is a dictionary mapping ID (int) to Name (str)
+            sorted_class_names = sorted(model.names.items())
             for class_id, class_name in sorted_class_names:
                 print(f"    ID: {class_id} / Name: {class_name}")
             print("-----------------------------\n")
@@ -86,28 +145,27 @@ class YoloSegmentation:
 
         try:
             # Create dummy frame matching your expected input
-            dummy_frame = np.random.randint(0, 255, (self.img_dim[1], self.img_dim[0], 3), dtype=np.uint8)
+            dummy_frame = np.random.randint(0, 255, (img_dim[1], img_dim[0], 3), dtype=np.uint8)
 
             # Run several warmup inferences
             for i in range(3):
                 # Using predict for simple warmup instead of track if tracking is not essential here
-                _ = self.model.track(dummy_frame, persist=False)
+                _ = model.track(dummy_frame, persist=False)
 
             # Additional GPU warmup if using CUDA
             if torch.cuda.is_available():
                 torch.cuda.synchronize()  # Wait for GPU operations to complete
 
             warmup_time = time.time() - warmup_start
-            self.logger.info(f"Model warmup completed in {warmup_time:.2f}s")
-            self.warmup_done = True
+            logger.info(f"Model warmup completed in {warmup_time:.2f}s")
 
         except Exception as e:
-            self.logger.error(f"Warmup failed: {e}")
-            self.warmup_done = True  # Continue anyway
+            logger.error(f"Warmup failed: {e}")  # Continue anyway
 
     def stop(self):
         """Stop the YOLO processing thread"""
         self.running = False
+        ComputeBudget.instance().unregister(f"{self.name}-yolo_global")
         if self.worker_thread:
             self.worker_thread.join(timeout=1.0)
         self.logger.info("YOLO segmentation worker stopped")
@@ -129,6 +187,10 @@ class YoloSegmentation:
         """Process frames from the queue"""
         while self.running:
             try:
+                if not self.model_ready.is_set():
+                    # Model still loading: keep the latest frame queued
+                    time.sleep(0.01)
+                    continue
                 if len(self.frame_queue) > 0:
                     (frame, crop_info, ts) = self.frame_queue.pop()
                     detections = []
@@ -147,13 +209,17 @@ class YoloSegmentation:
                         ]
                     else:
                         # Run YOLO inference
-                        results = self.model.track(
-                            frame,
-                            persist=True,  # Keep persist=True to maintain tracker state
-                            conf=self.conf_thresh,
-                            iou=self.iou_thresh,
-                            agnostic_nms=True,
-                        )
+                        budget = ComputeBudget.instance()
+                        with budget.slot(self.name, budget.priority_for(camera_sn=self.name)):
+                            t0 = time.perf_counter()
+                            results = self.model.track(
+                                frame,
+                                persist=True,  # Keep persist=True to maintain tracker state
+                                conf=self.conf_thresh,
+                                iou=self.iou_thresh,
+                                agnostic_nms=True,
+                            )
+                            self.inference_latency = time.perf_counter() - t0
 
                         # Convert results to detection format
                         if results and len(results) > 0:
@@ -0,0 +1,121 @@
+"""
+CropQueue: Ordered, bounded queue of local-YOLO crops.
+
+Crops are served by frame timestamp, then with the selected stage's probe class first,
+then by detection index, so the crops of one global-detection batch are processed in a
+deterministic order. Crops from an older frame are shed when a newer frame arrives, and
+every drop is counted.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+
+class CropQueue:
+    """Thread-safe priority queue of crops for the local YOLO worker."""
+
+    def __init__(self, maxlen: int = 20):
+        """
+        Initialize the queue.
+
+        Args:
+            maxlen (int): Maximum number of queued crops. When exceeded, the crop served
+                last is dropped.
+        """
+        self.maxlen = maxlen
+        self.priority_class = None
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._batch_ts = None
+
+        self.dropped_stale = 0
+        self.dropped_overflow = 0
+        self.served = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def set_priority_class(self, class_name: Optional[str]):
+        """Serve crops of this class (the selected stage's probe type) first."""
+        self.priority_class = class_name
+
+    def put(self, item: Any, ts: float, index: int = 0, class_name: str = "") -> bool:
+        """
+        Queue a crop.
+
+        Args:
+            item: Payload returned by pop().
+            ts (float): Timestamp of the frame the crop was cut from.
+            index (int): Index of the global detection within the frame.
+            class_name (str): Class of the global detection.
+
+        Returns:
+            bool: False if the crop was dropped because a newer frame is already queued.
+        """
+        ts_key = float("-inf") if ts is None else ts
+        with self._lock:
+            if self._batch_ts is not None and ts_key < self._batch_ts:
+                self.dropped_stale += 1
+                return False
+            if self._batch_ts is not None and ts_key > self._batch_ts:
+                # A newer frame supersedes crops still waiting from the previous one
+                self.dropped_stale += len(self._heap)
+                self._heap.clear()
+            self._batch_ts = ts_key
+
+            rank = 0 if self.priority_class and class_name == self.priority_class else 1
+            entry = (ts_key, rank, index, next(self._seq), time.monotonic(), item)
+            heapq.heappush(self._heap, entry)
+
+            if len(self._heap) > self.maxlen:
+                worst = max(self._heap)
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self.dropped_overflow += 1
+                return worst is not entry
+            return True
+
+    def pop(self) -> Optional[Tuple[Any, float]]:
+        """
+        Remove the next crop.
+
+        Returns:
+            tuple or None: (item, queueing latency in seconds), or None if empty.
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            entry = heapq.heappop(self._heap)
+            latency = time.monotonic() - entry[4]
+            self.served += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+            return entry[5], latency
+
+    def clear(self):
+        """Drop all queued crops without counting them."""
+        with self._lock:
+            self._heap.clear()
+            self._batch_ts = None
+
+    def stats(self) -> dict:
+        """Return queue depth, drop counts and queueing latency."""
+        with self._lock:
+            return {
+                "queued": len(self._heap),
+                "served": self.served,
+                "dropped_stale": self.dropped_stale,
+                "dropped_overflow": self.dropped_overflow,
+                "last_latency_s": self.last_latency,
+                "mean_latency_s": self._total_latency / self.served if self.served else 0.0,
+                "max_latency_s": self.max_latency,
+            }
@@ -73,6 +73,11 @@ class YOLOClient:
             return self.yolo_worker.get_queue_size()
         return 0
 
+    def set_priority_class(self, class_name):
+        """Process crops of this class first (the selected stage's probe type)"""
+        if self.yolo_worker:
+            self.yolo_worker.set_priority_class(class_name)
+
 
 # --- Example Usage ---
 # If you need an example of how to use the detection_callback:
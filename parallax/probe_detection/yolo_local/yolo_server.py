@@ -1,14 +1,16 @@
 import logging
 import time
-from collections import deque
-from threading import Thread
+from concurrent.futures import Future
+from threading import Event, Thread
 
-import cv2
 import numpy as np
 import torch
 from ultralytics import YOLO
 
-from parallax.config.config_path import debug_img_dir
+from parallax.probe_detection.utils.model_loader import ModelLoader
+from parallax.probe_detection.yolo_local.crop_queue import CropQueue
+from parallax.utils.compute_budget import ComputeBudget
+from parallax.utils.debug_sink import DebugImageSink
 
 # Set logger name
 logger = logging.getLogger(__name__)
@@ -34,7 +36,7 @@ class YoloKeypoints:
         self.img_dim = config.get("img_dim", [640, 480])  # input image dimension for YOLO (w, h)
         self.max_det = config.get("max_det", 30)
         self.model = None
-        self.frame_queue = deque(maxlen=20)
+        self.frame_queue = CropQueue(maxlen=20)
         self.running = False
         self.worker_thread = None
         self.names_map = {}
@@ -43,57 +45,117 @@ class YoloKeypoints:
         self.detection_callback = detection_callback
         self.finished_callback = finished_callback
 
+        # Load and warm up in the background; frames wait in the queue until ready
+        self.model_ready = Event()
+        self.model_future = self.load_model(name, config)
+        self.model_future.add_done_callback(self._on_model_loaded)
+
+    @classmethod
+    def load_model(cls, name, config) -> Future:
+        """
+        Start loading the model for a camera in the background.
+
+        Returns the pending future if the same model is already loading or loaded,
+        so this can be called at application start to preload the weights.
+        """
+        img_dim = config.get("img_dim", [640, 480])
+        return ModelLoader.instance().submit(
+            cls._model_key(name, config),
+            lambda: cls._create_model(config),
+            lambda model: cls._warmup_model(model, img_dim),
+        )
+
+    @classmethod
+    def release_model(cls, name, config):
+        """
+        Drop the loader's reference to a camera's model, e.g. after the camera is renamed.
+
+        Workers that already picked up the model keep using it.
+        """
+        ModelLoader.instance().forget(cls._model_key(name, config))
+
+    @staticmethod
+    def _model_key(name, config):
+        """Loader key of a camera's model, per camera like the global segmentation model."""
+        weights_path = config.get("weights_path", r"external/YoloV11/tip_keypoint_detection_fast.pt")
+        return ("yolo_local", name, weights_path)
+
+    @classmethod
+    def _create_model(cls, config):
+        """Load the YOLO weights and apply the inference overrides."""
+        weights_path = config.get("weights_path", r"external/YoloV11/tip_keypoint_detection_fast.pt")
+        logger.debug(f"weights_path: {weights_path}")
+        model = YOLO(weights_path)
+        model.overrides["conf"] = config.get("conf_thresh", 0.5)
+        model.overrides["iou"] = config.get("iou_thresh", 0.75)
+        model.overrides["max_det"] = config.get("max_det", 30)
+        model.overrides["imgsz"] = config.get("img_size", 640)
+        model.overrides["verbose"] = False
+        model.to("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"YOLO model loaded from: {weights_path}")
+        logger.info(f"Model is running on: {model.device}")
+        return model
+
+    def _on_model_loaded(self, future: Future):
+        """Pick up the loaded model, or fall back to dummy mode if loading failed."""
         try:
-            logger.debug(f"weights_path: {self.weights_path}")
-            self.model = YOLO(self.weights_path)
-            self.model.overrides["conf"] = self.conf_thresh
-            self.model.overrides["iou"] = self.iou_thresh
-            self.model.overrides["max_det"] = self.max_det
-            self.model.overrides["imgsz"] = self.img_size
-            self.model.overrides["verbose"] = False
-            self.model.to("cuda" if torch.cuda.is_available() else "cpu")
-            logger.info(f"YOLO model loaded from: {self.weights_path}")
-            logger.info(f"Model is running on: {self.model.device}")
-
-            # Warmup the model
-            self._warmup_model()
+            self.model = future.result()
             logger.info("YOLO model warmup completed")
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}, running yolo in dummy mode")
             self.model = None
 
+        # Cache the names immediately upon load
+        if self.model is not None and hasattr(self.model, "names"):
+            self.names_map = self.model.names
+        elif self.model is not None:
+            logger.warning("Could not find class names attribute (self.model.names)")
+        self.model_ready.set()
+
+    def is_ready(self) -> bool:
+        """Return True once the model is loaded and warmed up (or failed to load)."""
+        return self.model_ready.is_set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until the model is ready. Returns False on timeout."""
+        return self.model_ready.wait(timeout)
+
     def get_queue_size(self):
         return len(self.frame_queue) if self.frame_queue else 0
 
+    def get_queue_stats(self) -> dict:
+        """Return crop queue depth, drop counts and queueing latency."""
+        return self.frame_queue.stats()
+
+    def set_priority_class(self, class_name):
+        """Process crops of this class (the selected stage's probe type) first."""
+        self.frame_queue.set_priority_class(class_name)
+
     def start(self):
         """Start the YOLO segmentation thread"""
         if self.running:
             return True
 
         self.running = True
+        ComputeBudget.instance().register(f"{self.name}-yolo_local")
         # Use a standard Thread
         self.worker_thread = Thread(target=self._process_frames, daemon=True)
         self.worker_thread.start()
         logger.info("YOLO segmentation thread started")
         return True
 
-    def _warmup_model(self):
+    @classmethod
+    def _warmup_model(cls, model, img_dim):
         """Warm up the model with dummy inference to avoid first-frame delay"""
-        if self.model is None:
+        if model is None:
             return
 
         logger.info("Warming up YOLO model...")
         warmup_start = time.time()
 
-        # Cache the names immediately upon load
-        if hasattr(self.model, "names"):
-            self.names_map = self.model.names
-        else:
-            logger.warning("Could not find class names attribute (self.model.names)")
-
-        if not YoloKeypoints._info_printed and hasattr(self.model, "names"):
+        if not YoloKeypoints._info_printed and hasattr(model, "names"):
             print("\n--- Available Model Classes for local Yolo ---")
-            sorted_class_names = sorted(self.model.names.items())
+            sorted_class_names = sorted(model.names.items())
             for class_id, class_name in sorted_class_names:
                 print(f"    ID: {class_id} / Name: {class_name}")
             print("-----------------------------\n")
@@ -101,12 +163,12 @@ class YoloKeypoints:
 
         try:
             # Create dummy frame matching your expected input
-            dummy_frame = np.random.randint(0, 255, (self.img_dim[1], self.img_dim[0], 3), dtype=np.uint8)
+            dummy_frame = np.random.randint(0, 255, (img_dim[1], img_dim[0], 3), dtype=np.uint8)
 
             # Run several warmup inferences
             for i in range(3):
                 # Using predict for simple warmup instead of track if tracking is not essential here
-                _ = self.model.track(dummy_frame, persist=False)
+                _ = model.track(dummy_frame, persist=False)
 
             # Additional GPU warmup if using CUDA
             if torch.cuda.is_available():
@@ -114,15 +176,14 @@ class YoloKeypoints:
 
             warmup_time = time.time() - warmup_start
             logger.info(f"Model warmup completed in {warmup_time:.2f}s")
-            self.warmup_done = True
 
         except Exception as e:
-            logger.error(f"Warmup failed: {e}")
-            self.warmup_done = True  # Continue anyway
+            logger.error(f"Warmup failed: {e}")  # Continue anyway
 
     def stop(self):
         """Stop the YOLO processing thread"""
         self.running = False
+        ComputeBudget.instance().unregister(f"{self.name}-yolo_local")
         if self.worker_thread:
             self.worker_thread.join(timeout=1.0)
         logger.info("YOLO segmentation worker stopped")
@@ -134,25 +195,19 @@ class YoloKeypoints:
         if not self.running:
             return
 
-        # If ts is changed (from new detections from global yolo), clear the queue to prioritize latest frame
-        # For the same ts, process all frames
+        # Crops are served by frame timestamp, selected class first, then detection index.
+        # Crops of an older frame are shed once crops of a newer frame (new global detections) arrive.
         try:
-            if self.frame_queue:
-                # Get the timestamp of the last frame in the queue (the most recent one)
-                last_frame_ts = self.frame_queue[-1][2]
-                if ts != last_frame_ts:
-                    self.frame_queue.clear()
-                    logger.debug(f"{self.name} {i}- Cleared frame queue due to new timestamp: {ts}")
-            self.frame_queue.append((frame, crop_info, ts, global_detection, i))
-            logger.debug(
-                f"{self.name} {i} - Queue {global_detection['class_name']} Current queue size: {len(self.frame_queue)}"
-            )
+            class_name = global_detection.get("class_name", "") if global_detection else ""
+            queued = self.frame_queue.put((frame, crop_info, ts, global_detection, i), ts, i, class_name)
+            if not queued:
+                logger.debug(f"{self.name} {i} - Dropped crop {class_name} at ts {ts}: {self.frame_queue.stats()}")
+            logger.debug(f"{self.name} {i} - Queue {class_name} Current queue size: {len(self.frame_queue)}")
             # save image
-            if debug_img_dir and logger.isEnabledFor(logging.DEBUG):
-                debug_img_path = (
-                    debug_img_dir / f"{self.name}_{i}_{global_detection['class_name']}_{int(ts * 1000)}.jpg"
+            if logger.isEnabledFor(logging.DEBUG):
+                DebugImageSink.instance().save(
+                    frame, camera=self.name, ts=ts, tag=f"{i}_{global_detection['class_name']}_local"
                 )
-                cv2.imwrite(str(debug_img_path), frame)
 
         except Exception as e:
             # Catch errors related to queue access/data structure
@@ -162,11 +217,17 @@ class YoloKeypoints:
         """Process frames from the queue"""
         while self.running:
             try:
-                if len(self.frame_queue) > 0:
-                    (frame, crop_info, ts, global_detection, i_th) = self.frame_queue.pop()
+                if not self.model_ready.is_set():
+                    # Model still loading: crops stay in the bounded queue
+                    time.sleep(0.01)
+                    continue
+                next_crop = self.frame_queue.pop()
+                if next_crop is not None:
+                    (frame, crop_info, ts, global_detection, i_th), latency = next_crop
                     global_class_name = global_detection.get("class_name", "") if global_detection else ""
                     logger.debug(
-                        f"{self.name} {i_th} Dequeue size: {len(self.frame_queue)}. Global class: {global_class_name}"
+                        f"{self.name} {i_th} Dequeue size: {len(self.frame_queue)}. Global class: {global_class_name}. "
+                        f"Queued for {latency * 1000:.1f} ms"
                     )
                     detections = []
 
@@ -193,12 +254,14 @@ class YoloKeypoints:
 
                         # Run YOLO inference
                         logger.debug(f" {self.name} {i_th} - Tracking.. {global_class_name}")
-                        results = self.model.track(
-                            frame,
-                            persist=False,  # Keep persist=True to maintain tracker state
-                            classes=class_id_to_track if class_id_to_track else None,  # <-- Filter by class
-                            conf=self.conf_thresh,
-                        )
+                        budget = ComputeBudget.instance()
+                        with budget.slot(self.name, budget.priority_for(camera_sn=self.name)):
+                            results = self.model.track(
+                                frame,
+                                persist=False,  # Keep persist=True to maintain tracker state
+                                classes=class_id_to_track if class_id_to_track else None,  # <-- Filter by class
+                                conf=self.conf_thresh,
+                            )
 
                         # Convert results to detection format
                         if results and len(results) > 0:
@@ -1,5 +1,4 @@
 import logging
-import math
 import time
 
 import numpy as np
@@ -7,11 +6,13 @@ import yaml
 
 from parallax.config.config_path import yolo_config_path
 from parallax.probe_detection.utils.probe_fine_tip_detector import ProbeFineTipDetector
+from parallax.probe_detection.utils.probe_tip_tracker import ProbeTipTracker
 from parallax.probe_detection.yolo_global.utils import postprocessing as postprocessing_global
 from parallax.probe_detection.yolo_global.yolo_client import YOLOClient as GlobalYOLOClient
+from parallax.probe_detection.yolo_global.yolo_server import YoloSegmentation
 from parallax.probe_detection.yolo_local.utils import postprocessing as postprocessing_local
 from parallax.probe_detection.yolo_local.yolo_client import YOLOClient as LocalYOLOClient
-from parallax.utils.utils import UtilsCrops
+from parallax.probe_detection.yolo_local.yolo_server import YoloKeypoints
 
 # Set logger name
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ class YoloProcessWorker:
         self.finished_callback = finished_callback
         self.stage_ts = None
         self.sn = None
+        self.moving_stages = set()  # serial numbers of stages currently moving
         self.prev_detections = None
         self.detections = []
 
@@ -62,6 +64,13 @@ class YoloProcessWorker:
         )
 
         self.movement_threshold = CONFIG.get("image_processing", {}).get("movement_threshold", 8.0)
+        tracker_cfg = CONFIG.get("tracker", {})
+        self.tip_tracker = ProbeTipTracker(
+            movement_threshold=self.movement_threshold,
+            process_noise=tracker_cfg.get("process_noise", 5.0),
+            measurement_noise=tracker_cfg.get("measurement_noise", 2.0),
+            max_age=tracker_cfg.get("max_age"),  # Tips are updated once per stage stop; keep tracks across long stops
+        )
 
     def update_frame(self, frame: np.ndarray, timestamp: float):
         if self.is_detection_on:
@@ -184,8 +193,10 @@ class YoloProcessWorker:
 
     def get_moving_stage(self, detections: list[dict]):
         """
-        Identifies probes that have moved more than 8 pixels since the previous frame.
-        Compares ONLY the first keypoint (Tip) for movement.
+        Identifies probes whose tip moved since the previous detection.
+        Tip keypoints (first keypoint) are fused into a per-track Kalman filter keyed
+        by the YOLO track id, and a probe is moving when its filtered tip moved more than
+        the movement threshold since its previous local detection.
         """
         if not detections:
             print(f" {self.name} - No detections to compare.")
@@ -195,39 +206,24 @@ class YoloProcessWorker:
             detections[0]["is_moving"] = True
             return detections
 
-        if not self.prev_detections:
-            print(f" {self.name} - No previous to compare.")
-            self.prev_detections = detections.copy()
-            return detections
-
-        # Map previous detections by ID for fast lookup
-        prev_map = {d["id"]: d for d in self.prev_detections if d.get("id") is not None}
-
-        #  Iterate through current detections
+        is_first = len(self.tip_tracker) == 0
         for curr_d in detections:
             curr_id = curr_d.get("id")
-
-            if curr_id in prev_map:
-                prev = prev_map[curr_id]
-                kpts_curr = curr_d.get("keypoints_orig", [])
-                kpts_prev = prev.get("keypoints_orig", [])
-
-                dist = 0.0
-                # Keypoint format is flat list: [x1, y1, conf1, x2, y2, conf2...]
-                if len(kpts_curr) >= 2 and len(kpts_prev) >= 2:
-                    cx, cy = kpts_curr[0], kpts_curr[1]
-                    px, py = kpts_prev[0], kpts_prev[1]
-
-                    # Calculate Euclidean distance for just the first point
-                    dist = math.hypot(cx - px, cy - py)
-                    # print(f" {self.name} - Probe {curr_id} moved {dist:.2f} px")
-
-                # 4. Check Threshold
-                if dist > self.movement_threshold:
-                    curr_d["is_moving"] = True
-                else:
-                    curr_d["is_moving"] = False
-
+            kpts_curr = curr_d.get("keypoints_orig", [])
+            # Keypoint format is flat list: [x1, y1, conf1, x2, y2, conf2...]
+            if curr_id is None or len(kpts_curr) < 2:
+                continue
+
+            ts = curr_d.get("timestamp")
+            if ts is None:
+                ts = time.time()
+            known = curr_id in self.tip_tracker
+            self.tip_tracker.update(curr_id, (kpts_curr[0], kpts_curr[1]), ts)
+            if known:
+                curr_d["is_moving"] = self.tip_tracker.is_moving(curr_id)
+
+        if is_first:
+            print(f" {self.name} - No previous to compare.")
         self.prev_detections = detections.copy()
         return detections
 
@@ -255,10 +251,40 @@ class YoloProcessWorker:
             if self.finished_callback:
                 self.finished_callback()
 
-    def _load_yolo_config(self, config_path):
+    @staticmethod
+    def _load_yolo_config(config_path):
         with open(config_path, "r") as f:
             return yaml.safe_load(f)
 
+    @classmethod
+    def preload(cls, name):
+        """
+        Start loading and warming up the YOLO models of a camera in the background.
+        Workers created later for the same camera pick up the same models.
+        """
+        try:
+            CONFIG = cls._load_yolo_config(yolo_config_path)
+        except Exception as e:
+            print(f"Error loading YOLO config: {e}")
+            CONFIG = {}
+        YoloKeypoints.load_model(name, CONFIG.get("keypoints", {}).get("yolo", {}))
+        YoloSegmentation.load_model(name, CONFIG.get("segmentation", {}).get("yolo", {}))
+
+    @classmethod
+    def release(cls, name):
+        """Drop the preloaded YOLO models of a camera name, e.g. after the camera is renamed."""
+        try:
+            CONFIG = cls._load_yolo_config(yolo_config_path)
+        except Exception as e:
+            print(f"Error loading YOLO config: {e}")
+            CONFIG = {}
+        YoloKeypoints.release_model(name, CONFIG.get("keypoints", {}).get("yolo", {}))
+        YoloSegmentation.release_model(name, CONFIG.get("segmentation", {}).get("yolo", {}))
+
+    def is_ready(self) -> bool:
+        """Return True once both YOLO models are loaded and warmed up."""
+        return self.yolo_global.yolo_worker.is_ready() and self.yolo_local.yolo_worker.is_ready()
+
     def start_running(self):  # Running Yolo Server Threads
         self.stage_ts = 0.0  # init
         self.yolo_local.start_client()
@@ -286,6 +312,22 @@ class YoloProcessWorker:
         """Update the serial number."""
         self.sn = sn
 
+    def set_stage_moving(self, sn, moving: bool):
+        """Track stage motion; the global model runs at full rate while any stage moves."""
+        if moving:
+            self.moving_stages.add(sn)
+        else:
+            self.moving_stages.discard(sn)
+        self.yolo_global.set_stage_moving(bool(self.moving_stages))
+
+    def get_effective_fps(self) -> float:
+        """Rate at which frames are currently sent to the global model."""
+        return self.yolo_global.get_effective_fps()
+
+    def set_priority_class(self, class_name):
+        """Run local detection on crops of this class (the selected stage's probe type) first."""
+        self.yolo_local.set_priority_class(class_name)
+
     def update_stage_timestamp(self, stage_ts: float):
         self.stage_ts = stage_ts
 
@@ -312,29 +354,13 @@ class YoloProcessWorker:
         if keypoints is None:
             return None
         if keypoints and len(keypoints) > 0:
-            for j in range(0, len(keypoints), 3):  # format [x1, y1, c1, x2, y2, c2, ...]
-                x = int(keypoints[j])
-                y = int(keypoints[j + 1])
-                tip = (x, y)
-
-                top_fine, bottom_fine, left_fine, right_fine = UtilsCrops.calculate_crop_region(
-                    tip,
-                    tip,
-                    crop_size=25,
-                    IMG_SIZE=self.original_resolution,
-                )
-                tip_image = self.frame[top_fine:bottom_fine, left_fine:right_fine]
-                ret, tip = ProbeFineTipDetector.get_precise_tip(
-                    tip_image,
-                    tip=tip,
-                    base=None,
-                    offset_x=left_fine,
-                    offset_y=top_fine,
-                    cam_name=self.name,
-                    check_validity=check_boundary,
-                )
-
-                if ret:
-                    keypoints[j] = float(tip[0])
-                    keypoints[j + 1] = float(tip[1])
+            # format [x1, y1, c1, x2, y2, c2, ...]; refine all tips of the frame in one batch
+            kpts = np.asarray(keypoints, dtype=np.float64).reshape(-1, 3)
+            tips = kpts[:, :2].astype(int)
+            refined, ok = ProbeFineTipDetector.get_precise_tips(
+                self.frame, tips, crop_size=25, cam_name=self.name, check_validity=check_boundary
+            )
+            for k in np.flatnonzero(ok):
+                keypoints[3 * k] = float(refined[k, 0])
+                keypoints[3 * k + 1] = float(refined[k, 1])
         return keypoints
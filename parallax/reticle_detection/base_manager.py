@@ -9,7 +9,10 @@ import cv2
 import numpy as np
 from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 
+from parallax.cameras.calibration_camera import get_origin_xyz
 from parallax.config.config_path import debug_img_dir
+from parallax.reticle_detection.result_cache import ReticleResultCache
+from parallax.utils.compute_budget import ComputeBudget, Priority
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -40,13 +43,14 @@ class BaseDrawWorker(QRunnable):
         self.name = name
         self.running = False
         self.new = False
-        self.state = None  # "Found", "InProcess", "Failed"
+        self.state = None  # "Found", "Preview", "InProcess", "Failed"
         self.frame = None
         self.draw_flag = True
 
         # Drawing variables
         self.origin, self.x, self.y, self.z = None, None, None, None
         self.x_coords, self.y_coords = None, None
+        self.axis_lines = None  # Coarse axes shown before the first calibrated result
 
     def update_frame(self, frame):
         """Update the frame to be processed."""
@@ -61,6 +65,8 @@ class BaseDrawWorker(QRunnable):
                 if self.state == "Found":
                     self._draw_result()
                     self._save_debug_image()
+                elif self.state == "Preview":
+                    self._draw_preview()
                 elif self.state == "InProcess":
                     self._draw_progress()
                 elif self.state == "Failed":
@@ -148,6 +154,23 @@ class BaseDrawWorker(QRunnable):
         if self.x_coords is not None and self.y_coords is not None:
             self._draw_coords(self.x_coords, self.y_coords)
 
+    def _draw_preview(self):
+        """Draw the intermediate result of a detection that is still refining."""
+        if self.axis_lines is not None:
+            for start, end in np.rint(self.axis_lines).astype(int):
+                cv2.line(self.frame, tuple(start), tuple(end), (255, 0, 255), 5)
+        self._draw_result()
+
+        text = "Refining"
+        font = cv2.FONT_HERSHEY_PLAIN
+        font_scale = 5
+        thickness = 3
+        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+        text_x = (self.frame.shape[1] - text_size[0]) // 2
+        cv2.putText(
+            self.frame, text, (text_x, text_size[1] + 50), font, font_scale, (255, 255, 0), thickness, cv2.LINE_AA
+        )
+
     def _draw_coords(self, x_axis_coords, y_axis_coords):
         """Draw axis points on the frame."""
         size = 2 if logger.getEffectiveLevel() == logging.DEBUG else 7
@@ -202,12 +225,14 @@ class ProcessWorkerSignal(QObject):
 
     finished = pyqtSignal()
     found_coords = pyqtSignal(np.ndarray, np.ndarray, object)  # x_coords, y_coords, CameraParams
-    state = pyqtSignal(str)  # "Found", "Failed", "Stopped", "InProcess"
+    state = pyqtSignal(str)  # "Found", "Preview", "Failed", "Stopped", "InProcess"
 
 
 class BaseProcessWorker(QRunnable):
     """Base worker for processing frames to detect reticle coordinates."""
 
+    cache_method = None  # Key of this method in ReticleResultCache; None disables caching
+
     def __init__(self, name):
         """Initialize the worker with a name."""
         super().__init__()
@@ -219,6 +244,8 @@ class BaseProcessWorker(QRunnable):
         # Drawing variables
         self.origin, self.x, self.y, self.z = None, None, None, None
         self.x_coords, self.y_coords = None, None
+        self.axis_lines = None  # Coarse axes, (2, 2, 2) segment ends, while refining
+        self.camera_params = None  # Set by process() on success, for the result cache
 
     @pyqtSlot()
     def run(self):
@@ -228,7 +255,9 @@ class BaseProcessWorker(QRunnable):
                 time.sleep(0.01)
                 continue
             self.signals.state.emit("InProcess")
-            result = self.process(self.frame)
+            budget = ComputeBudget.instance()
+            with budget.slot(self.name, budget.priority_for(camera_sn=self.name, default=Priority.RETICLE)):
+                result = self._process_cached(self.frame)
             if result == DetectionResult.STOPPED:
                 logger.debug(f"{self.name} - Outside request to stop processing")
                 self.signals.state.emit("Stopped")
@@ -244,6 +273,34 @@ class BaseProcessWorker(QRunnable):
         self.signals.finished.emit()
         return
 
+    def _process_cached(self, frame):
+        """Reuse a cached result for an unchanged scene, otherwise process the frame and cache the result."""
+        if self.cache_method is None:
+            return self.process(frame)
+
+        cache = ReticleResultCache.instance()
+        cached = cache.lookup(self.name, self.cache_method, frame)
+        if cached is not None:
+            logger.debug(f"{self.name} - reusing cached reticle detection")
+            self.x_coords, self.y_coords, self.camera_params = cached
+            params = self.camera_params
+            self.origin, self.x, self.y, self.z = get_origin_xyz(
+                imgpoints=np.array(self.x_coords, dtype=np.float32),
+                mtx=params.mtx,
+                dist=params.dist,
+                rvecs=params.rvec,
+                tvecs=params.tvec,
+                center_index_x=len(self.x_coords) // 2,
+                axis_length=10,
+            )
+            self.signals.found_coords.emit(self.x_coords, self.y_coords, params)
+            return DetectionResult.SUCCESS
+
+        result = self.process(frame)
+        if result == DetectionResult.SUCCESS and self.camera_params is not None:
+            cache.store(self.name, self.cache_method, frame, self.x_coords, self.y_coords, self.camera_params)
+        return result
+
     def process(self, frame):
         """Process the frame to detect reticle coordinates.
         Args:
@@ -360,7 +417,9 @@ class BaseReticleManager(QObject):
 
         if state == "InProcess":
             self.worker.state = "InProcess"
-        elif state == "Found":
+        elif state in ("Found", "Preview"):
+            if self.processWorker is None:
+                return
             # Drawing variables
             self.worker.origin = self.processWorker.origin
             self.worker.x = self.processWorker.x
@@ -368,7 +427,8 @@ class BaseReticleManager(QObject):
             self.worker.z = self.processWorker.z
             self.worker.x_coords = self.processWorker.x_coords
             self.worker.y_coords = self.processWorker.y_coords
-            self.worker.state = "Found"
+            self.worker.axis_lines = self.processWorker.axis_lines if state == "Preview" else None
+            self.worker.state = state
         elif state == "Failed":
             self.worker.state = "Failed"
         elif state == "Stopping":
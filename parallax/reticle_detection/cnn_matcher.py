@@ -0,0 +1,223 @@
+"""
+CNNReticleMatcher: Long-lived SuperPoint + LightGlue reticle localization.
+
+The sfm feature, match and localize steps used to be launched as three fresh Python
+subprocesses per detection, each paying interpreter start-up, torch and model imports,
+and polled every half second. The matcher keeps one worker process alive instead. It
+imports sfm once, runs the same CLI entry points in-process, and receives frames
+through shared memory. Only the camera pose comes back.
+"""
+
+import importlib
+import io
+import logging
+import multiprocessing
+import runpy
+import shutil
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from parallax.config.config_path import cnn_export_dir, cnn_img_dir
+from parallax.reticle_detection.base_manager import DetectionResult
+from parallax.reticle_detection.detection_pool import ReticleDetectionJob, attached_frame, submit_shared_frame
+from parallax.utils.coords_converter import get_rvec_and_tvec
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+MAX_RETRIES = 10
+DIST_THRESHOLD = 500.0
+
+
+def preprocess_image(image):
+    """Blur the frame and convert it to the channel order the sfm steps read."""
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def _init_matcher():
+    """Import sfm, and with it torch and the models' modules, once per worker process."""
+    importlib.import_module("sfm")
+
+
+def _warmup():
+    """No-op job; returns once the worker process is initialized."""
+    return True
+
+
+def _run_cli_step(script_name, args):
+    """
+    Run one sfm CLI script in this process.
+
+    Returns:
+        str: What the script printed.
+
+    Raises:
+        RuntimeError: If the script exits with a non-zero status.
+    """
+    script = Path(sys.modules["sfm"].__file__).parent / script_name
+    out = io.StringIO()
+    argv, sys.argv = sys.argv, [str(script), *args]
+    try:
+        with redirect_stdout(out):
+            runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{script_name} exited with status {e.code}") from e
+    finally:
+        sys.argv = argv
+    return out.getvalue()
+
+
+def _localize_in_worker(shm_name, shape, dtype, name, max_retries, dist_threshold):
+    """
+    Localize the reticle in a shared frame. Runs in the matcher process.
+
+    Returns:
+        tuple: (DetectionResult value, rvecs, tvecs).
+    """
+    image_dir, export_dir = cnn_img_dir / name, cnn_export_dir / name
+    query = f"{name}.jpg"
+    with attached_frame(shm_name, shape, dtype) as (frame, running_flag):
+        image_dir.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(image_dir / query), preprocess_image(frame))
+        del frame  # Release the view of the shared block before closing it
+
+        try:
+            steps = [
+                ("cli_feature.py", ["--image_dir", str(image_dir), "--query", query, "--export_dir", str(export_dir)]),
+                ("cli_match.py", ["--query", query, "--export_dir", str(export_dir)]),
+            ]
+            for script_name, args in steps:
+                if not running_flag():
+                    return DetectionResult.STOPPED.value, None, None
+                _run_cli_step(script_name, args)
+
+            rvecs, tvecs = None, None
+            for attempt in range(1, max_retries + 1):
+                if not running_flag():
+                    return DetectionResult.STOPPED.value, None, None
+                stdout = _run_cli_step("cli_localize.py", ["--query", query, "--export_dir", str(export_dir)])
+                values = list(map(float, stdout.strip().split()))
+                rvecs, tvecs = get_rvec_and_tvec(np.array(values[:4]), np.array(values[4:]))
+                logger.info(f"Attempt {attempt}: tvec dist - {np.linalg.norm(tvecs):.2f}")
+                if np.linalg.norm(tvecs) <= dist_threshold:
+                    break
+            return DetectionResult.SUCCESS.value, rvecs, tvecs
+        except Exception as e:
+            logger.warning(f"{name} - SuperPoint + LightGlue localization failed: {e}")
+            return DetectionResult.FAILED.value, None, None
+        finally:
+            shutil.rmtree(image_dir, ignore_errors=True)
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+
+class CNNReticleMatcher:
+    """Single worker process running SuperPoint + LightGlue localization for all cameras."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_retries=MAX_RETRIES, dist_threshold=DIST_THRESHOLD):
+        """
+        Initialize the matcher. The worker process is started by start() or the first submit.
+
+        Args:
+            max_retries (int): Localization attempts per frame.
+            dist_threshold (float): Largest accepted camera distance; farther poses are retried.
+        """
+        self.max_retries = max_retries
+        self.dist_threshold = dist_threshold
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "CNNReticleMatcher":
+        """Return the shared matcher."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawn: forking a process that runs Qt and camera threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_matcher
+                )
+            return self._executor
+
+    def _submit(self, submit_fn):
+        """
+        Call submit_fn(executor), starting a new worker process once if the current one broke.
+
+        A worker that crashed, or whose sfm import failed, leaves the executor broken, and
+        every later submit would fail with BrokenProcessPool until the application restarts.
+        """
+        executor = self._get_executor()
+        try:
+            return submit_fn(executor)
+        except BrokenProcessPool as e:
+            logger.warning(f"SuperPoint + LightGlue worker process broke ({e}), starting a new one")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return submit_fn(self._get_executor())
+
+    @staticmethod
+    def _log_warmup(future):
+        """Report a worker that failed to start, e.g. because sfm could not be imported."""
+        if future.cancelled():
+            return
+        e = future.exception()
+        if e is not None:
+            logger.warning(f"SuperPoint + LightGlue worker failed to start: {e!r}")
+
+    def start(self):
+        """
+        Start the worker process and import the models in the background.
+
+        Returns:
+            concurrent.futures.Future: Resolves once the worker is ready.
+        """
+        future = self._submit(lambda executor: executor.submit(_warmup))
+        future.add_done_callback(self._log_warmup)
+        return future
+
+    def submit(self, frame, name) -> ReticleDetectionJob:
+        """
+        Localize the reticle in a frame.
+
+        Jobs of several cameras run one after another on the single worker.
+
+        Args:
+            frame (numpy.ndarray): Camera frame. It is copied, so the caller may reuse it.
+            name (str): Camera name.
+
+        Returns:
+            ReticleDetectionJob: Resolves to (DetectionResult, rvecs, tvecs).
+        """
+        job = self._submit(
+            lambda executor: submit_shared_frame(
+                executor, _localize_in_worker, frame, name, self.max_retries, self.dist_threshold
+            )
+        )
+        logger.debug(f"{name} - reticle localization submitted to the matcher")
+        return job
+
+    def shutdown(self, wait=True):
+        """Stop the worker process. The next submit starts a new one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,96 @@
+"""
+Coarse reticle axes from a downsampled frame.
+
+Full reticle detection works on every tick at full resolution and its run time depends on
+the image. The coarse pass only looks for the two axis lines, on a copy of the frame
+downsampled to at most max_side pixels, so its cost is bounded by max_side rather than by
+the camera resolution. Its result is shown while the full detection refines it.
+"""
+
+import logging
+
+import cv2
+import numpy as np
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def _downsample(frame, max_side):
+    """Grayscale copy of a frame with its longer side at most max_side, and the scale used."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if frame.ndim == 3 else frame
+    scale = min(1.0, max_side / max(gray.shape[:2]))
+    if scale == 1.0:
+        return gray, scale
+    size = (round(gray.shape[1] * scale), round(gray.shape[0] * scale))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), scale
+
+
+def _line_segment(binary, rho, theta, max_distance=2.0, max_gap=20.0):
+    """
+    Ends of the dark pixels along a Hough line, as a (2, 2) array, or None if there are too few.
+
+    The pixels within max_distance of the line are split where they leave a gap of more
+    than max_gap pixels, and the longest-populated part is taken as the axis, so a probe
+    crossing the line at a shallow angle does not extend it.
+    """
+    ys, xs = np.nonzero(binary)
+    normal = np.array([np.cos(theta), np.sin(theta)])
+    points = np.stack([xs, ys], axis=1).astype(np.float64)
+    on_line = points[np.abs(points @ normal - rho) <= max_distance]
+    if len(on_line) < 2:
+        return None
+    direction = np.array([-normal[1], normal[0]])
+    t = np.sort(on_line @ direction)
+    breaks = np.flatnonzero(np.diff(t) > max_gap) + 1
+    runs = np.split(t, breaks)
+    run = max(runs, key=len)
+    base = rho * normal
+    return np.array([base + run[0] * direction, base + run[-1] * direction])
+
+
+def detect_coarse_axes(frame, mask_generator=None, max_side=1000, max_angle_error=20.0):
+    """
+    Find the two reticle axes in a downsampled frame.
+
+    The strongest Hough line is taken as the first axis, and the strongest line within
+    max_angle_error of perpendicular to it as the second, so a probe shank crossing the
+    reticle at another angle is not mistaken for an axis.
+
+    Args:
+        frame (numpy.ndarray): Camera frame.
+        mask_generator (MaskGenerator): Masks out the area outside the reticle, if given.
+        max_side (int): Longer side of the downsampled frame, in pixels.
+        max_angle_error (float): Largest deviation of the axes from perpendicular, in degrees.
+
+    Returns:
+        numpy.ndarray or None: (2, 2, 2) segment ends of the two axes, in frame pixels,
+            or None if no perpendicular pair of lines was found.
+    """
+    small, scale = _downsample(frame, max_side)
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    binary = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 15, 4)
+    if mask_generator is not None:
+        mask = mask_generator.process(small)
+        if mask is not None:
+            binary = cv2.bitwise_and(binary, binary, mask=mask)
+
+    lines = cv2.HoughLinesWithAccumulator(binary, 1, np.pi / 180, int(0.2 * min(small.shape)))
+    if lines is None:
+        logger.debug("detect_coarse_axes: no lines")
+        return None
+    lines = lines[:, 0]  # (rho, theta, votes), most votes first
+
+    rho, theta, _ = lines[0]
+    angle_errors = np.abs(np.abs(np.degrees(lines[1:, 1] - theta)) - 90)
+    candidates = np.flatnonzero(angle_errors <= max_angle_error)
+    if len(candidates) == 0:
+        logger.debug("detect_coarse_axes: no line perpendicular to the strongest one")
+        return None
+    second = lines[1 + candidates[0]]
+
+    segments = [_line_segment(binary, r, t) for r, t in ((rho, theta), second[:2])]
+    if any(segment is None for segment in segments):
+        return None
+    return np.array(segments) / scale
@@ -0,0 +1,429 @@
+"""
+ReticleDetectionPool: Reticle detection for all cameras on a shared process pool.
+
+Reticle detection is numpy/skimage/OpenCV work that holds the GIL for much of its run
+time, so detection threads of several cameras mostly take turns. The pool runs the
+detection, and the camera calibration on its result, in worker processes instead. Each
+frame is copied once into a shared-memory block and the worker maps it in place; one
+extra byte after the frame is the cancel flag the worker polls as its running flag.
+Only the reticle coordinates and the camera parameters come back, plus, on request, each
+improved attempt on a queue served by a multiprocessing manager, for the live preview.
+Each pool process keeps one detector per camera across jobs.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Optional
+
+import cv2
+import numpy as np
+
+import parallax.config.config_calibration as cfg
+from parallax.cameras.calibration_camera import calibrate_camera
+from parallax.reticle_detection.base_manager import DetectionResult
+from parallax.reticle_detection.mask_generator import MaskGenerator
+from parallax.reticle_detection.reticle_detection import ReticleDetection
+from parallax.reticle_detection.reticle_detection_coords_interests import ReticleDetectCoordsInterest
+from parallax.utils.compute_budget import ComputeBudget
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def _calibration_attempt(reticle_detector, coords_interests, centroids, seed, camera_model_name, running_flag):
+    """
+    Fit the reticle axes with one RANSAC seed and calibrate the camera on them.
+
+    Returns:
+        tuple or None: (x_coords, y_coords, reprojection_error, CameraParams), or None if
+            this seed gave no usable axes.
+    """
+    success, _, pixels_in_lines = reticle_detector.get_coords_from_ticks(centroids, running_flag, seed=seed)
+    if not success:
+        return None
+    success, x_coords, y_coords = coords_interests.get_coords_interest(pixels_in_lines)
+    if not success or not running_flag():
+        return None
+    try:
+        error, params = calibrate_camera(x_coords, y_coords, camera_model_name=camera_model_name)
+    except cv2.error as e:
+        logger.debug(f"{reticle_detector.name} - calibration failed for seed {seed}: {e}")
+        return None
+    return x_coords, y_coords, error, params
+
+
+def detect_reticle_coords(
+    reticle_detector,
+    coords_interests,
+    frame,
+    running_flag,
+    camera_model_name="MockCamera",
+    max_retries=10,
+    error_target=cfg.REPROJ_ERROR_TARGET,
+    max_workers=1,
+    on_progress=None,
+):
+    """
+    Find the reticle coordinates of interest in a frame and calibrate the camera on them.
+
+    The tick blobs are found once. Each attempt then fits the axes with its own RANSAC
+    seed, picks the coordinates of interest and calibrates the camera. Attempts run on
+    max_workers threads. The first one with a reprojection error at or below error_target
+    is accepted and the others are stopped; if none reaches it, the attempt with the
+    smallest error is used. Each attempt that improves on the best so far is reported
+    through on_progress, so a caller can show it while the remaining attempts run.
+
+    Args:
+        reticle_detector (ReticleDetection): Detector of the camera.
+        coords_interests (ReticleDetectCoordsInterest): Picks the coordinates around the centre.
+        frame (numpy.ndarray): Camera frame.
+        running_flag (callable): Returns False when detection should stop.
+        camera_model_name (str): Camera model, for calibrate_camera.
+        max_retries (int): Number of RANSAC seeds tried.
+        error_target (float): Reprojection error (RMS pixels) accepted without further attempts.
+        max_workers (int): Threads evaluating attempts concurrently.
+        on_progress (callable): Called as on_progress(x_coords, y_coords, params, error)
+            with each improved attempt, in the calling thread.
+
+    Returns:
+        tuple: (result, x_coords, y_coords, params)
+            - result (DetectionResult): SUCCESS, FAILED or STOPPED.
+            - x_coords (numpy.ndarray): X-axis coordinates, or None.
+            - y_coords (numpy.ndarray): Y-axis coordinates, or None.
+            - params (CameraParams): Calibration on those coordinates, or None.
+    """
+    success, masked_img, _, _ = reticle_detector.get_masked_img(frame, running_flag)
+    if not running_flag():
+        return DetectionResult.STOPPED, None, None, None
+    if not success:
+        logger.debug("[WARN] get_coords failed.")
+        return DetectionResult.FAILED, None, None, None
+
+    success, _, centroids = reticle_detector.detect_ticks(masked_img, running_flag)
+    if not running_flag():
+        return DetectionResult.STOPPED, None, None, None
+    if not success:
+        logger.debug("[WARN] get_coords failed. Exiting process.")
+        return DetectionResult.FAILED, None, None, None
+
+    name = reticle_detector.name
+    accepted = threading.Event()
+
+    def attempt_running():
+        return running_flag() and not accepted.is_set()
+
+    def attempt(i):
+        seed = reticle_detector.ransac_seed + i
+        start = time.perf_counter()
+        outcome = _calibration_attempt(
+            reticle_detector, coords_interests, centroids, seed, camera_model_name, attempt_running
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        error = "no axes" if outcome is None else f"reprojection error {outcome[2]:.3f} px"
+        logger.info(f"{name} - reticle attempt {i + 1} (seed {seed}): {error}, {elapsed_ms:.1f} ms")
+        return outcome
+
+    # At most max_workers attempts in flight, so an accepted attempt leaves none queued
+    best, next_attempt, in_flight = None, 0, set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while next_attempt < max_retries and len(in_flight) < max_workers:
+                in_flight.add(executor.submit(attempt, next_attempt))
+                next_attempt += 1
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            improved = False
+            for future in done:
+                outcome = future.result()
+                if outcome is not None and (best is None or outcome[2] < best[2]):
+                    best, improved = outcome, True
+            if improved and on_progress is not None and running_flag():
+                x_coords, y_coords, error, params = best
+                on_progress(x_coords, y_coords, params, error)
+            if (best is not None and best[2] <= error_target) or not running_flag():
+                accepted.set()  # Attempts still running stop at their next running-flag check
+                break
+
+    if not running_flag():
+        return DetectionResult.STOPPED, None, None, None
+    if best is None:
+        logger.debug(f"{name} - no RANSAC seed gave the coordinates of interest")
+        return DetectionResult.FAILED, None, None, None
+    x_coords, y_coords, error, params = best
+    if error > error_target:
+        logger.info(f"{name} - no reticle attempt reached {error_target} px, using {error:.3f} px")
+    return DetectionResult.SUCCESS, x_coords, y_coords, params
+
+
+# Detectors of the cameras a pool process has served, kept for the life of the process
+# so the mask generator's configuration and mask cache carry over between jobs
+_worker_detectors = {}
+
+
+def _init_worker(n_threads):
+    """Limit OpenCV threads in a pool process to one compute-budget slot."""
+    cv2.setNumThreads(n_threads)
+
+
+def _worker_detector(img_size, name, test_mode):
+    """Return this pool process's detector for a camera, creating it on first use."""
+    key = (tuple(img_size), name, test_mode)
+    detector = _worker_detectors.get(key)
+    if detector is None:
+        detector = ReticleDetection(img_size, MaskGenerator(initial_detect=True), name, test_mode=test_mode)
+        _worker_detectors[key] = detector
+    return detector
+
+
+@contextmanager
+def attached_frame(shm_name, shape, dtype):
+    """
+    Map a frame shared by submit_shared_frame. Used in pool processes.
+
+    Yields:
+        tuple: (frame, running_flag). running_flag returns False once the job is cancelled.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    try:
+        yield np.ndarray(shape, dtype=dtype, buffer=shm.buf[:frame_bytes]), lambda: shm.buf[frame_bytes] == 0
+    finally:
+        try:
+            shm.close()
+        except BufferError:  # A caller or traceback still holds the frame; the mapping goes with it
+            pass
+
+
+def _detect_in_worker(
+    shm_name, shape, dtype, img_size, name, test_mode, camera_model_name, n_threads, progress_queue=None
+):
+    """
+    Run detect_reticle_coords on a frame in shared memory. Runs in a pool process.
+
+    Each improved attempt is put on progress_queue, if given, as
+    (x_coords, y_coords, params, error).
+    """
+    on_progress = None
+    if progress_queue is not None:
+
+        def on_progress(x_coords, y_coords, params, error):
+            try:
+                progress_queue.put((np.asarray(x_coords, np.float32), np.asarray(y_coords, np.float32), params, error))
+            except (EOFError, OSError) as e:  # The manager process is gone; the preview is optional
+                logger.debug(f"{name} - reticle detection progress not sent: {e}")
+
+    with attached_frame(shm_name, shape, dtype) as (frame, running_flag):
+        result, x_coords, y_coords, params = detect_reticle_coords(
+            _worker_detector(img_size, name, test_mode),
+            ReticleDetectCoordsInterest(),
+            frame,
+            running_flag,
+            camera_model_name=camera_model_name,
+            max_workers=n_threads,
+            on_progress=on_progress,
+        )
+        del frame  # Release the view of the shared block before closing it
+    if result != DetectionResult.SUCCESS:
+        return result.value, None, None, None
+    return result.value, np.asarray(x_coords, np.float32), np.asarray(y_coords, np.float32), params
+
+
+class ReticleDetectionJob:
+    """One frame submitted to a process pool through shared memory."""
+
+    def __init__(self, future, shm, frame_bytes, n_outputs=2, progress_queue=None):
+        """Wrap the pool future, the shared block holding the frame and the worker's progress queue."""
+        self.future = future
+        self._shm = shm
+        self._frame_bytes = frame_bytes
+        self._n_outputs = n_outputs
+        self._progress_queue = progress_queue
+        self._lock = threading.Lock()
+        self.future.add_done_callback(self._release)
+
+    def cancel(self):
+        """Ask the worker to stop; a job that has not started is dropped."""
+        with self._lock:
+            if self._shm is not None:
+                self._shm.buf[self._frame_bytes] = 1
+        self.future.cancel()
+
+    def done(self) -> bool:
+        """True once the job finished, failed or was cancelled."""
+        return self.future.done()
+
+    def progress(self) -> list:
+        """
+        Take the progress the worker reported since the last call, without waiting.
+
+        Returns:
+            list: Reported items in order, e.g. (x_coords, y_coords, params, error) for
+                detection. Empty if nothing new was reported or the job has no progress queue.
+        """
+        updates = []
+        if self._progress_queue is None:
+            return updates
+        try:
+            while True:
+                updates.append(self._progress_queue.get_nowait())
+        except queue.Empty:
+            pass
+        except (EOFError, OSError) as e:  # The manager process is gone
+            logger.debug(f"Reticle detection progress unavailable: {e}")
+            self._progress_queue = None
+        return updates
+
+    def result(self, timeout: Optional[float] = None):
+        """
+        Wait for the job.
+
+        Returns:
+            tuple: (DetectionResult, *outputs), e.g. x_coords and y_coords. The outputs
+                are None unless detection succeeded.
+        """
+        try:
+            result, *outputs = self.future.result(timeout)
+        except CancelledError:
+            return (DetectionResult.STOPPED,) + (None,) * self._n_outputs
+        finally:
+            if self.future.done():
+                self._release()  # Waiters wake before done callbacks run
+        return (DetectionResult(result), *outputs)
+
+    def _release(self, _future=None):
+        """Free the shared block once the worker no longer uses it."""
+        with self._lock:
+            shm, self._shm = self._shm, None
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+
+def submit_shared_frame(executor, fn, frame, *args, n_outputs=2, progress_queue=None) -> ReticleDetectionJob:
+    """
+    Copy a frame into shared memory and submit fn(shm_name, shape, dtype, *args).
+
+    fn maps the frame with attached_frame and returns (DetectionResult value, *outputs).
+
+    Args:
+        executor (concurrent.futures.ProcessPoolExecutor): Pool to run fn on.
+        fn (callable): Module-level function run in the pool process.
+        frame (numpy.ndarray): Frame to share. It is copied, so the caller may reuse it.
+        n_outputs (int): Number of outputs fn returns after the result.
+        progress_queue (queue proxy): Queue fn reports progress on, passed as its last
+            argument. Read through ReticleDetectionJob.progress.
+
+    Returns:
+        ReticleDetectionJob: The submitted job.
+    """
+    frame = np.asarray(frame)
+    shm = shared_memory.SharedMemory(create=True, size=frame.nbytes + 1)
+    np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf[: frame.nbytes])[...] = frame
+    shm.buf[frame.nbytes] = 0
+    if progress_queue is not None:
+        args = (*args, progress_queue)
+    try:
+        future = executor.submit(fn, shm.name, frame.shape, frame.dtype.str, *args)
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    return ReticleDetectionJob(future, shm, frame.nbytes, n_outputs, progress_queue)
+
+
+class ReticleDetectionPool:
+    """Process pool shared by the reticle detection workers of all cameras."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the pool. Worker processes are started on first use.
+
+        Args:
+            max_workers (int): Number of worker processes. Defaults to the compute-budget slots.
+        """
+        budget = ComputeBudget.instance()
+        self.max_workers = max_workers or budget.max_concurrent
+        self.threads_per_worker = budget.threads_per_worker
+        self._executor = None
+        self._manager = None  # Serves the progress queues, started on first use
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "ReticleDetectionPool":
+        """Return the shared pool."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawn: forking a process that runs Qt and camera threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker,),
+                )
+            return self._executor
+
+    def _progress_queue(self):
+        """A new queue the pool processes can report progress on."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.Queue()
+
+    def submit(
+        self, frame, name, img_size, test_mode=False, camera_model_name="MockCamera", progress=False
+    ) -> ReticleDetectionJob:
+        """
+        Detect the reticle in a frame on the pool and calibrate the camera on it.
+
+        Args:
+            frame (numpy.ndarray): Camera frame. It is copied, so the caller may reuse it.
+            name (str): Camera name.
+            img_size (tuple): (width, height) of the frame, as for ReticleDetection.
+            test_mode (bool): Passed to ReticleDetection.
+            camera_model_name (str): Camera model, for calibrate_camera.
+            progress (bool): Report improved attempts through the job's progress().
+
+        Returns:
+            ReticleDetectionJob: Resolves to (DetectionResult, x_coords, y_coords, CameraParams).
+        """
+        job = submit_shared_frame(
+            self._get_executor(),
+            _detect_in_worker,
+            frame,
+            img_size,
+            name,
+            test_mode,
+            camera_model_name,
+            self.threads_per_worker,
+            n_outputs=3,
+            progress_queue=self._progress_queue() if progress else None,
+        )
+        logger.debug(f"{name} - reticle detection submitted to the process pool")
+        return job
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes and the progress queue server. The next submit starts new ones."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            manager, self._manager = self._manager, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
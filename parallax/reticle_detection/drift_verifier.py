@@ -0,0 +1,214 @@
+"""
+ReticleDriftVerifier: Watch a calibrated reticle for camera or reticle motion.
+
+After detection, a few reticle patches (the two ends of each axis and their crossing)
+are cut from a reference frame. At a low rate each patch is searched again in a small
+window around its reference position with normalized cross-correlation, and the median
+shift of the confident matches is the drift of the scene. The axis ends and the crossing
+are used because a patch of ticks along an axis repeats every tick and would match a
+neighbouring tick just as well. Only a drift beyond tolerance, seen in consecutive checks,
+raises a drift event, so full re-detection runs only when the calibration is no longer valid.
+"""
+
+import logging
+import time
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def _gray(img):
+    """Return a single-channel copy of an image."""
+    if img.ndim == 3 and img.shape[2] == 3:
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    return np.ascontiguousarray(img)
+
+
+def _subpixel_offset(left, centre, right):
+    """Offset of a parabola's peak through three samples, in [-0.5, 0.5]."""
+    denom = left - 2 * centre + right
+    if denom >= 0:
+        return 0.0
+    return float(np.clip(0.5 * (left - right) / denom, -0.5, 0.5))
+
+
+class ReticleDriftTracker:
+    """Estimate the shift of a reticle from a reference frame by patch matching."""
+
+    def __init__(self, patch_size=64, search_radius=32, min_correlation=0.6, min_patches=3):
+        """
+        Initialize the tracker.
+
+        Args:
+            patch_size (int): Side of the square reticle patches, in pixels.
+            search_radius (int): Largest shift searched per check, in pixels.
+            min_correlation (float): Smallest correlation of a confident patch match.
+            min_patches (int): Confident patches needed for a drift estimate.
+        """
+        self.patch_size = patch_size
+        self.search_radius = search_radius
+        self.min_correlation = min_correlation
+        self.min_patches = min_patches
+        self.patches = []  # (top-left (x, y), patch image)
+
+    def reset(self):
+        """Forget the reference patches."""
+        self.patches = []
+
+    def anchors(self, x_coords, y_coords):
+        """Reticle points to track: the ends of both axes and the point closest to their crossing."""
+        x_coords, y_coords = np.asarray(x_coords, float), np.asarray(y_coords, float)
+        crossing = x_coords[np.argmin(np.min(np.linalg.norm(x_coords[:, None] - y_coords[None], axis=2), axis=1))]
+        return np.array([x_coords[0], x_coords[-1], y_coords[0], y_coords[-1], crossing])
+
+    def set_reference(self, frame, x_coords, y_coords) -> bool:
+        """
+        Cut the reference patches from a frame.
+
+        Args:
+            frame (numpy.ndarray): Frame the reticle coordinates were detected in.
+            x_coords (numpy.ndarray): (N, 2) X-axis coordinates.
+            y_coords (numpy.ndarray): (M, 2) Y-axis coordinates.
+
+        Returns:
+            bool: True if enough patches lie inside the frame, with room for the search window.
+        """
+        height, width = frame.shape[:2]
+        half, margin = self.patch_size // 2, self.search_radius
+        self.patches = []
+        for x, y in np.rint(self.anchors(x_coords, y_coords)).astype(int):
+            left, top = x - half, y - half
+            if left - margin < 0 or top - margin < 0:
+                continue
+            if left + self.patch_size + margin > width or top + self.patch_size + margin > height:
+                continue
+            patch = _gray(frame[top : top + self.patch_size, left : left + self.patch_size])
+            if patch.std() < 1.0:
+                continue  # Flat patch, nothing to match
+            self.patches.append(((left, top), patch))
+        if len(self.patches) < self.min_patches:
+            self.patches = []
+            return False
+        return True
+
+    def measure(self, frame):
+        """
+        Estimate the shift of the reticle in a frame from the reference.
+
+        Returns:
+            numpy.ndarray or None: (dx, dy) median shift in pixels, or None if fewer than
+                min_patches patches matched confidently.
+        """
+        shifts = []
+        r = self.search_radius
+        for (left, top), patch in self.patches:
+            window = _gray(frame[top - r : top + self.patch_size + r, left - r : left + self.patch_size + r])
+            scores = cv2.matchTemplate(window, patch, cv2.TM_CCOEFF_NORMED)
+            _, best, _, (i, j) = cv2.minMaxLoc(scores)
+            if not best >= self.min_correlation:
+                continue
+            dx, dy = float(i - r), float(j - r)
+            if 0 < i < scores.shape[1] - 1:
+                dx += _subpixel_offset(scores[j, i - 1], best, scores[j, i + 1])
+            if 0 < j < scores.shape[0] - 1:
+                dy += _subpixel_offset(scores[j - 1, i], best, scores[j + 1, i])
+            shifts.append((dx, dy))
+        if len(shifts) < self.min_patches:
+            return None
+        return np.median(np.array(shifts), axis=0)
+
+
+class ReticleDriftVerifier(QObject):
+    """Check one camera's calibrated reticle at a low rate and report drift beyond tolerance."""
+
+    drift_detected = pyqtSignal(str, float, float)  # camera name, dx, dy
+
+    def __init__(self, name, interval=2.0, tolerance=3.0, confirmations=2, tracker=None):
+        """
+        Initialize the verifier. It is idle until set_coords is called.
+
+        Args:
+            name (str): Camera name.
+            interval (float): Seconds between checks.
+            tolerance (float): Largest accepted drift, in pixels.
+            confirmations (int): Consecutive checks beyond tolerance before a drift event.
+            tracker (ReticleDriftTracker): Patch tracker. Defaults to a new one.
+        """
+        super().__init__()
+        self.name = name
+        self.interval = interval
+        self.tolerance = tolerance
+        self.confirmations = confirmations
+        self.tracker = tracker or ReticleDriftTracker()
+        self._coords = None  # Coordinates waiting for a reference frame
+        self._last_check = None
+        self._exceeded = 0
+
+    @property
+    def active(self) -> bool:
+        """True while the reticle is being watched."""
+        return bool(self.tracker.patches)
+
+    def set_name(self, name):
+        """Set the camera name and stop watching the previous camera's reticle."""
+        self.name = name
+        self.clear()
+
+    def set_coords(self, x_coords, y_coords):
+        """Watch newly detected reticle coordinates; the next processed frame is the reference."""
+        self._coords = (np.array(x_coords, float), np.array(y_coords, float))
+        self.tracker.reset()
+        self._exceeded = 0
+
+    def clear(self):
+        """Stop watching the reticle."""
+        self._coords = None
+        self.tracker.reset()
+        self._exceeded = 0
+
+    def due(self) -> bool:
+        """True if the next processed frame is used, as the reference or for a check."""
+        if self._coords is not None:
+            return True
+        return self.active and time.monotonic() - self._last_check >= self.interval
+
+    def process(self, frame):
+        """
+        Check a camera frame for drift, at most once per interval.
+
+        The frame must not carry overlays: the screen filters draw their markers on the
+        reticle points this checks, so callers pass a copy taken before they draw.
+
+        Returns:
+            numpy.ndarray or None: (dx, dy) measured in this call, or None if no check ran.
+        """
+        if self._coords is not None:
+            if not self.tracker.set_reference(frame, *self._coords):
+                logger.debug(f"{self.name} - too few reticle patches inside the frame to watch for drift")
+            self._coords, self._last_check = None, time.monotonic()
+            return None
+        if not self.active:
+            return None
+
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return None
+        self._last_check = now
+
+        shift = self.tracker.measure(frame)
+        if shift is None:
+            logger.debug(f"{self.name} - reticle patches not found, drift check skipped")
+            return None
+        drift = float(np.hypot(*shift))
+        logger.debug(f"{self.name} - reticle drift ({shift[0]:.1f}, {shift[1]:.1f}) px")
+        self._exceeded = self._exceeded + 1 if drift > self.tolerance else 0
+        if self._exceeded >= self.confirmations:
+            logger.debug(f"{self.name} - reticle moved by ({shift[0]:.1f}, {shift[1]:.1f}) px since calibration")
+            self.clear()  # Re-armed by the next detection
+            self.drift_detected.emit(self.name, float(shift[0]), float(shift[1]))
+        return shift
@@ -0,0 +1,162 @@
+"""
+Vectorized RANSAC for the two reticle axes.
+
+Line hypotheses are drawn from random point pairs, and every hypothesis is scored
+against every point in one array operation. The two axes are then chosen together
+as the pair of hypotheses that covers the most points, so the second axis does not
+depend on which one a sequential search happened to find first. A seeded generator
+makes the result reproducible.
+"""
+
+import logging
+
+import numpy as np
+from skimage.measure import LineModelND
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def line_model(origin, direction):
+    """Build a skimage LineModelND from an origin and a unit direction."""
+    try:
+        return LineModelND(origin, direction)
+    except TypeError:  # scikit-image < 0.26 has no parameterised constructor
+        model = LineModelND()
+        model.params = (origin, direction)
+        return model
+
+
+def fit_line(points):
+    """
+    Total least-squares line through points.
+
+    Returns:
+        tuple: (origin, direction), the centroid and the unit principal direction.
+    """
+    origin = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - origin, full_matrices=False)
+    return origin, vt[0]
+
+
+def line_hypotheses(points, n_hypotheses, rng):
+    """
+    Draw line hypotheses through random pairs of distinct points.
+
+    Args:
+        points (numpy.ndarray): (N, 2) points.
+        n_hypotheses (int): Number of point pairs to draw.
+        rng (numpy.random.Generator): Random generator.
+
+    Returns:
+        tuple: (origins, normals), each (H, 2). Degenerate pairs are dropped.
+    """
+    first = rng.integers(0, len(points), n_hypotheses)
+    second = (first + rng.integers(1, len(points), n_hypotheses)) % len(points)
+    origins, direction = points[first], points[second] - points[first]
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    valid = length > 0
+    normals = np.stack([-direction[:, 1], direction[:, 0]], axis=1)[valid] / length[valid, None]
+    return origins[valid], normals
+
+
+def line_distances(points, origins, normals):
+    """Distance of every point to every hypothesis line, as an (H, N) array."""
+    return np.abs(normals @ points.T - np.einsum("ij,ij->i", normals, origins)[:, None])
+
+
+def best_line_pair(inliers, min_inliers):
+    """
+    Choose the two hypotheses that together cover the most points.
+
+    Args:
+        inliers (numpy.ndarray): (H, N) boolean inlier matrix.
+        min_inliers (int): Points each line must have that the other line does not.
+
+    Returns:
+        tuple or None: (i, j) with i the hypothesis with more inliers, or None.
+    """
+    counts = inliers.sum(axis=1)
+    candidates = np.flatnonzero(counts >= min_inliers)
+    if len(candidates) < 2:
+        return None
+    weights = inliers[candidates].astype(np.float32)
+    shared = weights @ weights.T
+    count = counts[candidates].astype(np.float32)
+    exclusive = count[:, None] - shared  # inliers of row not on column
+    valid = (exclusive >= min_inliers) & (exclusive.T >= min_inliers)
+    coverage = np.where(valid, count[:, None] + count[None, :] - shared, -1)
+    i, j = np.unravel_index(np.argmax(coverage), coverage.shape)
+    if coverage[i, j] < 0:
+        return None
+    if count[j] > count[i]:
+        i, j = j, i
+    return int(candidates[i]), int(candidates[j])
+
+
+def detect_line_pair(
+    points,
+    n_hypotheses=500,
+    residual_threshold=5.0,
+    max_residual_threshold=16.0,
+    expand_threshold=7.0,
+    min_inliers=20,
+    seed=0,
+):
+    """
+    Find the two lines supported by the most points.
+
+    The residual threshold starts at residual_threshold and grows by one pixel up to
+    max_residual_threshold until two lines with min_inliers points each are found.
+    Each line is then refitted to its inliers, expanded to every point within
+    expand_threshold, and those points are removed before the second line is
+    expanded. A line left with fewer than min_inliers points is dropped.
+
+    Args:
+        points (numpy.ndarray): (N, 2) points.
+        n_hypotheses (int): Number of random point pairs scored.
+        residual_threshold (float): Initial inlier distance for scoring hypotheses.
+        max_residual_threshold (float): Largest inlier distance tried.
+        expand_threshold (float): Distance within which points are assigned to a fitted line.
+        min_inliers (int): Minimum number of points per line.
+        seed (int): Seed of the hypothesis sampler.
+
+    Returns:
+        tuple: (lines, line_points)
+            - lines (list): LineModelND per line, most supported first.
+            - line_points (list): (M, 2) points assigned to each line.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        return [], []
+
+    rng = np.random.default_rng(seed)
+    origins, normals = line_hypotheses(points, n_hypotheses, rng)
+    distances = line_distances(points, origins, normals)
+
+    threshold, pair = residual_threshold, None
+    while pair is None and threshold <= max_residual_threshold:
+        pair = best_line_pair(distances < threshold, min_inliers)
+        threshold += 1
+    if pair is None:
+        logger.debug(f"detect_line_pair: no pair of lines with {min_inliers} points")
+        return [], []
+
+    seeds = distances[list(pair)] < threshold - 1
+    lines, line_points = [], []
+    remaining = np.ones(len(points), dtype=bool)
+    for seed_inliers in seeds:
+        if np.count_nonzero(seed_inliers & remaining) < 2:
+            break
+        origin, direction = fit_line(points[seed_inliers & remaining])
+        rel = points - origin
+        residuals = np.abs(rel[:, 0] * direction[1] - rel[:, 1] * direction[0])
+        assigned = remaining & (residuals < expand_threshold)
+        if np.count_nonzero(assigned) < min_inliers:
+            break  # Seeds from a hypothesis that only crosses a line
+        lines.append(line_model(origin, direction))
+        line_points.append(points[assigned])
+        remaining &= ~assigned
+        logger.debug(f"detect_line_pair: line with {seed_inliers.sum()} seeds, {assigned.sum()} points")
+    return lines, line_points
@@ -1,22 +1,23 @@
 """Reticle Detection Manager using OpenCV"""
 
 import logging
+import time
 
 import numpy as np
 
-from parallax.cameras.calibration_camera import (
-    calibrate_camera,
-    get_origin_xyz,
-)
+from parallax.cameras.calibration_camera import get_origin_xyz
 from parallax.reticle_detection.base_manager import (
     BaseDrawWorker,
     BaseProcessWorker,
     BaseReticleManager,
     DetectionResult,
 )
+from parallax.reticle_detection.coarse_axes import detect_coarse_axes
+from parallax.reticle_detection.detection_pool import ReticleDetectionPool, detect_reticle_coords
 from parallax.reticle_detection.mask_generator import MaskGenerator
 from parallax.reticle_detection.reticle_detection import ReticleDetection
 from parallax.reticle_detection.reticle_detection_coords_interests import ReticleDetectCoordsInterest
+from parallax.utils.compute_budget import ComputeBudget
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -30,6 +31,8 @@ class ReticleDetectManager(BaseReticleManager):
     class ProcessWorker(BaseProcessWorker):
         """Worker for processing frames with OpenCV-based reticle detection."""
 
+        cache_method = "opencv"
+
         def __init__(self, model, name, test_mode=False):
             """Initializes the OpenCV-based reticle detection worker."""
             super().__init__(name)
@@ -40,56 +43,46 @@ class ReticleDetectManager(BaseReticleManager):
                 IMG_SIZE_ORIGINAL, self.mask_detect, self.name, test_mode=self.test_mode
             )
             self.coordsInterests = ReticleDetectCoordsInterest()
-
-        def process(self, frame):
-            """Process a single frame to detect reticle coordinates."""
-            # Step 1: Run detection
-            success, masked_img, _, _ = self.reticleDetector.get_masked_img(frame, lambda: self.running)
-            if not self.running:
-                return DetectionResult.STOPPED
-            if not success:
-                logger.debug("[WARN] get_coords failed.")
-                return DetectionResult.FAILED
-
-            # Retry Loop
-            max_retries = 10
-            detection_successful = False
-            for attempt in range(max_retries):
-                if not self.running:
-                    return DetectionResult.STOPPED
-
-                # Attempt to get coordinates
-                success, processed_frame, _, inliner_lines = self.reticleDetector.get_coords(
-                    masked_img, lambda: self.running
-                )
-                if not success:
-                    # REQUIREMENT: If get_coords fails, just return fail immediately
-                    logger.debug("[WARN] get_coords failed. Exiting process.")
-                    return DetectionResult.FAILED
-
-                # Attempt to get coordinates of interest
-                success, self.x_coords, self.y_coords = self.coordsInterests.get_coords_interest(inliner_lines)
-                if not success:
-                    # If get_coords_interest fails, try the loop again
-                    logger.debug(f"[RETRY {attempt + 1}] get_coords_interest failed. Retrying get_coords...")
-                    continue
-                # If we reach here, both passed
-                detection_successful = True
-                break
-
-            if not detection_successful:
-                return DetectionResult.FAILED
-
-            # Step 3: Camera calibration
-            success, params = calibrate_camera(
-                self.x_coords, self.y_coords, camera_model_name=self.model.get_camera_device_model(self.name)
+            # One process gains nothing over this thread but pays for the handoff
+            self.use_process_pool = ReticleDetectionPool.instance().max_workers > 1
+
+        def _detect_in_thread(self, frame, camera_model_name):
+            """Run detect_reticle_coords in this thread, with attempts on the slot's threads."""
+            return detect_reticle_coords(
+                self.reticleDetector,
+                self.coordsInterests,
+                frame,
+                lambda: self.running,
+                camera_model_name=camera_model_name,
+                max_workers=ComputeBudget.instance().threads_per_worker,
+                on_progress=self._show_progress,
             )
-            if not self.running:
-                return DetectionResult.STOPPED
-            if not success:
-                return DetectionResult.FAILED
 
-            # Step 4: Reproject 3D axis points
+        def _detect_in_pool(self, frame, camera_model_name):
+            """Run detect_reticle_coords on the shared process pool, falling back to this thread."""
+            try:
+                job = ReticleDetectionPool.instance().submit(
+                    frame,
+                    self.name,
+                    IMG_SIZE_ORIGINAL,
+                    self.test_mode,
+                    camera_model_name=camera_model_name,
+                    progress=True,
+                )
+                while not job.done():
+                    if not self.running:
+                        job.cancel()
+                    for x_coords, y_coords, params, error in job.progress():
+                        if self.running:
+                            self._show_progress(x_coords, y_coords, params, error)
+                    time.sleep(0.01)
+                return job.result()
+            except Exception as e:
+                logger.warning(f"{self.name} - reticle detection pool failed ({e}), detecting in thread")
+                return self._detect_in_thread(frame, camera_model_name)
+
+        def _project_axes(self, params):
+            """Reproject the 3D axis points for drawing."""
             self.origin, self.x, self.y, self.z = get_origin_xyz(
                 imgpoints=np.array(self.x_coords, dtype=np.float32),
                 mtx=params.mtx,
@@ -100,6 +93,39 @@ class ReticleDetectManager(BaseReticleManager):
                 axis_length=10,
             )
 
+        def _show_coarse_axes(self, frame):
+            """Show the axes found on a downsampled frame while the full detection runs."""
+            self.axis_lines = detect_coarse_axes(frame, self.mask_detect)
+            if self.axis_lines is not None and self.running:
+                self.signals.state.emit("Preview")
+
+        def _show_progress(self, x_coords, y_coords, params, error):
+            """Show an attempt that improved on the previous ones while the remaining attempts run."""
+            logger.debug(f"{self.name} - preview with reprojection error {error:.3f} px")
+            self.x_coords, self.y_coords, self.axis_lines = x_coords, y_coords, None
+            self._project_axes(params)
+            self.signals.state.emit("Preview")
+
+        def process(self, frame):
+            """Process a single frame to detect reticle coordinates."""
+            # Step 0: Coarse axes on a downsampled frame, shown until the first calibrated attempt
+            self._show_coarse_axes(frame)
+
+            # Step 1-3: Detect the reticle and its coordinates of interest, and calibrate the camera
+            camera_model_name = self.model.get_camera_device_model(self.name)
+            if self.use_process_pool:
+                result, self.x_coords, self.y_coords, params = self._detect_in_pool(frame, camera_model_name)
+            else:
+                result, self.x_coords, self.y_coords, params = self._detect_in_thread(frame, camera_model_name)
+            if not self.running:
+                return DetectionResult.STOPPED
+            if result != DetectionResult.SUCCESS:
+                return result
+            self.camera_params = params
+
+            # Step 4: Reproject 3D axis points
+            self._project_axes(params)
+
             # Emit data
             logger.debug("OpenCV")
             logger.debug(f"rvecs: {params.rvec}")
@@ -1,8 +1,13 @@
 """
 MaskGenerator: Generates a mask from an input image
 using various image processing techniques.
+
+The optics and reticle are static for a session, so the last mask is cached per input
+resolution. A small thumbnail of the input is kept alongside it, and the mask is only
+recomputed when the thumbnail drifts from the one the mask was computed from.
 """
 
+import functools
 import json
 import logging
 
@@ -33,6 +38,11 @@ class MaskGenerator:
         self.initial_detect = initial_detect
         self.config = None
 
+        # Mask cache: input shape -> (thumbnail, mask, age in frames)
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     def _load_config(self, config_path=None, config_dict=None):
         """Load configuration from file or dictionary.
 
@@ -75,6 +85,31 @@ class MaskGenerator:
 
         return value
 
+    def _signature(self, img):
+        """Return a small thumbnail summarising the image content for drift checks."""
+        size = tuple(self._get_config_value("cache.signature_size", [40, 30]))
+        return cv2.resize(img, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _cached_mask(self, img, signature):
+        """Return (True, mask) if the cached mask for this resolution is still valid."""
+        entry = self._cache.get(img.shape)
+        if entry is None:
+            return False, None
+
+        cached_signature, mask, age = entry
+        max_age = self._get_config_value("cache.max_age_frames", 300)
+        drift = float(np.mean(np.abs(signature - cached_signature)))
+        if age >= max_age or drift > self._get_config_value("cache.drift_threshold", 4.0):
+            logger.debug(f"Mask cache invalidated: drift {drift:.2f}, age {age}")
+            return False, None
+
+        self._cache[img.shape] = (cached_signature, mask, age + 1)
+        return True, mask
+
+    def invalidate_cache(self):
+        """Drop the cached masks, e.g. after the camera or reticle has moved."""
+        self._cache.clear()
+
     def _resize_and_blur(self):
         """Resize and blur the image."""
         if len(self.img.shape) > 2:
@@ -103,6 +138,36 @@ class MaskGenerator:
 
         _, self.img = cv2.threshold(self.img, threshold_value, max_value, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _highpass_kernel(shape, c, d0):
+        """
+        Build the Gaussian highpass filter for a real FFT of the given image shape.
+
+        The filter is defined on the centred (fftshift-ed) spectrum. Only the real part of
+        the filtered image is kept, so the filter is symmetrised over +/- frequencies,
+        which lets the transform run on the half spectrum of rfft2.
+
+        Args:
+            shape (tuple): (rows, cols) of the image.
+            c (float): Constant to adjust the filter strength.
+            d0 (float): Cutoff frequency for the high-pass filter.
+
+        Returns:
+            numpy.ndarray: (rows, cols // 2 + 1) filter for the rfft2 spectrum.
+        """
+        rows, cols = shape
+        center_x, center_y = rows // 2, cols // 2
+        y, x = np.ogrid[:rows, :cols]
+        gaussian = np.exp(-c * ((x - center_x) ** 2 + (y - center_y) ** 2) / (2 * d0**2))
+        highpass = np.fft.ifftshift(1 - gaussian)
+
+        # H(-k), i.e. the filter at the negated frequency indices
+        mirrored = np.roll(highpass[::-1, ::-1], 1, axis=(0, 1))
+        kernel = 0.5 * (highpass + mirrored)[:, : cols // 2 + 1]
+        kernel.setflags(write=False)
+        return kernel
+
     def _homomorphic_filter(self, gamma_high=None, gamma_low=None, c=None, d0=None):
         """
         Apply a homomorphic filter to the image to enhance contrast and remove shadows.
@@ -120,24 +185,12 @@ class MaskGenerator:
         d0 = d0 or self._get_config_value("homomorphic_filter.d0", 30)
 
         # Apply the log transform
-        img_log = np.log1p(np.array(self.img, dtype="float"))
-
-        # Create a Gaussian highpass filter
-        rows, cols = img_log.shape
-        center_x, center_y = rows // 2, cols // 2
-        y, x = np.ogrid[:rows, :cols]
-        gaussian = np.exp(-c * ((x - center_x) ** 2 + (y - center_y) ** 2) / (2 * d0**2))
-        highpass = 1 - gaussian
-
-        # Apply the filter in the frequency domain
-        img_fft = np.fft.fft2(img_log)
-        img_fft = np.fft.fftshift(img_fft)
-        img_hp = img_fft * highpass
+        img_log = np.log1p(np.asarray(self.img, dtype=np.float64))
 
-        # Transform the image back to spatial domain
-        img_hp = np.fft.ifftshift(img_hp)
-        img_hp = np.fft.ifft2(img_hp)
-        img_hp = np.exp(np.real(img_hp)) - 1
+        # Apply the Gaussian highpass filter in the frequency domain
+        kernel = self._highpass_kernel(img_log.shape, float(c), float(d0))
+        img_hp = np.fft.irfft2(np.fft.rfft2(img_log) * kernel, s=img_log.shape)
+        img_hp = np.exp(img_hp) - 1
 
         # Get normalization parameters from config
         alpha = self._get_config_value("normalization.alpha", 0)
@@ -207,10 +260,14 @@ class MaskGenerator:
             if cv2.contourArea(contour) < min_area:
                 self.img = cv2.drawContours(self.img, [contour], -1, (0, 0, 0), -1)
 
-    def _finalize_image(self):
-        """Resize the image back to its original size and adjust the scale."""
-        self.img = cv2.resize(self.img, self.original_size)
-        self.img = cv2.convertScaleAbs(self.img)
+    def _finalize_image(self, dst=None):
+        """Resize the image back to its original size and adjust the scale.
+
+        Args:
+            dst (numpy.ndarray, optional): Output buffer of the original size to write into.
+        """
+        self.img = cv2.resize(self.img, self.original_size, dst=dst)
+        self.img = cv2.convertScaleAbs(self.img, dst=self.img)
 
     def _is_reticle_frame(self, threshold=0.5):
         """Check if the image contains a reticle frame.
@@ -259,11 +316,13 @@ class MaskGenerator:
         if self.is_reticle_exist is None:
             self._is_reticle_frame(threshold=threshold)
 
-    def process(self, img):
+    def process(self, img, dst=None):
         """Process the input image and generate a mask.
 
         Args:
             img (numpy.ndarray): Input image.
+            dst (numpy.ndarray, optional): uint8 buffer of the input size the mask is written into.
+                Lets callers reuse one buffer across frames.
 
         Returns:
             numpy.ndarray: Generated mask image.
@@ -284,6 +343,35 @@ class MaskGenerator:
         if len(img.shape) == 3 and img.shape[2] == 3:
             img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
+        use_cache = self._get_config_value("cache.enable", True)
+        if use_cache:
+            signature = self._signature(img)
+            hit, mask = self._cached_mask(img, signature)
+            if hit:
+                self.cache_hits += 1
+                if mask is None:
+                    return None
+                if dst is None:
+                    return mask.copy()
+                np.copyto(dst, mask)
+                return dst
+            self.cache_misses += 1
+
+        mask = self._generate(img, dst=dst)
+        if use_cache:
+            self._cache[img.shape] = (signature, None if mask is None else mask.copy(), 0)
+        return mask
+
+    def _generate(self, img, dst=None):
+        """Run the full mask pipeline on a grayscale image.
+
+        Args:
+            img (numpy.ndarray): Grayscale input image.
+            dst (numpy.ndarray, optional): Output buffer for the mask.
+
+        Returns:
+            numpy.ndarray: Generated mask image, or None if no reticle is found.
+        """
         self.img = img
         self.original_size = img.shape[1], img.shape[0]
         self._resize_and_blur()  # Resize to smaller image and blur
@@ -306,7 +394,7 @@ class MaskGenerator:
         self._reticle_exist_check(threshold=final_threshold)
         if self.is_reticle_exist is False:
             return None
-        self._finalize_image()  # Resize back to original size
+        self._finalize_image(dst=dst)  # Resize back to original size
 
         return self.img
 
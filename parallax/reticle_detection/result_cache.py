@@ -0,0 +1,246 @@
+"""
+ReticleResultCache: Reuse reticle detection results for an unchanged scene.
+
+Entries are keyed by camera serial number and detection method, and matched by a
+perceptual hash of the downsampled frame. The coarse hash and the normalized
+cross-correlation of a small thumbnail only pre-select candidates: one thumbnail pixel
+covers about 50 frame pixels, so they cannot see a reticle moved by a few pixels. A hit
+is decided by matching patches cut around the cached reticle coordinates at full
+resolution, which measures the shift of the reticle to a fraction of a pixel. The cache
+is saved to disk, so reopening a session reuses it.
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from parallax.config.config_path import reticle_cache_file
+from parallax.reticle_detection.drift_verifier import ReticleDriftTracker
+from parallax.session.session_state import CameraParams
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+THUMBNAIL_SIZE = (80, 60)  # (width, height)
+
+
+def _gray(frame):
+    """Return a single-channel view of a camera frame."""
+    if frame.ndim == 3 and frame.shape[2] == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return frame
+
+
+def perceptual_hash(frame) -> int:
+    """
+    64-bit average hash of a frame.
+
+    Each bit tells whether one cell of the 8x8 downsampled frame is brighter than the
+    mean of the cells. Averaging over large cells makes the hash insensitive to sensor noise.
+    """
+    small = cv2.resize(_gray(frame), (8, 8), interpolation=cv2.INTER_AREA).astype(np.float32)
+    bits = (small > small.mean()).ravel()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+def thumbnail(frame):
+    """Small grayscale copy of a frame for verification."""
+    return cv2.resize(_gray(frame), THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+class ReticleResultCache:
+    """Persistent reticle coordinates and camera parameters per camera and scene."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_distance=10,
+        min_correlation=0.9,
+        min_patch_correlation=0.95,
+        max_shift=0.5,
+        max_entries=8,
+    ):
+        """
+        Initialize the cache. Entries are read from disk on first use.
+
+        Args:
+            path (Path): JSON file of the cache. Defaults to reticle_cache_file.
+            max_distance (int): Largest hash distance of a candidate entry, out of 64 bits.
+            min_correlation (float): Smallest thumbnail correlation of a candidate entry.
+            min_patch_correlation (float): Smallest correlation of a reticle patch; a refocused
+                camera falls below it.
+            max_shift (float): Largest reticle shift accepted as a hit, in frame pixels.
+            max_entries (int): Entries kept per camera and method, most recent first.
+        """
+        self.path = Path(path) if path is not None else reticle_cache_file
+        self.max_distance = max_distance
+        self.min_correlation = min_correlation
+        self.min_patch_correlation = min_patch_correlation
+        self.max_shift = max_shift
+        self.max_entries = max_entries
+        self._entries = None  # "sn/method" -> list of entries
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "ReticleResultCache":
+        """Return the shared cache."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def lookup(self, camera_sn, method, frame):
+        """
+        Return the cached result for a frame of an unchanged scene.
+
+        Args:
+            camera_sn (str): Camera serial number.
+            method (str): Detection method, e.g. "opencv" or "cnn".
+            frame (numpy.ndarray): Current camera frame.
+
+        Returns:
+            tuple or None: (x_coords, y_coords, CameraParams) on a hit, otherwise None.
+        """
+        frame_hash, thumb = perceptual_hash(frame), thumbnail(frame)
+        with self._lock:
+            entries = list(self._load().get(f"{camera_sn}/{method}", []))
+        for entry in entries:
+            if self._matches(entry, frame, frame_hash, thumb):
+                logger.debug(f"{camera_sn} - reticle cache hit")
+                return entry["x_coords"].copy(), entry["y_coords"].copy(), entry["params"].model_copy(deep=True)
+        return None
+
+    def _matches(self, entry, frame, frame_hash, thumb) -> bool:
+        """
+        True if an entry was stored for the same scene and reticle position.
+
+        A close hash and a correlated thumbnail select the candidate; the reticle patches
+        of the entry must then be found within max_shift pixels of where they were cut.
+        """
+        if hamming_distance(frame_hash, entry["hash"]) > self.max_distance:
+            return False
+        correlation = cv2.matchTemplate(thumb, entry["thumbnail"], cv2.TM_CCOEFF_NORMED)[0, 0]
+        if not correlation >= self.min_correlation:  # Also False for flat (NaN) thumbnails
+            return False
+        tracker = ReticleDriftTracker(min_correlation=self.min_patch_correlation, min_patches=len(entry["patches"]))
+        tracker.patches = entry["patches"]
+        shift = tracker.measure(frame)
+        return shift is not None and bool(np.hypot(*shift) <= self.max_shift)
+
+    def store(self, camera_sn, method, frame, x_coords, y_coords, params: CameraParams):
+        """
+        Remember the result of a detection on a frame and save the cache.
+
+        Results whose reticle is too close to the frame edge to cut patches around it are not cached.
+        """
+        tracker = ReticleDriftTracker()
+        if not tracker.set_reference(frame, x_coords, y_coords):
+            logger.debug(f"{camera_sn} - reticle too close to the frame edge to cache the result")
+            return
+        entry = {
+            "hash": perceptual_hash(frame),
+            "thumbnail": thumbnail(frame),
+            "patches": tracker.patches,
+            "x_coords": np.asarray(x_coords, dtype=np.float64),
+            "y_coords": np.asarray(y_coords, dtype=np.float64),
+            "params": params.model_copy(deep=True),
+        }
+        with self._lock:
+            entries = self._load().setdefault(f"{camera_sn}/{method}", [])
+            entries[:] = [e for e in entries if not self._matches(e, frame, entry["hash"], entry["thumbnail"])]
+            entries.insert(0, entry)
+            del entries[self.max_entries :]
+            self._save()
+
+    def invalidate(self, camera_sn=None):
+        """Forget the results of one camera, or of all cameras, and save the cache."""
+        with self._lock:
+            entries = self._load()
+            if camera_sn is None:
+                entries.clear()
+            else:
+                for key in [k for k in entries if k.split("/")[0] == camera_sn]:
+                    del entries[key]
+            self._save()
+
+    def _load(self):
+        """Read the cache file once. An unreadable file starts an empty cache."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if not self.path.exists():
+            return self._entries
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+            for key, entries in raw.items():
+                self._entries[key] = [self._decode(entry) for entry in entries]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable reticle cache {self.path}: {e}")
+            self._entries = {}
+        return self._entries
+
+    def _save(self):
+        """Write the cache atomically."""
+        raw = {key: [self._encode(entry) for entry in entries] for key, entries in self._entries.items()}
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(raw, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save reticle cache {self.path}: {e}")
+
+    @staticmethod
+    def _encode(entry):
+        return {
+            "hash": format(entry["hash"], "x"),
+            "thumbnail": base64.b64encode(entry["thumbnail"].tobytes()).decode("ascii"),
+            "patches": [
+                {
+                    "origin": [int(v) for v in origin],
+                    "size": patch.shape[0],
+                    "pixels": base64.b64encode(patch.tobytes()).decode("ascii"),
+                }
+                for origin, patch in entry["patches"]
+            ],
+            "x_coords": entry["x_coords"].tolist(),
+            "y_coords": entry["y_coords"].tolist(),
+            "params": entry["params"].model_dump(mode="json"),
+        }
+
+    @staticmethod
+    def _decode(raw):
+        thumb = np.frombuffer(base64.b64decode(raw["thumbnail"]), dtype=np.uint8)
+        return {
+            "hash": int(raw["hash"], 16),
+            "thumbnail": thumb.reshape(THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0]).copy(),
+            "patches": [
+                (
+                    tuple(patch["origin"]),
+                    np.frombuffer(base64.b64decode(patch["pixels"]), dtype=np.uint8)
+                    .reshape(patch["size"], patch["size"])
+                    .copy(),
+                )
+                for patch in raw["patches"]
+            ],
+            "x_coords": np.array(raw["x_coords"], dtype=np.float64),
+            "y_coords": np.array(raw["y_coords"], dtype=np.float64),
+            "params": CameraParams.model_validate(raw["params"]),
+        }
@@ -7,12 +7,12 @@ Process:
 """
 
 import logging
-import warnings
 
 import cv2
 import numpy as np
 from scipy.stats import linregress
-from skimage.measure import LineModelND, ransac
+
+from parallax.reticle_detection.line_ransac import detect_line_pair
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -28,6 +28,7 @@ class ReticleDetection:
         self.mask = None
         self.name = camera_name
         self.test_mode = test_mode
+        self.ransac_seed = 0  # Fixed so the same frame always gives the same axes
 
     def _preprocess_image(self, img):
         """Convert image to grayscale, blur, and resize."""
@@ -87,92 +88,61 @@ class ReticleDetection:
                 35,
             )
 
-    def _ransac_detect_lines(self, img, running_flag):
-        """Detect lines using RANSAC algorithm.
-
-        Args:
-            img (numpy.ndarray): Input image.
+    def _get_tick_centroids(self, img, running_flag):
+        """Centroids of the tick blobs in an eroded binary image.
 
         Returns:
-            tuple: (ret, inlier_lines, inlier_pixels)
-                - ret (bool): True if two lines are detected, False otherwise.
-                - inlier_lines (list): List of detected line models.
-                - inlier_pixels (list): List of inlier pixel coordinates for each line.
+            numpy.ndarray or None: (N, 2) centroids, or None if stopped or fewer than 10 were found.
         """
-        inlier_lines = []
-        inlier_pixels = []
-
         if img is None:
-            return False, inlier_lines, inlier_pixels
+            return None
 
         contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         if not running_flag():
             logger.debug(f"{self.name} ransac_detect_lines - stop running while searching for lines.")
-            return False, [], []
+            return None
 
         centroids = np.array(self._get_centroid(contours, running_flag))
+        if not running_flag():
+            return None
         if len(centroids) < 10:
             logger.debug("points for rasac line detection are less than 10")
-            return False, inlier_lines, inlier_pixels
-
-        max_trials = 500
-        residual_threshold = 5
-        counter = 30
-        while len(inlier_lines) < 2 and counter > 0:
-            counter -= 1
-            logger.debug(
-                f"{self.name} ransac_detect_lines - counter: {counter}, len(inlier_lines): {len(inlier_lines)}"
-            )
-            if not running_flag():
-                logger.debug(f"{self.name} ransac_detect_lines - stop running while searching for lines..")
-                return False, [], []
-
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                model_robust, inliers = ransac(
-                    centroids,
-                    LineModelND,
-                    min_samples=9,
-                    residual_threshold=residual_threshold,
-                    max_trials=max_trials,
-                )
-            inlier_points = centroids[inliers]
-            if len(inlier_points) >= 20:
-                # 1. We have a 'seed' line. Now, let's find EVERY point
-                # in the original 'centroids' that fits this model.
-                # LineModelND.residuals(points) calculates distance to the line.
-                all_distances = model_robust.residuals(centroids)
-
-                # 2. Grab all points within 7 pixels of this infinite line
-                refined_inlier_mask = all_distances < 7.0
-                all_line_points = centroids[refined_inlier_mask]
-
-                logger.debug(f"Expanded line from {len(inlier_points)} to {len(all_line_points)} points")
-
-                # 3. Store the expanded point set
-                inlier_pixels.append(all_line_points)
-                inlier_lines.append(model_robust)
-
-                # 4. Remove ALL those points so we don't detect the same line again
-                centroids = centroids[~refined_inlier_mask]
-
-                # 5. Reset for the second line
-                residual_threshold = 5
-                counter = 30
-
-                if logger.isEnabledFor(logging.DEBUG):
-                    img_remain = np.zeros((img.shape[0], img.shape[1], 3), dtype=np.uint8)
-                    for pt in centroids:
-                        draw_pt = (int(round(pt[0])), int(round(pt[1])))
-                        cv2.circle(img_remain, draw_pt, 3, (0, 255, 255), -1)
-                    cv2.imwrite(f"debug/remaining_points_after_line_{len(inlier_lines)}.jpg", img_remain)
-            else:
-                if residual_threshold <= 15:
-                    residual_threshold += 1
-                continue
+            return None
+        return centroids
+
+    def _detect_lines(self, centroids, seed=None):
+        """Fit the two reticle axes to tick centroids with RANSAC.
 
+        Args:
+            centroids (numpy.ndarray): (N, 2) tick centroids.
+            seed (int): Seed of the RANSAC sampler. Defaults to ransac_seed.
+
+        Returns:
+            tuple: (ret, inlier_lines, inlier_pixels), as for _ransac_detect_lines.
+        """
+        seed = self.ransac_seed if seed is None else seed
+        inlier_lines, inlier_pixels = detect_line_pair(centroids, n_hypotheses=500, seed=seed)
+        logger.debug(f"{self.name} ransac_detect_lines - {[len(pixels) for pixels in inlier_pixels]} points per line")
         return len(inlier_lines) == 2, inlier_lines, inlier_pixels
 
+    def _ransac_detect_lines(self, img, running_flag, seed=None):
+        """Detect lines using RANSAC algorithm.
+
+        Args:
+            img (numpy.ndarray): Input image.
+            seed (int): Seed of the RANSAC sampler. Defaults to ransac_seed.
+
+        Returns:
+            tuple: (ret, inlier_lines, inlier_pixels)
+                - ret (bool): True if two lines are detected, False otherwise.
+                - inlier_lines (list): List of detected line models.
+                - inlier_pixels (list): List of inlier pixel coordinates for each line.
+        """
+        centroids = self._get_tick_centroids(img, running_flag)
+        if centroids is None:
+            return False, [], []
+        return self._detect_lines(centroids, seed)
+
     def _fit_line(self, pixels):
         """Fit a line to the given pixels.
 
@@ -271,7 +241,15 @@ class ReticleDetection:
         return coords_interest
 
     def _eroding(self, img, running_flag):
-        """Erode the image until the desired contour conditions are met.
+        """Erode the image down to the reticle tick blobs in a single pass.
+
+        Selects the first erosion level at which there are 50 to 300 blobs and none is
+        larger than 30x30 pixels. Level k approximates k rounds of erosion followed by an
+        opening with a 3x3 cross: every level is read from one L1 distance transform as
+        the pixels more than k + 1 away from the background, dilated once. The largest blob
+        only shrinks with k and, once the blobs are separated, the blob count only drops, so
+        both limits are found by galloping searches. If no level qualifies, an empty image
+        is returned.
 
         Args:
             img (numpy.ndarray): Input image.
@@ -279,36 +257,66 @@ class ReticleDetection:
         Returns:
             numpy.ndarray: Eroded image.
         """
-        kernel_ellipse_3 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        counter = 100
-        while counter > 0:
-            if not running_flag():
-                logger.debug(f"{self.name} _eroding - stop running while eroding.")
-                return img
+        n_blobs, largest_area = self._blob_stats(img)
+        if n_blobs == 0 or self._is_blob_target(n_blobs, largest_area):
+            return img
 
-            contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if not contours:
-                break
-
-            largest_contour = max(contours, key=cv2.contourArea)
-            largest_contour_area = cv2.contourArea(largest_contour)
-            if 50 < len(contours) < 300 and largest_contour_area < 30 * 30:
-                break
-            if not running_flag():
-                logger.debug(f"{self.name} _eroding - stop running while eroding..")
-                return img
-
-            img = cv2.erode(img, kernel_ellipse_3, iterations=1)
-            if not running_flag():
-                logger.debug(f"{self.name} _eroding - stop running while eroding...")
-                return img
+        kernel_ellipse_3 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        dist = cv2.distanceTransform(img, cv2.DIST_L1, 3, dstType=cv2.CV_8U)
+        max_level = max(int(dist.max()) - 1, 1)  # Nothing is left above this level
+        levels = {}
+
+        def level(k):
+            if k not in levels:
+                eroded = cv2.dilate(cv2.compare(dist, k + 1, cv2.CMP_GT), kernel_ellipse_3)
+                levels[k] = (eroded, *self._blob_stats(eroded))
+            return levels[k]
+
+        def first_level(low, high, done):
+            """Smallest level in [low, high] for which done() holds, galloping up from low."""
+            step = 1
+            while low < high:
+                if not running_flag():
+                    return None
+                probe = min(low + step - 1, high)
+                if done(level(probe)):
+                    high = probe
+                    break
+                low, step = probe + 1, step * 2
+            while low < high:
+                if not running_flag():
+                    return None
+                mid = (low + high) // 2
+                if done(level(mid)):
+                    high = mid
+                else:
+                    low = mid + 1
+            return low
+
+        k = first_level(1, max_level, lambda stats: stats[2] < 30 * 30)
+        if k is not None:
+            k = first_level(k, max_level, lambda stats: stats[1] < 300)
+        if k is None:
+            logger.debug(f"{self.name} _eroding - stop running while eroding.")
+            return img
+
+        eroded, n_blobs, largest_area = level(k)
+        if n_blobs == 0 or self._is_blob_target(n_blobs, largest_area):
+            return eroded
+        return np.zeros_like(img)
+
+    @staticmethod
+    def _blob_stats(img):
+        """Return the number of outer contours and the area of the largest one."""
+        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return 0, 0
+        return len(contours), max(cv2.contourArea(contour) for contour in contours)
 
-            img = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel_ellipse_3)
-            if not running_flag():
-                logger.debug(f"{self.name} _eroding - stop running while eroding....")
-                return img
-            counter -= 1
-        return img
+    @staticmethod
+    def _is_blob_target(n_blobs, largest_area):
+        """True if the blobs look like separated reticle ticks."""
+        return 50 < n_blobs < 300 and largest_area < 30 * 30
 
     def _get_centroid(self, contours, running_flag):
         """Get the centroid of each contour.
@@ -409,7 +417,7 @@ class ReticleDetection:
         """Add missing pixels to the line pixels based on the estimated missing points.
 
         Args:
-            bg (numpy.ndarray): Background image.
+            bg (numpy.ndarray): Background image, or None to skip drawing.
             lines (list): List of line models.
             line_pixels (list): List of pixel coordinates for each line.
 
@@ -458,7 +466,7 @@ class ReticleDetection:
             refined_pixels.append(full_line_pixels)
 
             # Draw missing points
-            if len(missing_points_adjusted) > 0:
+            if bg is not None and len(missing_points_adjusted) > 0:
                 for pixel in missing_points_adjusted:
                     pt = tuple(int(coordinate) for coordinate in pixel)
                     cv2.circle(bg, pt, 2, (0, 255, 255), -1)
@@ -469,7 +477,7 @@ class ReticleDetection:
         """Refine the pixel coordinates fitting into lines based on the line models.
 
         Args:
-            bg (numpy.ndarray): Background image.
+            bg (numpy.ndarray): Background image, or None to skip drawing.
             lines (list): List of line models.
             line_pixels (list): List of pixel coordinates for each line.
 
@@ -486,7 +494,8 @@ class ReticleDetection:
             # Extend the line
             point1 = tuple((origin + -2000 * direction).astype(int))
             point2 = tuple((origin + 2000 * direction).astype(int))
-            cv2.line(bg, point1, point2, (0, 0, 255), 1)
+            if bg is not None:
+                cv2.line(bg, point1, point2, (0, 0, 255), 1)
             pixels = np.array(pixels)
             to_pixels = pixels - origin
             proj_lengths = np.dot(to_pixels, direction) / np.linalg.norm(direction) ** 2
@@ -496,10 +505,11 @@ class ReticleDetection:
             refined_pixels.append(proj_points)
 
         # Draw
-        for refined_pixels_per_line in refined_pixels:
-            for pixel in refined_pixels_per_line:
-                draw_pt = (int(round(pixel[0])), int(round(pixel[1])))
-                cv2.circle(bg, draw_pt, 3, (255, 0, 0), -1)
+        if bg is not None:
+            for refined_pixels_per_line in refined_pixels:
+                for pixel in refined_pixels_per_line:
+                    draw_pt = (int(round(pixel[0])), int(round(pixel[1])))
+                    cv2.circle(bg, draw_pt, 3, (255, 0, 0), -1)
         # cv2.imwrite("debug/refined_pixels.jpg", bg)
         return bg, lines, refined_pixels
 
@@ -521,12 +531,22 @@ class ReticleDetection:
         else:
             return None
 
-    def coords_detect_morph(self, img, running_flag=lambda: True):
+    def detect_ticks(self, img, running_flag=lambda: True):
         """
-        Applies morphological operations and adaptive thresholding
-        to detect coordinates in an image.
+        Find the tick blobs of a masked image.
+
+        This is the part of coordinate detection that does not depend on the RANSAC seed,
+        so retries with other seeds can reuse it.
+
+        Args:
+            img (numpy.ndarray): Masked grayscale image, from get_masked_img.
+
+        Returns:
+            tuple: (ret, img, centroids)
+                - ret (bool): True if enough ticks were found.
+                - img (numpy.ndarray): Eroded binary image.
+                - centroids (numpy.ndarray): (N, 2) tick centroids, or None.
         """
-        img_color = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
         if img.shape == (3000, 4000):
             img = cv2.adaptiveThreshold(
                 img,
@@ -548,7 +568,7 @@ class ReticleDetection:
 
         if not running_flag():
             logger.debug(f"{self.name} coords_detect_morph - stop running after adaptive threshold")
-            return False, img, [], []
+            return False, img, None
 
         img = cv2.medianBlur(img, 5)
         img = cv2.bitwise_not(img, mask=self.mask)
@@ -556,21 +576,35 @@ class ReticleDetection:
         img = cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel_ellipse_5)
         if not running_flag():
             logger.debug(f"{self.name} coords_detect_morph - stop running after morphology")
-            return False, img, [], []
+            return False, img, None
 
         img = self._eroding(img, running_flag)
         if not running_flag():
-            return False, img, [], []
+            return False, img, None
 
         if logger.isEnabledFor(logging.DEBUG):
             cv2.imwrite("debug/after_eroding.jpg", img)
-        ret, inliner_lines, inliner_lines_pixels = self._ransac_detect_lines(img, running_flag)
+        centroids = self._get_tick_centroids(img, running_flag)
+        return centroids is not None, img, centroids
+
+    def coords_detect_morph(self, img, running_flag=lambda: True, seed=None):
+        """
+        Applies morphological operations and adaptive thresholding
+        to detect coordinates in an image.
+        """
+        gray = img
+        ret, img, centroids = self.detect_ticks(gray, running_flag)
+        if not ret:
+            return False, img, [], []
+
+        ret, inliner_lines, inliner_lines_pixels = self._detect_lines(centroids, seed)
         logger.debug(f"n of inliner lines: {len(inliner_lines_pixels)}")
         if not running_flag():
             return False, img, [], []
 
         # Draw
         if logger.isEnabledFor(logging.DEBUG):
+            img_color = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
             for inliner_lines_pixel in inliner_lines_pixels:
                 for pixel in inliner_lines_pixel:
                     pt = (int(round(pixel[0])), int(round(pixel[1])))
@@ -624,11 +658,12 @@ class ReticleDetection:
 
         return True, masked, [], []
 
-    def get_coords(self, img, running_flag=lambda: True):
+    def get_coords(self, img, running_flag=lambda: True, seed=None):
         """Detect coordinates using morphological operations.
 
         Args:
             img (numpy.ndarray): Input image.
+            seed (int): Seed of the RANSAC sampler. Defaults to ransac_seed.
 
         Returns:
             tuple: (ret, img, inliner_lines, inliner_lines_pixels)
@@ -637,7 +672,7 @@ class ReticleDetection:
                 - inliner_lines (list): List of inlier line models.
                 - inliner_lines_pixels (list): List of inlier pixel coordinates for each line.
         """
-        ret, bg, inliner_lines, pixels_in_lines = self.coords_detect_morph(img, running_flag)
+        ret, bg, inliner_lines, pixels_in_lines = self.coords_detect_morph(img, running_flag, seed)
         self._draw_debug(bg, pixels_in_lines, "2_detect_morph")
         logger.debug(f"{self.name} nLines: {len(pixels_in_lines)}")
         if not running_flag():
@@ -645,18 +680,45 @@ class ReticleDetection:
             return False, bg, [], []
 
         if ret:
-            bg, inliner_lines, pixels_in_lines = self._refine_pixels(bg, inliner_lines, pixels_in_lines)
-            logger.debug(f"{self.name} detect: {len(pixels_in_lines[0])}, {len(pixels_in_lines[1])}")
+            return self._complete_lines(bg, inliner_lines, pixels_in_lines, running_flag)
+        return ret, bg, inliner_lines, pixels_in_lines
+
+    def get_coords_from_ticks(self, centroids, running_flag=lambda: True, seed=None):
+        """Detect coordinates from the tick centroids of detect_ticks.
+
+        Nothing is drawn, so several seeds can be tried on the same ticks concurrently.
+
+        Args:
+            centroids (numpy.ndarray): (N, 2) tick centroids.
+            seed (int): Seed of the RANSAC sampler. Defaults to ransac_seed.
+
+        Returns:
+            tuple: (ret, inliner_lines, inliner_lines_pixels), as for get_coords.
+        """
+        ret, inliner_lines, pixels_in_lines = self._detect_lines(centroids, seed)
+        if not ret or not running_flag():
+            return False, [], []
+        ret, _, inliner_lines, pixels_in_lines = self._complete_lines(
+            None, inliner_lines, pixels_in_lines, running_flag
+        )
+        return ret, inliner_lines, pixels_in_lines
+
+    def _complete_lines(self, bg, inliner_lines, pixels_in_lines, running_flag):
+        """Project the line pixels onto their lines and fill in missed ticks. bg may be None."""
+        bg, inliner_lines, pixels_in_lines = self._refine_pixels(bg, inliner_lines, pixels_in_lines)
+        logger.debug(f"{self.name} detect: {len(pixels_in_lines[0])}, {len(pixels_in_lines[1])}")
+        if bg is not None:
             self._draw_debug(bg, pixels_in_lines, "3_refine_pixels")
-            if not running_flag():
-                logger.debug(f"{self.name} get_coords - stop running after refine_pixels")
-                return False, bg, [], []
+        if not running_flag():
+            logger.debug(f"{self.name} get_coords - stop running after refine_pixels")
+            return False, bg, [], []
 
-            bg, pixels_in_lines = self._add_missing_pixels(bg, inliner_lines, pixels_in_lines)
-            logger.debug(f"{self.name} interpolate: {len(pixels_in_lines[0])} {len(pixels_in_lines[1])}")
+        bg, pixels_in_lines = self._add_missing_pixels(bg, inliner_lines, pixels_in_lines)
+        logger.debug(f"{self.name} interpolate: {len(pixels_in_lines[0])} {len(pixels_in_lines[1])}")
+        if bg is not None:
             self._draw_debug(bg, pixels_in_lines, "4_add_missing_pixels")
-            if not running_flag():
-                logger.debug(f"{self.name} get_coords - stop running after add_missing_pixels")
-                return False, bg, [], []
+        if not running_flag():
+            logger.debug(f"{self.name} get_coords - stop running after add_missing_pixels")
+            return False, bg, [], []
 
-        return ret, bg, inliner_lines, pixels_in_lines
+        return True, bg, inliner_lines, pixels_in_lines
@@ -31,12 +31,16 @@ class ProbeDetectWidget(QWidget):
 
         self.detectButton.toggled.connect(lambda checked: self._show_detect_menu(checked))
         self.settingMenu.run_pushBtn.clicked.connect(self._apply_detection_algorithm)
+        self.settingMenu.radioButton2.toggled.connect(self.settingMenu.multiProbe_checkBox.setEnabled)
 
     def _apply_detection_algorithm(self):
         """Apply the selected detection algorithm to the screen and model."""
         # Update into model
         algorithm = "yolo" if self.settingMenu.radioButton1.isChecked() else "opencv"
         self.model.set_probe_detect_algorithms(self.screen.camera_name, algorithm)
+        multi_probe = self.settingMenu.multiProbe_checkBox.isChecked()
+        self.model.set_probe_detect_multi_probe(self.screen.camera_name, multi_probe)
+        self.screen.set_probe_detect_multi_probe(multi_probe)
         # Run open cv default detection
         if self.settingMenu.radioButton2.isChecked():
             print(f"{self.screen.camera_name} - 'OpenCV' tracking selected")
@@ -11,6 +11,8 @@ from PyQt6.QtWidgets import QToolButton, QWidget
 from PyQt6.uic import loadUi
 
 from parallax.config.config_path import ui_dir
+from parallax.reticle_detection.cnn_matcher import CNNReticleMatcher
+from parallax.reticle_detection.result_cache import ReticleResultCache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -31,12 +33,14 @@ class ReticleDetectWidget(QWidget):
         self.settingMenu = self._get_setting_menu()
         if self._is_superpoint_available():
             self.settingMenu.radioButton2.setEnabled(True)
+            self.settingMenu.radioButton2.toggled.connect(self._prepare_cnn_matcher)
 
         self.detectButton.toggled.connect(lambda checked: self._show_detect_menu(checked))
         self.settingMenu.run_pushBtn.clicked.connect(self._run_detection)
         self.settingMenu.reset_pushBtn.clicked.connect(self._reset_detection)
         self.screen.reticle_coords_detected.connect(self._reticle_detected)
         self.screen.reticle_coords_detect_finished.connect(self._enable_run_button)
+        self.screen.reticle_drift_detected.connect(self._reticle_drifted)
 
     def _is_superpoint_available(self):
         """Check if SFM and SuperPoint + LightGlue are available by verifying import and file presence."""
@@ -63,11 +67,17 @@ class ReticleDetectWidget(QWidget):
             logger.warning("[WARN] SuperPoint + LightGlue not available (superpoint.py missing)")
             return False
 
+    def _prepare_cnn_matcher(self, checked):
+        """Start the SuperPoint + LightGlue worker when the method is chosen, so models load before Run."""
+        if checked:
+            CNNReticleMatcher.instance().start()
+
     def _run_detection(self):
         """Run the reticle detection based on the selected method."""
         # Disable button and change appearance
         self.settingMenu.run_pushBtn.setEnabled(False)
         self.settingMenu.run_pushBtn.setText("Running...")
+        self.settingMenu.run_pushBtn.setToolTip("")
 
         # Reset previous detection data
         self.model.reset_coords_intrinsic_extrinsic(self.screen.camera_name)
@@ -93,8 +103,22 @@ class ReticleDetectWidget(QWidget):
     def _reset_detection(self):
         """Reset the reticle detection settings."""
         self.model.reset_coords_intrinsic_extrinsic(self.screen.camera_name)
+        ReticleResultCache.instance().invalidate(self.screen.camera_name)  # Next Run detects again
+        self.screen.reticleVerifier.clear()
         self.screen.run_no_filter()
 
+    def _reticle_drifted(self, camera_name, dx, dy):
+        """
+        Flag that the camera or the reticle moved beyond tolerance since detection.
+
+        The calibration is kept until the user runs detection again; the run button shows
+        the drift, and the cached result is dropped so the next run detects from scratch.
+        """
+        logger.warning(f"{camera_name} - Reticle moved by ({dx:.1f}, {dy:.1f}) px, run detection again")
+        ReticleResultCache.instance().invalidate(camera_name)
+        self.settingMenu.run_pushBtn.setText("Moved - Run")
+        self.settingMenu.run_pushBtn.setToolTip(f"Reticle moved by ({dx:.1f}, {dy:.1f}) px since detection")
+
     def _reticle_detected(self):
         """Handle the event when reticle coordinates are detected."""
         # Enable button
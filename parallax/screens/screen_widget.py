@@ -14,6 +14,7 @@ from PyQt6 import QtCore
 from PyQt6.QtCore import Qt, pyqtSignal
 
 from parallax.probe_detection.probe_detect_manager import ProbeDetectManager
+from parallax.reticle_detection.drift_verifier import ReticleDriftVerifier
 from parallax.reticle_detection.manager_cnn import ReticleDetectManagerCNN
 from parallax.reticle_detection.manager_opencv import ReticleDetectManager
 from parallax.screens.axis_filter import AxisFilter
@@ -35,6 +36,7 @@ class ScreenWidget(pg.GraphicsView):
     cleared = pyqtSignal()
     reticle_coords_detected = pyqtSignal()
     reticle_coords_detect_finished = pyqtSignal()
+    reticle_drift_detected = pyqtSignal(str, float, float)  # camera name, dx, dy
     probe_coords_detected = pyqtSignal(str)
 
     def __init__(self, camera, model=None, parent=None):
@@ -107,6 +109,10 @@ class ScreenWidget(pg.GraphicsView):
         self.reticleDetectorCNN.found_coords.connect(self.reticle_coords_detected)
         self.reticleDetectorCNN.finished.connect(self.reticle_coords_detect_finished)
 
+        # Reticle drift verification after detection
+        self.reticleVerifier = ReticleDriftVerifier(self.camera_name)
+        self.reticleVerifier.drift_detected.connect(self.reticle_drift_detected)
+
         # Probe Detection
         self.probeDetector = ProbeDetectManager(self.model, self.camera_name)
         self.model.add_probe_detector(self.probeDetector)
@@ -191,6 +197,10 @@ class ScreenWidget(pg.GraphicsView):
         """
         Set the data displayed in the screen widget.
         """
+        # The filters below draw into data from their own threads, so the drift check gets
+        # a copy taken before any overlay lands on the reticle.
+        if self.reticleVerifier.due():
+            self.reticleVerifier.process(data.copy())
         self.filter.process(data)
         self.axisFilter.process(data)
         self.reticleDetector.process(data)
@@ -304,6 +314,7 @@ class ScreenWidget(pg.GraphicsView):
         self.probeDetector.set_name(self.camera_name)
         self.axisFilter.set_name(self.camera_name)
         self.filter.set_name(self.camera_name)
+        self.reticleVerifier.set_name(self.camera_name)
 
     def run_reticle_detection(self):
         """Run reticle detection by stopping the filter and starting the reticle detector."""
@@ -368,6 +379,7 @@ class ScreenWidget(pg.GraphicsView):
         coords = np.array([x_coords, y_coords])
         self.model.add_coords_axis(self.camera_name, coords)
         self.model.add_camera_params(self.camera_name, camera_matrix)
+        self.reticleVerifier.set_coords(x_coords, y_coords)
 
     def found_probe_coords(self, stage_ts, img_ts, probe_sn, stage_info, tip_coords, base_coords):
         """Store the found probe coordinates and related information."""
@@ -444,6 +456,10 @@ class ScreenWidget(pg.GraphicsView):
         """Set the probe detection algorithm."""
         self.probeDetector.set_algorithm(algorithms)
 
+    def set_probe_detect_multi_probe(self, enabled):
+        """Set whether OpenCV probe detection tracks all probes at once."""
+        self.probeDetector.set_multi_probe(enabled)
+
 
 class ClickableImage(pg.ImageItem):
     """This class captures mouse click events on images."""
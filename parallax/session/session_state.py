@@ -216,6 +216,7 @@ class CameraSession(BaseModel):
     device_model: Optional[str] = None
     is_triangulation_candidate: bool = False
     probe_detect_algorithm: Literal["opencv", "yolo"] = "yolo"
+    probe_detect_multi_probe: bool = False
     coords_axis: Optional[np.ndarray] = None
     coords_debug: Optional[np.ndarray] = None
     pos_x: Optional[np.ndarray] = None
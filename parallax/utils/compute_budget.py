@@ -0,0 +1,250 @@
+"""
+ComputeBudget: Process-wide CPU budget shared by all detection workers.
+
+Every camera runs a YOLO worker, an OpenCV worker and, during calibration, a reticle
+worker. Left alone, torch, OpenCV and the BLAS backend each size their thread pools to
+the full core count inside every one of them, which oversubscribes the acquisition PC.
+The budget pins each library to a small per-worker thread count once, and admits heavy
+work through a fixed number of slots, served in priority order (selected stage/camera
+first, display last).
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Iterable, Optional
+
+import cv2
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+_UNSET = object()
+
+
+class Priority(IntEnum):
+    """Admission priority. Lower values are served first."""
+
+    SELECTED = 0
+    DETECTION = 1
+    RETICLE = 2
+    DISPLAY = 3
+
+
+class ComputeBudget:
+    """Priority-ordered admission of CPU-heavy work across all cameras."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, n_cores: Optional[int] = None, threads_per_worker: int = 2, report_interval: float = 30.0):
+        """
+        Initialize the budget.
+
+        Args:
+            n_cores (int): Number of cores to budget for. Defaults to os.cpu_count().
+            threads_per_worker (int): Threads torch/OpenCV/BLAS may use inside one slot.
+            report_interval (float): Seconds between statistics reports in the log.
+        """
+        self.n_cores = n_cores or os.cpu_count() or 1
+        self.threads_per_worker = max(1, min(threads_per_worker, self.n_cores))
+        self.max_concurrent = max(1, self.n_cores // self.threads_per_worker)
+
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of [priority, seq, name]
+        self._seq = itertools.count()
+        self._active = {}  # seq -> (name, priority, start time)
+        self._workers = set()
+
+        self._busy_s = 0.0
+        self._admitted = 0
+        self._rejected = 0
+        self._window_start = time.monotonic()
+        self.report_interval = report_interval
+
+        self.selected_stage_sn = None
+        self.selected_camera_sns = frozenset()
+
+    @classmethod
+    def instance(cls) -> "ComputeBudget":
+        """Return the shared budget, creating it and applying thread limits on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance.apply_thread_limits()
+            return cls._instance
+
+    def apply_thread_limits(self):
+        """Pin torch, OpenCV and BLAS thread pools to threads_per_worker."""
+        n = self.threads_per_worker
+        try:
+            cv2.setNumThreads(n)
+        except Exception as e:
+            logger.warning(f"Failed to set OpenCV threads: {e}")
+        if torch is not None:
+            try:
+                torch.set_num_threads(n)
+            except Exception as e:
+                logger.warning(f"Failed to set torch threads: {e}")
+        if threadpool_limits is not None:
+            try:
+                threadpool_limits(limits=n)
+            except Exception as e:
+                logger.warning(f"Failed to set BLAS threads: {e}")
+        logger.info(f"Compute budget: {self.max_concurrent} slots x {n} threads on {self.n_cores} cores")
+
+    # =========================================================
+    #  Workers and selection
+    # =========================================================
+    def register(self, name: str):
+        """Record a worker that draws from the budget."""
+        with self._cond:
+            self._workers.add(name)
+
+    def unregister(self, name: str):
+        """Forget a worker that stopped."""
+        with self._cond:
+            self._workers.discard(name)
+
+    def set_selected(self, stage_sn=_UNSET, camera_sns: Iterable[str] = _UNSET):
+        """Update the stage and cameras whose work is served first."""
+        with self._cond:
+            if stage_sn is not _UNSET:
+                self.selected_stage_sn = stage_sn
+            if camera_sns is not _UNSET:
+                self.selected_camera_sns = frozenset(camera_sns or ())
+
+    def priority_for(self, camera_sn=None, stage_sn=None, default: Priority = Priority.DETECTION) -> Priority:
+        """
+        Return SELECTED if the work belongs to the selected stage or a selected camera,
+        otherwise the given default.
+        """
+        if stage_sn is not None and stage_sn == self.selected_stage_sn:
+            return Priority.SELECTED
+        if camera_sn is not None and camera_sn in self.selected_camera_sns:
+            return Priority.SELECTED
+        return default
+
+    # =========================================================
+    #  Admission
+    # =========================================================
+    @contextmanager
+    def slot(self, name: str, priority: Priority = Priority.DETECTION, timeout: Optional[float] = None):
+        """
+        Hold one compute slot for the duration of the block.
+
+        Args:
+            name (str): Worker name, for statistics and logging.
+            priority (Priority): Admission priority.
+            timeout (float): Seconds to wait for a slot. None waits forever.
+
+        Yields:
+            bool: True if the slot was granted, False if the wait timed out.
+        """
+        seq = self._acquire(name, priority, timeout)
+        try:
+            yield seq is not None
+        finally:
+            if seq is not None:
+                self._release(seq)
+
+    def _acquire(self, name, priority, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            seq = next(self._seq)
+            entry = [int(priority), seq, name]
+            heapq.heappush(self._waiting, entry)
+            while not (len(self._active) < self.max_concurrent and self._waiting[0] is entry):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._rejected += 1
+                    self._cond.notify_all()
+                    logger.debug(f"{name} - compute slot wait timed out ({Priority(priority).name})")
+                    return None
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._active[seq] = (name, priority, time.monotonic())
+            self._admitted += 1
+            # The next waiter may also fit
+            self._cond.notify_all()
+            return seq
+
+    def _release(self, seq):
+        with self._cond:
+            _, _, start = self._active.pop(seq)
+            self._busy_s += time.monotonic() - start
+            self._cond.notify_all()
+        self._report()
+
+    # =========================================================
+    #  Statistics
+    # =========================================================
+    def stats(self, reset: bool = False) -> dict:
+        """
+        Return a snapshot of the budget.
+
+        Args:
+            reset (bool): Start a new utilisation window after reading.
+
+        Returns:
+            dict: queue_depth, active, slots, threads_per_worker, workers, admitted,
+                rejected and utilisation (busy slot-seconds / available slot-seconds).
+        """
+        with self._cond:
+            now = time.monotonic()
+            busy = self._busy_s + sum(now - start for _, _, start in self._active.values())
+            elapsed = max(now - self._window_start, 1e-9)
+            stats = {
+                "queue_depth": len(self._waiting),
+                "active": len(self._active),
+                "slots": self.max_concurrent,
+                "threads_per_worker": self.threads_per_worker,
+                "workers": len(self._workers),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "utilisation": min(busy / (elapsed * self.max_concurrent), 1.0),
+            }
+            if reset:
+                # Carry the in-progress time of active slots into the new window
+                self._busy_s = -sum(now - start for _, _, start in self._active.values())
+                self._admitted = self._rejected = 0
+                self._window_start = now
+            return stats
+
+    def _report(self) -> Optional[dict]:
+        """
+        Log the statistics of the window once it is report_interval old, and start a new one.
+
+        A saturated budget (timed-out waits, or slots busy nearly all the time) is logged as a
+        warning, since detection is then falling behind the cameras; otherwise at debug level.
+
+        Returns:
+            dict or None: The statistics reported, or None if the window is not over yet.
+        """
+        with self._cond:
+            if time.monotonic() - self._window_start < self.report_interval:
+                return None
+            stats = self.stats(reset=True)
+        if stats["rejected"] or stats["utilisation"] >= 0.95:
+            logger.warning(f"Compute budget saturated: {stats}")
+        else:
+            logger.debug(f"Compute budget: {stats}")
+        return stats
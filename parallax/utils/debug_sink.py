@@ -0,0 +1,162 @@
+"""
+DebugImageSink: Asynchronous writer for debug images.
+
+Detection code hands images to the sink instead of calling cv2.imwrite on the hot path.
+A bounded queue feeds a single background writer thread; when the queue is full or the
+configured rate is exceeded the image is dropped rather than blocking the caller.
+
+Files are named ``{camera}_{stage}_{timestamp_ms}_{tag}.jpg`` so a directory listing
+sorts by camera, then stage, then time.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from parallax.config.config_path import debug_img_dir, img_processing_config_file
+
+# Set logger name
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class DebugImageSink:
+    """Bounded, drop-on-saturation background writer for debug images."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, out_dir=debug_img_dir, jpeg_quality=90, max_rate=20.0, queue_size=64):
+        """
+        Initialize the sink.
+
+        Args:
+            out_dir (Path): Directory the images are written to.
+            jpeg_quality (int): JPEG quality (0-100).
+            max_rate (float): Maximum images accepted per second. None or 0 disables the limit.
+            queue_size (int): Maximum number of images waiting to be written.
+        """
+        self.out_dir = Path(out_dir)
+        self.jpeg_quality = int(jpeg_quality)
+        self.max_rate = max_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._writer = None
+
+        # Token bucket for the rate limit
+        self._tokens = float(max_rate) if max_rate else 0.0
+        self._last_refill = time.monotonic()
+
+        self.written = 0
+        self.dropped = 0
+
+    @classmethod
+    def instance(cls) -> "DebugImageSink":
+        """Return the shared sink configured from the image processing config."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**cls._load_config())
+            return cls._instance
+
+    @staticmethod
+    def _load_config(config_path=img_processing_config_file) -> dict:
+        """Read the 'DebugImageSink' section of the image processing config."""
+        try:
+            with open(config_path, "r") as f:
+                config = json.load(f).get("DebugImageSink", {})
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not load config file {config_path}: {e}")
+            config = {}
+        keys = ("jpeg_quality", "max_rate", "queue_size")
+        return {k: config[k] for k in keys if k in config}
+
+    @staticmethod
+    def filename(camera, stage=None, ts=None, tag="") -> str:
+        """Build the indexable file name for a debug image."""
+        ts = time.time() if ts is None else ts
+        name = f"{camera or 'cam'}_{stage or 'nostage'}_{int(round(float(ts) * 1000)):013d}"
+        if tag:
+            name += f"_{tag}"
+        return f"{name}.jpg"
+
+    def save(self, img: np.ndarray, camera=None, stage=None, ts: Optional[float] = None, tag: str = "") -> bool:
+        """
+        Queue an image for writing.
+
+        Args:
+            img (np.ndarray): Image to save. It is copied, so callers may keep mutating it.
+            camera (str): Camera serial number.
+            stage (str): Stage serial number, if known.
+            ts (float): Image timestamp in seconds. Defaults to now.
+            tag (str): Free-form suffix describing the image.
+
+        Returns:
+            bool: True if queued, False if dropped.
+        """
+        if img is None or not self._take_token():
+            self.dropped += 1
+            return False
+
+        path = self.out_dir / self.filename(camera, stage, ts, tag)
+        try:
+            self._queue.put_nowait((path, img.copy()))
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        self._ensure_writer()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued image has been written. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _take_token(self) -> bool:
+        """Consume one token of the rate limit, refilling by elapsed time."""
+        if not self.max_rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._last_refill) * self.max_rate)
+            self._last_refill = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _ensure_writer(self):
+        """Start the writer thread on first use."""
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, daemon=True, name="DebugImageSink")
+                self._writer.start()
+
+    def _run(self):
+        """Writer loop."""
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        while True:
+            path, img = self._queue.get()
+            try:
+                if not cv2.imwrite(str(path), img, params):
+                    logger.warning(f"Failed to write debug image {path}")
+                self.written += 1
+            except Exception as e:
+                logger.error(f"Error writing debug image {path}: {e}")
+            finally:
+                self._queue.task_done()
@@ -1,5 +1,6 @@
 import numpy as np
 from scipy.optimize import leastsq
+from scipy.spatial.transform import Rotation
 
 from parallax.utils.rotations import combine_angles
 
@@ -69,29 +70,131 @@ def _avg_error(x, measured_pts, global_pts, reflect_z=False):
     return average_l2_error
 
 
-def fit_params(measured_pts, global_pts):
+class RigidFitStats:
+    """
+    Running sums for the closed-form fit of local = scale * R @ global + t.
+
+    Adding a point updates the sums in constant time, and solve() recovers the best
+    transform from them with one 3x3 SVD (Kabsch, or Umeyama with scale). The sums are
+    taken relative to the first point, so large stage coordinates do not cancel out.
+    """
+
+    def __init__(self):
+        """Initialize empty sums."""
+        self.n = 0
+        self._ref_local, self._ref_global = None, None
+        self._sum_local = np.zeros(3)
+        self._sum_global = np.zeros(3)
+        self._sum_cross = np.zeros((3, 3))  # sum of local @ global.T
+        self._sum_sq_local = 0.0
+        self._sum_sq_global = 0.0
+
+    @classmethod
+    def from_points(cls, measured_pts, global_pts) -> "RigidFitStats":
+        """
+        Sums of a set of point pairs.
+
+        Args:
+            measured_pts (numpy.ndarray): The measured points (local coordinates), 3xN.
+            global_pts (numpy.ndarray): The global points, 3xN.
+        """
+        stats = cls()
+        measured_pts, global_pts = np.asarray(measured_pts, float), np.asarray(global_pts, float)
+        if measured_pts.shape[1] == 0:
+            return stats
+        stats._ref_local, stats._ref_global = measured_pts[:, 0].copy(), global_pts[:, 0].copy()
+        local = measured_pts - stats._ref_local[:, None]
+        glob = global_pts - stats._ref_global[:, None]
+        stats.n = measured_pts.shape[1]
+        stats._sum_local = local.sum(axis=1)
+        stats._sum_global = glob.sum(axis=1)
+        stats._sum_cross = local @ glob.T
+        stats._sum_sq_local = float(np.sum(local**2))
+        stats._sum_sq_global = float(np.sum(glob**2))
+        return stats
+
+    def add(self, local_pt, global_pt):
+        """Add one point pair: local (stage) and global coordinates, each of length 3."""
+        local_pt, global_pt = np.asarray(local_pt, float).ravel(), np.asarray(global_pt, float).ravel()
+        if self._ref_local is None:
+            self._ref_local, self._ref_global = local_pt.copy(), global_pt.copy()
+        local, glob = local_pt - self._ref_local, global_pt - self._ref_global
+        self.n += 1
+        self._sum_local += local
+        self._sum_global += glob
+        self._sum_cross += np.outer(local, glob)
+        self._sum_sq_local += float(local @ local)
+        self._sum_sq_global += float(glob @ glob)
+
+    def solve(self, with_scale=False):
+        """
+        Best transform for the points added so far.
+
+        Args:
+            with_scale (bool): Fit a uniform scale as well (Umeyama). Otherwise the scale is 1.
+                fit_params does not use it; the stage and reticle share units.
+
+        Returns:
+            tuple: (origin, R, scale, rms_error). origin is t, R is 3x3, and rms_error is the
+                root-mean-square distance between the measured and transformed points. It is
+                computed from the sums, so errors far below the spread of the points lose precision.
+
+        Raises:
+            ValueError: If fewer than three points were added.
+        """
+        if self.n < 3:
+            raise ValueError("At least three points are required for optimization (N >= 3).")
+        mean_local, mean_global = self._sum_local / self.n, self._sum_global / self.n
+        cov = self._sum_cross / self.n - np.outer(mean_local, mean_global)
+        var_local = self._sum_sq_local / self.n - mean_local @ mean_local
+        var_global = self._sum_sq_global / self.n - mean_global @ mean_global
+
+        U, D, Vt = np.linalg.svd(cov)
+        S = np.ones(3)
+        if np.linalg.det(U) * np.linalg.det(Vt) < 0:
+            S[2] = -1.0
+        R = U @ np.diag(S) @ Vt
+        trace = float(D @ S)
+        scale = trace / var_global if with_scale and var_global > 0 else 1.0
+
+        mean_local, mean_global = mean_local + self._ref_local, mean_global + self._ref_global
+        origin = mean_local - scale * R @ mean_global
+        rms_error = np.sqrt(max(0.0, var_local - 2 * scale * trace + scale**2 * var_global))
+        return origin, R, scale, float(rms_error)
+
+
+def _params_from_transform(R, origin):
+    """Parameter vector of _func (angles, translation) for a rotation and translation."""
+    return np.concatenate([Rotation.from_matrix(R).as_euler("xyz")[::-1], origin])
+
+
+def fit_params(measured_pts, global_pts, stats=None, polish=False):
     """
     local = R @ global + t, where local shape and global shape are 3xN.
-    Fits the transformation parameters (angles, translation) to minimize the error
-    between measured points and global points using least squares optimization.
+    Fits the rotation and translation that minimize the squared error between the measured
+    points and the transformed global points, in closed form (Kabsch).
     Args:
         measured_pts (numpy.ndarray): The measured points (local coordinates). rows vector (3, N)
         global_pts (numpy.ndarray): The global points (target coordinates). rows vector (3, N)
+        stats (RigidFitStats, optional): Running sums of the same points. Saves recomputing them.
+        polish (bool, optional): Refine the closed-form result with least squares over Euler angles.
     Returns:
         tuple: A tuple containing the translation vector (origin), rotation matrix (R), and the average error (avg_err).
+            avg_err is always the mean L2 error over the given points, O(N); stats only save refitting R and t.
     """
-    x0 = np.array([0, 0, 0, 0, 0, 0])
     N_points = measured_pts.shape[1]
     if N_points < 3:
         raise ValueError("At least three points are required for optimization (N >= 3).")
 
-    # Optimize without reflection
-    res = leastsq(_func, x0, args=(measured_pts, global_pts, False), maxfev=5000)
-    avg_error = _avg_error(res[0], measured_pts, global_pts, False)
+    if stats is None:
+        stats = RigidFitStats.from_points(measured_pts, global_pts)
+    origin, R, _, _ = stats.solve()
+    x = _params_from_transform(R, origin)
 
-    # Select the transformation with the smaller total error
-    rez = res[0]
-    R = combine_angles(rez[2], rez[1], rez[0]).astype(float)
-    origin = rez[3:6].astype(float)
+    if polish:
+        x = leastsq(_func, x, args=(measured_pts, global_pts, False), maxfev=5000)[0]
+        R = combine_angles(x[2], x[1], x[0]).astype(float)
+        origin = x[3:6].astype(float)
+    avg_error = _avg_error(x, measured_pts, global_pts, False)
 
     return origin, R, avg_error  # translation vector, rotation matrix, and scaling factors
@@ -7,7 +7,9 @@ Classes:
     UtilsCrops: Utility methods for calculating and validating crop regions.
 """
 
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
 
 
 class UtilsCoords:
@@ -142,3 +144,37 @@ class UtilsCrops:
             or (left - buffer <= x <= left + buffer)
             or (right - buffer <= x <= right + buffer)
         )
+
+    @staticmethod
+    def crop(img: Optional[np.ndarray], region: Optional[Tuple[int, int, int, int]]) -> Optional[np.ndarray]:
+        """
+        Crop an image to a region, passing None images and regions through.
+
+        Args:
+            img (np.ndarray or None): Image to crop.
+            region (Tuple[int, int, int, int] or None): Region as (top, bottom, left, right).
+
+        Returns:
+            np.ndarray or None: View of the cropped image, the image itself if region is None,
+                or None if img is None.
+        """
+        if img is None or region is None:
+            return img
+        top, bottom, left, right = region
+        return img[top:bottom, left:right]
+
+    @staticmethod
+    def covers(region: Tuple[int, int, int, int], inner: Tuple[int, int, int, int]) -> bool:
+        """
+        Check whether a crop region fully contains another one.
+
+        Args:
+            region (Tuple[int, int, int, int]): Outer region as (top, bottom, left, right).
+            inner (Tuple[int, int, int, int]): Inner region as (top, bottom, left, right).
+
+        Returns:
+            bool: True if inner lies within region.
+        """
+        top, bottom, left, right = region
+        inner_top, inner_bottom, inner_left, inner_right = inner
+        return top <= inner_top and bottom >= inner_bottom and left <= inner_left and right >= inner_right
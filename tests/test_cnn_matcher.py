@@ -0,0 +1,129 @@
+import os
+import textwrap
+import time
+
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.base_manager import DetectionResult
+from parallax.reticle_detection.cnn_matcher import CNNReticleMatcher
+
+FEATURE = """
+import argparse, os, pathlib, time
+parser = argparse.ArgumentParser()
+parser.add_argument("--image_dir"); parser.add_argument("--query"); parser.add_argument("--export_dir")
+args = parser.parse_args()
+assert (pathlib.Path(args.image_dir) / args.query).exists()
+pathlib.Path(args.export_dir).mkdir(parents=True, exist_ok=True)
+time.sleep(float(os.environ.get("FAKE_SFM_DELAY", "0")))
+with open(os.environ["FAKE_SFM_LOG"], "a") as f:
+    f.write(f"feature {os.getpid()}\\n")
+"""
+
+MATCH = """
+import os, sys
+with open(os.environ["FAKE_SFM_LOG"], "a") as f:
+    f.write(f"match {os.getpid()}\\n")
+if os.environ.get("FAKE_SFM_FAIL"):
+    sys.exit(1)
+"""
+
+LOCALIZE = """
+import os
+with open(os.environ["FAKE_SFM_LOG"], "a") as f:
+    f.write(f"localize {os.getpid()}\\n")
+print("0 0 0 1 10 20 30")
+"""
+
+
+@pytest.fixture
+def matcher(tmp_path, monkeypatch):
+    """Matcher whose worker imports a stand-in sfm package implementing the CLI contract."""
+    package = tmp_path / "sfm"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for name, source in (("cli_feature.py", FEATURE), ("cli_match.py", MATCH), ("cli_localize.py", LOCALIZE)):
+        (package / name).write_text(textwrap.dedent(source))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("FAKE_SFM_LOG", str(tmp_path / "log.txt"))
+
+    matcher = CNNReticleMatcher()
+    yield matcher
+    matcher.shutdown()
+
+
+def read_log(tmp_path):
+    return [line.split() for line in (tmp_path / "log.txt").read_text().splitlines()]
+
+
+def frame():
+    return np.full((300, 400, 3), 128, np.uint8)
+
+
+def test_steps_run_in_one_persistent_process(matcher, tmp_path):
+    matcher.start().result(timeout=60)
+    for name in ("camA", "camB"):
+        result, rvecs, tvecs = matcher.submit(frame(), name).result(timeout=60)
+        assert result == DetectionResult.SUCCESS
+        np.testing.assert_allclose(rvecs.ravel(), 0.0, atol=1e-9)
+        np.testing.assert_allclose(tvecs.ravel(), [10, 20, 30])
+
+    log = read_log(tmp_path)
+    assert [step for step, _ in log] == ["feature", "match", "localize"] * 2
+    pids = {pid for _, pid in log}
+    assert len(pids) == 1 and pids != {str(os.getpid())}
+
+
+def test_failed_step_reports_failure(matcher, monkeypatch):
+    monkeypatch.setenv("FAKE_SFM_FAIL", "1")
+    result, rvecs, tvecs = matcher.submit(frame(), "cam").result(timeout=60)
+    assert result == DetectionResult.FAILED
+    assert rvecs is None and tvecs is None
+
+
+def test_cancel_stops_before_next_step(matcher, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_SFM_DELAY", "1.0")
+    matcher.start().result(timeout=60)
+    job = matcher.submit(frame(), "cam")
+    time.sleep(0.5)  # Inside the feature step
+    job.cancel()
+    result, _, _ = job.result(timeout=60)
+    assert result == DetectionResult.STOPPED
+    assert [step for step, _ in read_log(tmp_path)] == ["feature"]
+
+
+def test_broken_worker_is_replaced_on_submit(matcher, caplog):
+    matcher.start().result(timeout=60)
+    executor = matcher._executor
+    for process in list(executor._processes.values()):
+        process.kill()
+    deadline = time.monotonic() + 30
+    while not executor._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert executor._broken
+
+    with caplog.at_level("WARNING", logger="parallax.reticle_detection.cnn_matcher"):
+        job = matcher.submit(frame(), "cam")
+    assert "worker process broke" in caplog.text
+    result, _, tvecs = job.result(timeout=60)
+    assert result == DetectionResult.SUCCESS
+    np.testing.assert_allclose(tvecs.ravel(), [10, 20, 30])
+    assert matcher._executor is not executor
+
+
+def test_failed_warmup_is_logged(tmp_path, monkeypatch, caplog):
+    package = tmp_path / "sfm"
+    package.mkdir()
+    (package / "__init__.py").write_text("raise ImportError('no models')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    matcher = CNNReticleMatcher()
+    try:
+        with caplog.at_level("WARNING", logger="parallax.reticle_detection.cnn_matcher"):
+            future = matcher.start()
+            assert future.exception(timeout=60) is not None
+            deadline = time.monotonic() + 5
+            while "failed to start" not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert "SuperPoint + LightGlue worker failed to start" in caplog.text
+    finally:
+        matcher.shutdown()
@@ -0,0 +1,88 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.coarse_axes import detect_coarse_axes
+from parallax.reticle_detection.mask_generator import MaskGenerator
+
+TEST_IMAGE = os.path.join(
+    os.path.dirname(__file__), "test_data", "probe_detect_manager", "cam0-02232024151631-37.jpg"
+)
+
+
+def axes_frame(angle=3.0, probe=True, size=(4000, 3000)):
+    """RGB frame of two perpendicular ticked axes, optionally crossed by a diagonal probe."""
+    img = np.full((size[1], size[0]), 200, np.uint8)
+    center = np.array([size[0] / 2, size[1] / 2])
+    for a in (angle, angle + 90):
+        d = np.array([np.cos(np.radians(a)), np.sin(np.radians(a))])
+        n = np.array([-d[1], d[0]])
+        cv2.line(img, tuple((center - 1300 * d).astype(int)), tuple((center + 1300 * d).astype(int)), 60, 6)
+        for i in range(-22, 23):
+            q = center + i * 55 * d
+            cv2.line(img, tuple((q - 40 * n).astype(int)), tuple((q + 40 * n).astype(int)), 60, 9)
+    if probe:
+        cv2.line(img, (3900, 100), (2600, 1300), 40, 14)
+    noise = np.random.default_rng(0).normal(0, 6, img.shape)
+    return cv2.cvtColor((img + noise).clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB)
+
+
+def segment_angle(segment):
+    """Direction of a segment in degrees, in [0, 180)."""
+    (x0, y0), (x1, y1) = segment
+    return np.degrees(np.arctan2(y1 - y0, x1 - x0)) % 180
+
+
+def angle_difference(a, b):
+    return min(abs(a - b) % 180, 180 - abs(a - b) % 180)
+
+
+@pytest.mark.parametrize("angle", [3.0, 20.0, -35.0])
+def test_axes_of_synthetic_reticle(angle):
+    axes = detect_coarse_axes(axes_frame(angle))
+    assert axes.shape == (2, 2, 2)
+    found = sorted(segment_angle(s) for s in axes)
+    expected = sorted([angle % 180, (angle + 90) % 180])
+    for a, b in zip(found, expected):
+        assert angle_difference(a, b) <= 1.0
+
+    # Segment ends near the ends of the 2600 px long axes, in full-frame pixels
+    lengths = np.linalg.norm(axes[:, 1] - axes[:, 0], axis=1)
+    np.testing.assert_allclose(lengths, 2600, rtol=0.05)
+    for segment in axes:
+        midpoint = segment.mean(axis=0)
+        np.testing.assert_allclose(midpoint, (2000, 1500), atol=60)
+
+
+def test_probe_is_not_taken_as_an_axis():
+    axes = detect_coarse_axes(axes_frame(3.0, probe=True))
+    for segment in axes:
+        assert min(angle_difference(segment_angle(segment), a) for a in (3.0, 93.0)) <= 1.0
+
+
+def test_axes_of_camera_frame():
+    frame = cv2.cvtColor(cv2.imread(TEST_IMAGE), cv2.COLOR_BGR2RGB)
+    axes = detect_coarse_axes(frame, MaskGenerator(initial_detect=True))
+    assert axes is not None
+    angles = [segment_angle(s) for s in axes]
+    assert min(angle_difference(a, 0) for a in angles) <= 20
+    assert min(angle_difference(a, 90) for a in angles) <= 20
+
+    # The axes cross near the reticle centre, not on the probe
+    (p0, p1), (q0, q1) = axes
+    a = np.array([p1 - p0, q0 - q1]).T
+    s, _ = np.linalg.solve(a, q0 - p0)
+    np.testing.assert_allclose(p0 + s * (p1 - p0), (2200, 1425), atol=100)
+
+
+def test_no_axes_in_blank_frame():
+    frame = np.random.default_rng(0).normal(150, 4, (3000, 4000)).clip(0, 255).astype(np.uint8)
+    assert detect_coarse_axes(cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)) is None
+
+
+def test_single_line_has_no_perpendicular_axis():
+    img = np.full((3000, 4000), 200, np.uint8)
+    cv2.line(img, (500, 1500), (3500, 1550), 60, 6)
+    assert detect_coarse_axes(cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)) is None
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from parallax.utils.compute_budget import ComputeBudget, Priority
+
+
+@pytest.fixture
+def budget():
+    return ComputeBudget(n_cores=4, threads_per_worker=2)
+
+
+def test_slots_from_core_count(budget):
+    assert budget.max_concurrent == 2
+    assert ComputeBudget(n_cores=1, threads_per_worker=4).max_concurrent == 1
+
+
+def test_instance_is_shared():
+    assert ComputeBudget.instance() is ComputeBudget.instance()
+
+
+def test_priority_for_selected_stage_and_camera(budget):
+    budget.set_selected(stage_sn="SN1", camera_sns=["CAM1"])
+    assert budget.priority_for(camera_sn="CAM2", stage_sn="SN1") == Priority.SELECTED
+    assert budget.priority_for(camera_sn="CAM1") == Priority.SELECTED
+    assert budget.priority_for(camera_sn="CAM2", stage_sn="SN2") == Priority.DETECTION
+    assert budget.priority_for(camera_sn="CAM2", default=Priority.RETICLE) == Priority.RETICLE
+    # Updating the stage keeps the camera selection
+    budget.set_selected(stage_sn=None)
+    assert budget.priority_for(camera_sn="CAM1") == Priority.SELECTED
+
+
+def test_slot_times_out_when_full():
+    budget = ComputeBudget(n_cores=1, threads_per_worker=1)
+    with budget.slot("a") as admitted:
+        assert admitted
+        with budget.slot("b", timeout=0.01) as admitted_b:
+            assert not admitted_b
+    stats = budget.stats()
+    assert stats["admitted"] == 1
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["active"] == 0
+
+
+def test_waiters_are_served_by_priority():
+    budget = ComputeBudget(n_cores=1, threads_per_worker=1)
+    order = []
+    release = threading.Event()
+
+    def holder():
+        with budget.slot("holder"):
+            release.wait(2.0)
+
+    def waiter(name, priority):
+        with budget.slot(name, priority):
+            order.append(name)
+
+    t0 = threading.Thread(target=holder)
+    t0.start()
+    while budget.stats()["active"] == 0:
+        time.sleep(0.001)
+
+    threads = []
+    arrivals = [("display", Priority.DISPLAY), ("reticle", Priority.RETICLE), ("selected", Priority.SELECTED)]
+    for name, priority in arrivals:
+        t = threading.Thread(target=waiter, args=(name, priority))
+        t.start()
+        threads.append(t)
+        while budget.stats()["queue_depth"] < len(threads):
+            time.sleep(0.001)
+
+    release.set()
+    for t in [t0] + threads:
+        t.join(2.0)
+    assert order == ["selected", "reticle", "display"]
+
+
+def test_utilisation_and_workers(budget):
+    budget.register("cam1-opencv")
+    budget.register("cam1-yolo_global")
+    budget.unregister("cam1-yolo_global")
+    budget.stats(reset=True)
+    with budget.slot("cam1"):
+        time.sleep(0.05)
+    stats = budget.stats(reset=True)
+    assert stats["workers"] == 1
+    assert 0.0 < stats["utilisation"] <= 1.0
+    assert budget.stats()["admitted"] == 0
+
+
+def test_report_logs_saturated_window(caplog):
+    budget = ComputeBudget(n_cores=1, threads_per_worker=1, report_interval=0.0)
+    with caplog.at_level("WARNING", logger="parallax.utils.compute_budget"):
+        with budget.slot("a"):
+            with budget.slot("b", timeout=0.01):
+                pass
+    assert "Compute budget saturated" in caplog.text
+    assert "'rejected': 1" in caplog.text
+    assert budget.stats()["rejected"] == 0  # The release started a new window
+
+
+def test_report_waits_for_interval(budget):
+    with budget.slot("a"):
+        pass
+    assert budget._report() is None
+    assert budget.stats()["admitted"] == 1
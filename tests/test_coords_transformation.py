@@ -1,7 +1,25 @@
 import numpy as np
 import pytest
+from scipy.optimize import leastsq
+from scipy.spatial.transform import Rotation
 
-from parallax.utils.transforms import fit_params
+from parallax.utils.rotations import combine_angles
+from parallax.utils.transforms import RigidFitStats, _avg_error, _func, fit_params
+
+
+def noisy_points(angles=(2.0, -3.0, 30.0), t=(7000.0, 6500.0, 8000.0), n=60, noise=5.0, seed=0):
+    """Nx3 (local, global) pairs with local = R @ global + t plus noise, and the true R and t."""
+    rng = np.random.default_rng(seed)
+    R = Rotation.from_euler("xyz", angles, degrees=True).as_matrix()
+    global_pts = rng.uniform([-3000, -3000, 0], [3000, 3000, 2500], (n, 3))
+    local_pts = global_pts @ R.T + np.array(t) + rng.normal(0, noise, (n, 3))
+    return local_pts, global_pts, R, np.array(t)
+
+
+def leastsq_fit(measured_pts, global_pts):
+    """The previous solver: least squares over Euler angles from zero."""
+    x = leastsq(_func, np.zeros(6), args=(measured_pts, global_pts, False), maxfev=5000)[0]
+    return x[3:6], combine_angles(x[2], x[1], x[0]), _avg_error(x, measured_pts, global_pts, False)
 
 # --- Test for Optimization/Fit ---
 
@@ -46,3 +64,67 @@ def test_fit_params_insufficient_data():
     # Transpose to 3xN (result is 3x2) to match expected input format
     with pytest.raises(ValueError, match="At least three points are required"):
         fit_params(measured_pts.T, global_pts.T)
+
+
+@pytest.mark.parametrize("angles", [(0.0, 0.0, 0.0), (2.0, -3.0, 30.0), (-10.0, 5.0, -60.0)])
+def test_fit_params_agrees_with_leastsq(angles):
+    local_pts, global_pts, _, _ = noisy_points(angles)
+    origin, R, avg_err = fit_params(local_pts.T, global_pts.T)
+    origin_ls, R_ls, avg_err_ls = leastsq_fit(local_pts.T, global_pts.T)
+    np.testing.assert_allclose(R, R_ls, atol=1e-6)
+    np.testing.assert_allclose(origin, origin_ls, atol=1e-3)
+    assert avg_err == pytest.approx(avg_err_ls, rel=1e-5)
+
+    def sum_squares(origin, R):
+        return np.sum((local_pts - global_pts @ R.T - origin) ** 2)
+
+    assert sum_squares(origin, R) <= sum_squares(origin_ls, R_ls) * (1 + 1e-12)
+
+
+def test_fit_params_polish_keeps_the_optimum():
+    local_pts, global_pts, _, _ = noisy_points()
+    origin, R, avg_err = fit_params(local_pts.T, global_pts.T)
+    origin_p, R_p, avg_err_p = fit_params(local_pts.T, global_pts.T, polish=True)
+    np.testing.assert_allclose(R_p, R, atol=1e-6)
+    np.testing.assert_allclose(origin_p, origin, atol=1e-3)
+    assert avg_err_p == pytest.approx(avg_err, rel=1e-6)
+
+
+def test_running_stats_match_batch_fit():
+    local_pts, global_pts, R_true, t_true = noisy_points(n=200)
+    stats = RigidFitStats()
+    for i, (local_pt, global_pt) in enumerate(zip(local_pts, global_pts)):
+        stats.add(local_pt, global_pt)
+        if i + 1 in (3, 10, 200):
+            batch = RigidFitStats.from_points(local_pts[: i + 1].T, global_pts[: i + 1].T).solve()
+            for value, expected in zip(stats.solve(), batch):
+                np.testing.assert_allclose(value, expected, rtol=1e-9, atol=1e-6)
+
+    origin, R, scale, rms = stats.solve()
+    np.testing.assert_allclose(R, R_true, atol=1e-3)
+    np.testing.assert_allclose(origin, t_true, atol=5.0)
+    assert scale == 1.0
+    residuals = local_pts - (global_pts @ R.T + origin)
+    assert rms == pytest.approx(np.sqrt(np.mean(np.sum(residuals**2, axis=1))), rel=1e-6)
+
+    origin_s, R_s, avg_err = fit_params(local_pts.T, global_pts.T, stats=stats)
+    np.testing.assert_allclose(R_s, R, atol=1e-12)
+    assert avg_err == pytest.approx(np.mean(np.linalg.norm(residuals, axis=1)))
+
+
+def test_running_stats_with_scale():
+    _, global_pts, R_true, t_true = noisy_points(noise=0.0)
+    local_pts = 1.02 * global_pts @ R_true.T + t_true
+    origin, R, scale, rms = RigidFitStats.from_points(local_pts.T, global_pts.T).solve(with_scale=True)
+    assert scale == pytest.approx(1.02, rel=1e-9)
+    np.testing.assert_allclose(R, R_true, atol=1e-9)
+    np.testing.assert_allclose(origin, t_true, atol=1e-6)
+    assert rms < 1e-3  # Closed-form residual, limited by cancellation
+
+
+def test_running_stats_need_three_points():
+    stats = RigidFitStats()
+    stats.add([1, 2, 3], [0, 0, 0])
+    stats.add([4, 5, 6], [3, 3, 3])
+    with pytest.raises(ValueError, match="At least three points are required"):
+        stats.solve()
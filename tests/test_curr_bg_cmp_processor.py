@@ -1,6 +1,7 @@
 import os
 
 import cv2
+import numpy as np
 import pytest
 
 from parallax.probe_detection.opencv.curr_bg_cmp_processor import CurrBgCmpProcessor
@@ -91,3 +92,45 @@ def test_update_cmp(setup_curr_bg_cmp_processor, sample_images):
             break
 
     assert isinstance(ret, bool), "update_cmp should return a boolean."
+
+
+def test_background_model_learns_outside_probe(setup_curr_bg_cmp_processor):
+    """The running background keeps the probe line as foreground and absorbs changes elsewhere."""
+    processor = setup_curr_bg_cmp_processor
+    height, width = IMG_SIZE[1], IMG_SIZE[0]
+    old_scene = np.zeros((height, width), np.uint8)
+    old_scene[100:110, :] = 255  # a background edge that fades out
+    processor._create_bg(old_scene)
+
+    new_scene = np.zeros((height, width), np.uint8)
+    new_scene[300:310, :] = 255  # a background edge that appears
+    probe_line = np.zeros((height, width), np.uint8)
+    cv2.line(probe_line, (500, 200), (500, 400), 255, thickness=10)
+
+    processor.curr_img = new_scene
+    processor._accumulate_bg(probe_line)
+    assert processor.bg[305, 100] == 255, "A single frame does not change the background"
+
+    for _ in range(5):
+        processor._accumulate_bg(probe_line)
+    assert processor.bg[305, 100] == 0, "Persistent change is learned as background"
+    assert processor.bg[105, 100] == 255, "Faded edge is dropped from the background"
+    assert processor.bg[305, 500] == 255, "Probe line stays foreground"
+    assert processor.bg_model[305, 500] == 0, "Probe line keeps its history"
+
+
+def test_background_model_update_limited_to_roi(setup_curr_bg_cmp_processor):
+    processor = setup_curr_bg_cmp_processor
+    height, width = IMG_SIZE[1], IMG_SIZE[0]
+    processor._create_bg(np.zeros((height, width), np.uint8))
+    bg_before = processor.bg.copy()
+
+    processor.curr_img = np.full((height, width), 255, np.uint8)
+    processor.roi = (100, 200, 100, 300)
+    for _ in range(5):
+        processor._accumulate_bg(None)
+
+    assert (processor.bg[100:200, 100:300] == 0).all()
+    outside = np.ones((height, width), bool)
+    outside[100:200, 100:300] = False
+    np.testing.assert_array_equal(processor.bg[outside], bg_before[outside])
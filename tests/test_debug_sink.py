@@ -0,0 +1,53 @@
+import json
+
+import cv2
+import numpy as np
+
+from parallax.utils.debug_sink import DebugImageSink
+
+
+def test_filename_sorts_by_camera_stage_and_time():
+    assert DebugImageSink.filename("CAM1", "SN1", 1.5, "hough") == "CAM1_SN1_0000000001500_hough.jpg"
+    assert DebugImageSink.filename("CAM1", None, 2.0) == "CAM1_nostage_0000000002000.jpg"
+    names = [DebugImageSink.filename("CAM1", "SN1", ts) for ts in (10.0, 9.0, 100.0)]
+    assert sorted(names) == [names[1], names[0], names[2]]
+
+
+def test_save_writes_in_background(tmp_path):
+    sink = DebugImageSink(out_dir=tmp_path, jpeg_quality=80, max_rate=None)
+    img = np.full((20, 30, 3), 128, dtype=np.uint8)
+    assert sink.save(img, camera="CAM1", stage="SN1", ts=1.0, tag="tip")
+    img[:] = 0  # caller keeps using its buffer
+    assert sink.flush(timeout=5.0)
+
+    path = tmp_path / "CAM1_SN1_0000000001000_tip.jpg"
+    saved = cv2.imread(str(path))
+    assert saved is not None
+    assert saved.shape == (20, 30, 3)
+    assert abs(int(saved.mean()) - 128) <= 2
+    assert sink.written == 1
+
+
+def test_rate_limit_drops_instead_of_blocking(tmp_path):
+    sink = DebugImageSink(out_dir=tmp_path, max_rate=2)
+    img = np.zeros((4, 4), dtype=np.uint8)
+    results = [sink.save(img, camera="CAM1", ts=float(i)) for i in range(5)]
+    assert results.count(True) == 2
+    assert sink.dropped == 3
+    sink.flush(timeout=5.0)
+
+
+def test_full_queue_drops(tmp_path):
+    sink = DebugImageSink(out_dir=tmp_path, max_rate=None, queue_size=1)
+    sink._ensure_writer = lambda: None  # keep the writer stopped so the queue stays full
+    img = np.zeros((4, 4), dtype=np.uint8)
+    assert sink.save(img, camera="CAM1", ts=1.0)
+    assert not sink.save(img, camera="CAM1", ts=2.0)
+    assert sink.dropped == 1
+
+
+def test_load_config(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"DebugImageSink": {"jpeg_quality": 70, "max_rate": 5, "other": 1}}))
+    assert DebugImageSink._load_config(config_file) == {"jpeg_quality": 70, "max_rate": 5}
+    assert DebugImageSink._load_config(tmp_path / "missing.json") == {}
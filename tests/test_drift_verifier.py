@@ -0,0 +1,153 @@
+import cv2
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.drift_verifier import ReticleDriftTracker, ReticleDriftVerifier
+
+
+def reticle_coords(shift=(0.0, 0.0), centre=(400, 300)):
+    """X- and Y-axis tick coordinates of the scene reticle."""
+    cx, cy = centre[0] + shift[0], centre[1] + shift[1]
+    x = np.stack([cx + 28.0 * np.arange(-8, 9), np.full(17, cy)], axis=1)
+    y = np.stack([np.full(13, cx), cy + 22.0 * np.arange(-6, 7)], axis=1)
+    return x, y
+
+
+def scene(shift=(0, 0), seed=0, size=(800, 600)):
+    """RGB frame with a reticle cross and ticks on a textured background, plus sensor noise."""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(np.random.default_rng(100).normal(170, 25, (size[1], size[0])), (0, 0), 6)
+    img = background.copy()
+    x, y = reticle_coords()
+    (x0, y0), (x1, _) = x[0], x[-1]
+    (_, ya), (_, yb) = y[0], y[-1]
+    cv2.line(img, (int(x0), int(y0)), (int(x1), int(y0)), 40, 3)
+    cv2.line(img, (int(x0 + 8 * 28), int(ya)), (int(x0 + 8 * 28), int(yb)), 40, 3)
+    for px, py in x:
+        cv2.line(img, (int(px), int(py) - 10), (int(px), int(py) + 10), 40, 2)
+    for px, py in y:
+        cv2.line(img, (int(px) - 10, int(py)), (int(px) + 10, int(py)), 40, 2)
+    matrix = np.float32([[1, 0, shift[0]], [0, 1, shift[1]]])
+    img = cv2.warpAffine(img, matrix, size, borderMode=cv2.BORDER_REFLECT)
+    img = img + rng.normal(0, 3, img.shape)
+    return cv2.cvtColor(img.clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB)
+
+
+@pytest.mark.parametrize("shift", [(0, 0), (5, -3), (-12.5, 7.25), (20, 20)])
+def test_tracker_measures_shift(shift):
+    tracker = ReticleDriftTracker()
+    assert tracker.set_reference(scene(seed=0), *reticle_coords())
+    assert len(tracker.patches) == 5
+
+    measured = tracker.measure(scene(shift=shift, seed=1))
+    np.testing.assert_allclose(measured, shift, atol=0.5)
+
+
+def test_tracker_reports_nothing_without_reticle():
+    tracker = ReticleDriftTracker()
+    assert tracker.set_reference(scene(), *reticle_coords())
+    assert tracker.measure(np.full((600, 800, 3), 128, np.uint8)) is None
+
+
+def test_tracker_rejects_reticle_at_frame_edge():
+    tracker = ReticleDriftTracker()
+    x, y = reticle_coords(centre=(20, 20))
+    assert not tracker.set_reference(scene(), x, y)
+    assert tracker.patches == []
+
+
+def make_verifier(**kwargs):
+    verifier = ReticleDriftVerifier("cam1", interval=0.0, tolerance=3.0, confirmations=2, **kwargs)
+    events = []
+    verifier.drift_detected.connect(lambda name, dx, dy: events.append((name, dx, dy)))
+    return verifier, events
+
+
+def test_verifier_is_idle_until_coords_are_set():
+    verifier, events = make_verifier()
+    assert verifier.process(scene(shift=(30, 0))) is None
+    assert not verifier.active and events == []
+
+
+def test_verifier_tolerates_small_drift():
+    verifier, events = make_verifier()
+    verifier.set_coords(*reticle_coords())
+    verifier.process(scene(seed=0))  # Reference
+    assert verifier.active
+
+    for seed in range(1, 5):
+        shift = verifier.process(scene(shift=(2, -1), seed=seed))
+        np.testing.assert_allclose(shift, (2, -1), atol=0.5)
+    assert events == []
+    assert verifier.active
+
+
+def test_verifier_reports_confirmed_drift_once():
+    verifier, events = make_verifier()
+    verifier.set_coords(*reticle_coords())
+    verifier.process(scene(seed=0))
+
+    verifier.process(scene(shift=(10, 4), seed=1))
+    assert events == []  # One check beyond tolerance is not enough
+    verifier.process(scene(shift=(10, 4), seed=2))
+    assert len(events) == 1
+    name, dx, dy = events[0]
+    assert name == "cam1"
+    assert dx == pytest.approx(10, abs=0.5) and dy == pytest.approx(4, abs=0.5)
+
+    assert not verifier.active  # Waits for the next detection
+    verifier.process(scene(shift=(10, 4), seed=3))
+    assert len(events) == 1
+
+
+def test_verifier_checks_at_most_once_per_interval():
+    verifier, events = make_verifier()
+    verifier.interval = 60.0
+    verifier.set_coords(*reticle_coords())
+    verifier.process(scene(seed=0))
+    assert verifier.process(scene(shift=(10, 0), seed=1)) is None
+
+
+def test_verifier_is_due_for_reference_and_after_interval():
+    verifier, _ = make_verifier()
+    assert not verifier.due()
+    verifier.set_coords(*reticle_coords())
+    assert verifier.due()
+    verifier.process(scene(seed=0))
+    assert verifier.due()  # interval=0.0
+    verifier.interval = 60.0
+    assert not verifier.due()
+
+
+def draw_axis_overlays(frame, x_coords, y_coords):
+    """Markers the screen's axis filter draws into the displayed frame, on the calibrated points."""
+    points = np.rint(np.vstack([x_coords, y_coords])).astype(int)
+    for x, y in points:
+        cv2.circle(frame, (int(x), int(y)), 4, (255, 0, 0), -1)
+    for x, y in (points[0], points[-1]):
+        cv2.circle(frame, (int(x), int(y)), 12, (0, 255, 0), -1)
+
+
+def test_verifier_reads_frame_copy_taken_before_overlays():
+    verifier, events = make_verifier()
+    coords = reticle_coords()
+    verifier.set_coords(*coords)
+    clean = ReticleDriftTracker()
+    clean.set_reference(scene(seed=0), *coords)
+
+    # Same order as ScreenWidget._set_data: copy for the verifier, then the filters draw
+    for seed, shift in enumerate([(0, 0), (10, 4), (10, 4)]):
+        frame = scene(shift=shift, seed=seed)
+        copy = frame.copy() if verifier.due() else None
+        draw_axis_overlays(frame, *coords)
+        assert not np.array_equal(copy, frame)
+        verifier.process(copy)
+        if seed == 0:
+            assert len(verifier.tracker.patches) == len(clean.patches)
+            for (origin, patch), (clean_origin, clean_patch) in zip(verifier.tracker.patches, clean.patches):
+                assert origin == clean_origin
+                np.testing.assert_array_equal(patch, clean_patch)
+
+    assert len(events) == 1
+    _, dx, dy = events[0]
+    assert dx == pytest.approx(10, abs=0.5) and dy == pytest.approx(4, abs=0.5)
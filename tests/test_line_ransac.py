@@ -0,0 +1,98 @@
+import warnings
+
+import numpy as np
+import pytest
+from skimage.measure import LineModelND, ransac
+
+from parallax.reticle_detection.line_ransac import best_line_pair, detect_line_pair, line_distances, line_hypotheses
+
+
+def reticle_points(angle=3.0, n_noise=40, seed=0):
+    """Tick centroids along two perpendicular axes, with missing ticks and clutter."""
+    rng = np.random.default_rng(seed)
+    center = np.array([2000.0, 1500.0])
+    points = []
+    for a in (angle, angle + 90):
+        direction = np.array([np.cos(np.radians(a)), np.sin(np.radians(a))])
+        for i in range(-40, 41):
+            if rng.random() > 0.1:
+                points.append(center + i * 55 * direction + rng.normal(0, 1.0, 2))
+    points += list(rng.uniform([500, 300], [3500, 2700], (n_noise, 2)))
+    return np.array(points)
+
+
+def line_angles(lines):
+    return sorted(np.degrees(np.arctan2(line.direction[1], line.direction[0])) % 180 for line in lines)
+
+
+def sequential_ransac(points, max_trials=500):
+    """Reference: one skimage RANSAC per line, removing the inliers between rounds."""
+    lines = []
+    for _ in range(2):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model, inliers = ransac(
+                points, LineModelND, min_samples=9, residual_threshold=5, max_trials=max_trials, rng=0
+            )
+        lines.append(model)
+        points = points[model.residuals(points) >= 7.0]
+    return lines
+
+
+@pytest.mark.parametrize("angle", [-10.0, 3.0, 25.0, 44.0])
+def test_finds_both_axes(angle):
+    points = reticle_points(angle=angle, n_noise=80)
+    lines, line_points = detect_line_pair(points)
+
+    assert len(lines) == 2
+    expected = sorted([angle % 180, (angle + 90) % 180])
+    np.testing.assert_allclose(line_angles(lines), expected, atol=0.2)
+    assert all(len(p) >= 60 for p in line_points)
+    # The axes share at most the centre tick
+    shared = {tuple(p) for p in line_points[0]} & {tuple(p) for p in line_points[1]}
+    assert not shared
+
+
+def test_seeded_result_is_reproducible():
+    points = reticle_points(n_noise=100, seed=3)
+    lines_a, points_a = detect_line_pair(points, seed=7)
+    lines_b, points_b = detect_line_pair(points, seed=7)
+    for line_a, line_b in zip(lines_a, lines_b):
+        np.testing.assert_array_equal(line_a.origin, line_b.origin)
+        np.testing.assert_array_equal(line_a.direction, line_b.direction)
+    for pa, pb in zip(points_a, points_b):
+        np.testing.assert_array_equal(pa, pb)
+
+    # Another seed picks other hypotheses but converges to the same axes
+    lines_c, _ = detect_line_pair(points, seed=8)
+    np.testing.assert_allclose(line_angles(lines_c), line_angles(lines_a), atol=0.05)
+
+
+def test_matches_sequential_skimage_ransac():
+    points = reticle_points(n_noise=80)
+    lines, _ = detect_line_pair(points)
+    np.testing.assert_allclose(line_angles(lines), line_angles(sequential_ransac(points)), atol=0.5)
+
+
+def test_no_pair_without_two_lines():
+    rng = np.random.default_rng(0)
+    single = np.stack([np.arange(50) * 30.0, np.full(50, 100.0)], axis=1)
+    clutter = rng.uniform(0, 3000, (30, 2))
+    lines, line_points = detect_line_pair(np.vstack([single, clutter]))
+    assert len(lines) == len(line_points) < 2
+    assert detect_line_pair(np.zeros((1, 2))) == ([], [])
+
+
+def test_hypotheses_scored_against_all_points():
+    points = reticle_points()
+    origins, normals = line_hypotheses(points, 100, np.random.default_rng(0))
+    distances = line_distances(points, origins, normals)
+    assert distances.shape == (len(origins), len(points))
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0)
+    # Both sampled points lie on their own hypothesis line
+    assert np.all(distances.min(axis=1) < 1e-6)
+
+    inliers = np.zeros((3, 60), dtype=bool)
+    inliers[0, :30] = inliers[1, 35:] = inliers[2, :40] = True
+    # Row 0 has nothing that row 2 does not; rows 2 and 1 cover every point
+    assert best_line_pair(inliers, min_inliers=20) == (2, 1)
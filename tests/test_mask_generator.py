@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.mask_generator import MaskGenerator
+
+IMG_SIZE = (1000, 750)
+
+
+@pytest.fixture
+def frame():
+    img = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151631-37.jpg", cv2.IMREAD_GRAYSCALE)
+    assert img is not None
+    return cv2.resize(img, IMG_SIZE)
+
+
+def uncached(img):
+    generator = MaskGenerator()
+    generator.process(img)  # load config
+    generator.invalidate_cache()
+    return generator._generate(img)
+
+
+def test_steady_state_reuses_mask(frame):
+    generator = MaskGenerator()
+    first = generator.process(frame)
+    assert first is not None
+
+    rng = np.random.default_rng(0)
+    noisy = cv2.add(frame, rng.integers(0, 3, frame.shape, dtype=np.uint8))
+    second = generator.process(noisy)
+
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(second, uncached(frame))
+    assert (generator.cache_hits, generator.cache_misses) == (1, 1)
+
+    second[:] = 0  # callers get their own copy
+    np.testing.assert_array_equal(generator.process(frame), first)
+
+
+def test_drift_triggers_recompute(frame):
+    generator = MaskGenerator()
+    generator.process(frame)
+    shifted = np.roll(frame, 200, axis=1)
+    mask = generator.process(shifted)
+    assert generator.cache_misses == 2
+    np.testing.assert_array_equal(mask, uncached(shifted))
+
+
+def test_cache_per_resolution_and_age(frame):
+    generator = MaskGenerator()
+    generator.process(frame)
+    generator.config["cache"]["max_age_frames"] = 2
+    small = cv2.resize(frame, (500, 375))
+    assert generator.process(small).shape == (375, 500)
+    assert generator.cache_misses == 2
+
+    for _ in range(3):
+        generator.process(frame)
+    assert (generator.cache_hits, generator.cache_misses) == (2, 3)
+
+
+def test_cached_mask_written_into_dst(frame):
+    generator = MaskGenerator()
+    dst = np.empty(frame.shape, np.uint8)
+    assert generator.process(frame, dst=dst) is dst
+    expected = dst.copy()
+    dst[:] = 0
+    assert generator.process(frame, dst=dst) is dst
+    np.testing.assert_array_equal(dst, expected)
+
+
+def test_cache_can_be_disabled(frame):
+    generator = MaskGenerator()
+    generator.process(frame)
+    generator.config["cache"]["enable"] = False
+    generator.process(frame)
+    assert generator.cache_hits == 0
+
+
+def reference_homomorphic(img, gamma_high=1.5, gamma_low=0.5, c=1, d0=30):
+    """Full complex-FFT homomorphic filter the real-FFT version replaces."""
+    img_log = np.log1p(np.array(img, dtype="float"))
+    rows, cols = img_log.shape
+    center_x, center_y = rows // 2, cols // 2
+    y, x = np.ogrid[:rows, :cols]
+    highpass = 1 - np.exp(-c * ((x - center_x) ** 2 + (y - center_y) ** 2) / (2 * d0**2))
+    img_fft = np.fft.fftshift(np.fft.fft2(img_log)) * highpass
+    img_hp = np.exp(np.real(np.fft.ifft2(np.fft.ifftshift(img_fft)))) - 1
+    img_hp = cv2.normalize(img_hp, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    img_gamma = np.array(255 * (img_hp / 255) ** gamma_high, dtype="uint8")
+    return np.array(255 * (img_gamma / 255) ** gamma_low, dtype="uint8")
+
+
+@pytest.mark.parametrize("name", ["processed_image_debug_reticle1.png", "processed_image_debug_reticle2.png"])
+@pytest.mark.parametrize("size", [(120, 90), (401, 299), (1000, 750)])
+def test_homomorphic_filter_matches_complex_fft(name, size):
+    img = cv2.imread(f"tests/test_data/mask_generator/reticle/{name}", cv2.IMREAD_GRAYSCALE)
+    assert img is not None
+    img = cv2.resize(img, size)
+
+    generator = MaskGenerator(initial_detect=True)
+    generator.config = {}
+    generator.img = img
+    generator._homomorphic_filter()
+
+    diff = np.abs(generator.img.astype(int) - reference_homomorphic(img))
+    assert diff.max() <= 1
+    assert np.mean(diff) < 0.01
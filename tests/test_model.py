@@ -211,3 +211,13 @@ def test_pos_x_helpers(model):
 
     model.reset_pos_x()
     assert model.get_pos_x(sn) is None
+
+
+def test_probe_detect_multi_probe_helpers(model):
+    sn = "camA"
+    assert model.get_probe_detect_multi_probe(sn) is False
+
+    model.session.cameras = {sn: MagicMock(probe_detect_multi_probe=False)}
+    model.set_probe_detect_multi_probe(sn, True)
+    assert model.get_probe_detect_multi_probe(sn) is True
+    model.set_probe_detect_multi_probe("unknown", True)  # Ignored
@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+import pytest
+
+from parallax.probe_detection.opencv.multi_probe_tracker import MultiProbeTracker, cluster_segments
+from parallax.probe_detection.opencv.probe_detector import ProbeDetector
+
+IMG_SIZE = (1000, 750)
+
+
+@pytest.fixture
+def tracker():
+    return MultiProbeTracker("MockCam", IMG_SIZE)
+
+
+def locked_detector(sn, tip, base):
+    detector = ProbeDetector(sn, "MockCam", IMG_SIZE, (4000, 3000))
+    detector.probe_tip, detector.probe_base = tip, base
+    segment = np.array([[tip[0], tip[1], base[0], base[1]]])
+    detector.angle = detector._represent_gradients(segment)[0]
+    detector.probe_tip_direction = detector._get_probe_direction(tip, base)
+    return detector
+
+
+def diff_image(*lines):
+    img = np.zeros((IMG_SIZE[1], IMG_SIZE[0]), np.uint8)
+    for tip, base in lines:
+        cv2.line(img, tip, base, 255, 5)
+    return img
+
+
+def test_cluster_segments_groups_lines():
+    segments = np.array(
+        [
+            [100, 100, 200, 300],  # probe 1, two pieces on one line
+            [205, 310, 250, 400],
+            [112, 100, 212, 300],  # a parallel shank of probe 1
+            [600, 100, 500, 300],  # probe 2, other angle
+            [400, 100, 500, 300],  # parallel to probe 1 but far away
+        ]
+    )
+    groups = cluster_segments(segments, angle_tol=10, dist_tol=30)
+    assert [sorted(g.tolist()) for g in groups] == [[0, 1, 2], [3], [4]]
+    assert cluster_segments(np.zeros((0, 4), int)) == []
+
+
+def test_assign_by_predicted_position(tracker):
+    lines = [((600, 100), (500, 300), 116.6), ((100, 100), (200, 300), 63.4)]
+    predictions = {
+        "SN_A": (np.array([205.0, 305.0]), np.array([105.0, 105.0])),
+        "SN_B": (np.array([495.0, 300.0]), np.array([595.0, 100.0])),
+        "SN_C": (np.array([900.0, 700.0]), np.array([800.0, 500.0])),  # nothing near it
+    }
+    assert tracker.assign(lines, predictions) == {"SN_A": 1, "SN_B": 0}
+    assert tracker.assign([], predictions) == {}
+
+
+def test_update_moves_every_probe(tracker):
+    detectors = {
+        "SN_A": locked_detector("SN_A", (500, 370), (630, 160)),
+        "SN_B": locked_detector("SN_B", (400, 430), (320, 170)),
+    }
+    diff = diff_image(((510, 376), (640, 166)), ((395, 434), (315, 174)))
+
+    found = tracker.update(diff, detectors)
+    assert sorted(found) == ["SN_A", "SN_B"]
+    assert np.hypot(*np.subtract(detectors["SN_A"].probe_tip, (510, 376))) <= 5
+    assert np.hypot(*np.subtract(detectors["SN_B"].probe_tip, (395, 434))) <= 5
+    # Tip and base are not swapped, and the original coordinates follow
+    assert detectors["SN_A"].probe_base[1] < detectors["SN_A"].probe_tip[1]
+    assert detectors["SN_A"].probe_tip_org is not None
+
+    # The next prediction continues the motion
+    tip, _ = tracker.predict("SN_A", detectors["SN_A"])
+    assert tip[0] > detectors["SN_A"].probe_tip[0]
+
+
+def test_update_leaves_missing_probe(tracker):
+    detectors = {
+        "SN_A": locked_detector("SN_A", (500, 370), (630, 160)),
+        "SN_B": locked_detector("SN_B", (400, 430), (320, 170)),
+    }
+    found = tracker.update(diff_image(((505, 372), (635, 162))), detectors)
+    assert found == ["SN_A"]
+    assert detectors["SN_B"].probe_tip == (400, 430)
+
+
+def test_region_covers_all_probes(tracker):
+    detectors = {
+        "SN_A": locked_detector("SN_A", (500, 370), (630, 160)),
+        "SN_B": locked_detector("SN_B", (400, 430), (320, 170)),
+    }
+    assert tracker.region(detectors, margin=50) == (110, 480, 270, 680)
@@ -0,0 +1,172 @@
+import cv2
+import numpy as np
+import pytest
+
+from parallax.probe_detection.opencv_process_worker import OpenCVProcessWorker
+
+RESOLUTION = (4000, 3000)
+
+
+@pytest.fixture
+def frame():
+    img = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151631-37.jpg")
+    assert img is not None
+    return img
+
+
+@pytest.fixture
+def worker():
+    w = OpenCVProcessWorker("MockCam", RESOLUTION)
+    w.update_sn("SN1234")
+    return w
+
+
+def prepare(worker, frame):
+    worker.frame = frame
+    worker._prepare_current_image()
+    return worker.curr_img, worker.mask
+
+
+def test_prepared_image_matches_unbuffered(worker, frame):
+    curr, mask = prepare(worker, frame)
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    expected = cv2.GaussianBlur(cv2.resize(gray, worker.IMG_SIZE), (3, 3), 0)
+    np.testing.assert_array_equal(curr, expected)
+    np.testing.assert_array_equal(worker.gray_img, gray)
+
+    np.testing.assert_array_equal(mask, worker.mask_detect.process(expected))
+
+
+def test_buffers_reused_across_frames(worker, frame):
+    curr, mask = prepare(worker, frame)
+    assert mask is worker._buffers["mask"]
+    buffers = dict(worker._buffers)
+
+    for _ in range(3):
+        prepare(worker, frame)
+    assert all(worker._buffers[name] is buf for name, buf in buffers.items())
+    assert worker.curr_img is curr  # prev_img not set, so the same buffer is reused
+
+
+def test_previous_image_is_not_overwritten(worker, frame):
+    prev, _ = prepare(worker, frame)
+    worker.prev_img = prev
+    snapshot = prev.copy()
+
+    curr, _ = prepare(worker, np.zeros_like(frame))
+    assert not np.shares_memory(curr, worker.prev_img)
+    np.testing.assert_array_equal(worker.prev_img, snapshot)
+    assert not curr.any()
+
+
+def test_buffers_reallocated_on_resolution_change(worker, frame):
+    prepare(worker, frame)
+    gray = worker._buffers["gray0"]
+
+    small = cv2.resize(frame, (2000, 1500))
+    prepare(worker, small)
+    prepare(worker, small)
+    assert worker._buffers["gray0"] is not gray
+    assert worker.gray_img.shape == (1500, 2000)
+    assert worker.curr_img.shape == (750, 1000)
+
+
+def moving_probe_frames(background, n=12):
+    """Frames of a dark probe line moving a few pixels per frame over a real background."""
+    for k in range(n):
+        img = background.copy()
+        cv2.line(img, (2600 + 12 * k, 400 + 8 * k), (2000 + 12 * k, 1400 + 8 * k), (20, 20, 20), 24)
+        yield img
+
+
+def track(worker, frames, use_roi):
+    worker.running = True
+    worker.probe_stopped = False
+    results, regions = [], []
+    for img in frames:
+        if not use_roi:
+            worker.tracking_roi.reset()
+        worker.frame = img
+        worker._prepare_current_image()
+        if worker.prev_img is None:
+            worker.prev_img = worker.curr_img
+            continue
+        if worker.probeDetect.angle is None:
+            worker._run_first_cmp()
+            continue
+        regions.append(worker.tracking_roi.region())
+        results.append((worker._run_tracking_cmp(), worker.probeDetect.probe_tip))
+    return results, regions
+
+
+def test_roi_tracking_matches_full_frame():
+    background = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151540-0.jpg")
+    roi_worker = OpenCVProcessWorker("MockCam", RESOLUTION)
+    roi_worker.update_sn("SN1234")
+    full_worker = OpenCVProcessWorker("MockCam", RESOLUTION)
+    full_worker.update_sn("SN1234")
+
+    roi_results, regions = track(roi_worker, moving_probe_frames(background), use_roi=True)
+    full_results, _ = track(full_worker, moving_probe_frames(background), use_roi=False)
+
+    assert sum(found for found, _ in roi_results) >= len(roi_results) - 1
+    assert roi_results == full_results
+    assert all(region is not None for region in regions)
+
+
+def test_roi_reset_on_probe_switch(worker):
+    worker.tracking_roi.lock((500, 400), (600, 200))
+    worker.update_sn("SN1234")
+    assert worker.tracking_roi.is_locked
+    worker.update_sn("SN5678")
+    assert not worker.tracking_roi.is_locked
+
+
+def two_probe_frame(background, k, only=None):
+    """Frame k of two dark probe lines moving in different directions."""
+    probes = {"SN_A": ((2600, 400), (2000, 1400), (12, 8)), "SN_B": ((1300, 700), (1600, 1700), (-10, 6))}
+    img = background.copy()
+    truth = {}
+    for sn, (base, tip, (dx, dy)) in probes.items():
+        truth[sn] = (tip[0] + dx * k, tip[1] + dy * k)
+        if only is None or sn == only:
+            cv2.line(img, (base[0] + dx * k, base[1] + dy * k), truth[sn], (20, 20, 20), 24)
+    return img, truth
+
+
+def test_multi_probe_tracks_all_locked_probes():
+    background = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151540-0.jpg")
+    found = []
+    worker = OpenCVProcessWorker(
+        "MockCam", RESOLUTION, callbacks={"on_tip_moving": lambda ts, sn, tip, base: found.append((sn, tip))}
+    )
+    worker.running = True
+    worker.frame = background
+    worker._prepare_current_image()
+    empty = worker.curr_img.copy()
+
+    # Each probe is first detected on its own, as when the stages are moved one at a time
+    for sn in ("SN_A", "SN_B"):
+        worker.update_sn(sn)
+        worker.prev_img = empty
+        worker.frame, _ = two_probe_frame(background, 0, only=sn)
+        worker._prepare_current_image()
+        assert worker._run_first_cmp()
+    assert sorted(worker._locked_detectors()) == ["SN_A", "SN_B"]
+
+    worker.set_multi_probe(True)
+    worker.probe_stopped = False
+    errors = {"SN_A": [], "SN_B": []}
+    for k in range(1, 12):
+        found.clear()
+        worker.frame, truth = two_probe_frame(background, k)
+        worker.process()
+        for sn, tip in found:
+            errors[sn].append(np.hypot(tip[0] - truth[sn][0], tip[1] - truth[sn][1]))
+
+    # The background is created on the first frame; after that both probes are found every frame
+    for sn in errors:
+        assert len(errors[sn]) >= 9
+        assert np.median(errors[sn]) < 20  # original-image pixels
+        assert max(errors[sn][1:]) < 60
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parallax.probe_calibration.point_store import COLUMNS, CalibrationPointStore, StagePoints
+from parallax.utils.rotations import make_homogeneous_transform
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CalibrationPointStore(tmp_path / "points.csv", flush_interval=60.0)
+    yield store
+    store.close(timeout=5)
+
+
+def test_stage_points_grow_and_keep_order():
+    stage = StagePoints(capacity=2)
+    text = {"ts_local_coords": "", "ts_img_captured": "", "cam0": "", "pt0": "", "cam1": "", "pt1": ""}
+    for i in range(9):
+        assert stage.append([i, 0, 0], [0, i, 0], {**text, "ts_local_coords": str(i)}, seq=i)
+    assert len(stage) == 9
+    np.testing.assert_array_equal(stage.local_pts[:, 0], np.arange(9))
+    np.testing.assert_array_equal(stage.global_pts[:, 1], np.arange(9))
+    assert list(stage.columns("SN1")["ts_local_coords"]) == [str(i) for i in range(9)]
+
+
+def test_duplicates_are_rejected(store):
+    assert store.add("SN1", [1, 2, 3], [10, 20, 30], ts_local_coords="t0", cam0="A", cam1="B")
+    assert not store.add("SN1", [1.5, 2, 3], [10, 20, 30], ts_local_coords="t0", cam0="A", cam1="B")
+    assert store.add("SN1", [1, 2, 3], [10, 20, 30], ts_local_coords="t1", cam0="A", cam1="B")
+    assert store.add("SN2", [1, 2, 3], [10, 20, 30], ts_local_coords="t0", cam0="A", cam1="B")
+    assert store.count("SN1") == 2 and store.count("SN2") == 1
+
+
+def test_expected_global_points_follow_the_transform(store):
+    local = np.array([[100.0, 200.0, 300.0], [-50.0, 0.0, 25.0]])
+    store.add("SN1", local[0], [0, 0, 0], ts_local_coords="t0")
+    store.add("SN1", local[1], [0, 0, 0], ts_local_coords="t1")
+    df = store.frame("SN1")
+    assert list(df.columns) == COLUMNS
+    assert df["global_x_exp"].isna().all()
+
+    # local = R @ global + t with R = I and t = (10, 20, 30)
+    store.set_transform("SN1", make_homogeneous_transform(np.eye(3), np.array([10.0, 20.0, 30.0])))
+    df = store.frame("SN1")
+    expected = local - [10, 20, 30]
+    np.testing.assert_allclose(df[["global_x_exp", "global_y_exp", "global_z_exp"]], expected)
+    np.testing.assert_allclose(df["l2_distance"], np.round(np.linalg.norm(expected, axis=1), 1))
+
+
+def test_csv_is_written_in_batches(store):
+    for i in range(50):
+        store.add("SN1" if i % 2 else "SN2", [i, 0, 0], [0, 0, i], ts_local_coords=str(i))
+    assert store.writes == 0  # Gathered for the flush interval
+    assert store.flush(timeout=5)
+    assert store.writes == 1
+
+    df = pd.read_csv(store.path)
+    assert list(df.columns) == COLUMNS and len(df) == 50
+    np.testing.assert_array_equal(df["local_x"], np.arange(50))  # Order of arrival across stages
+    assert list(df["sn"][:2]) == ["SN2", "SN1"]
+
+
+def test_removed_stage_leaves_the_file(store):
+    store.add("SN1", [1, 0, 0], [0, 0, 1], ts_local_coords="t0")
+    store.add("SN2", [2, 0, 0], [0, 0, 2], ts_local_coords="t0")
+    store.remove("SN1")
+    store.flush(timeout=5)
+    assert list(pd.read_csv(store.path)["sn"]) == ["SN2"]
+
+    store.remove()
+    store.flush(timeout=5)
+    df = pd.read_csv(store.path)
+    assert list(df.columns) == COLUMNS and df.empty
+
+
+def test_memory_only_store_never_writes(tmp_path):
+    store = CalibrationPointStore()
+    store.add("SN1", [1, 0, 0], [0, 0, 1])
+    assert store.flush(timeout=1)
+    assert store.writes == 0 and store.count("SN1") == 1
@@ -1,11 +1,16 @@
 import os
+from types import SimpleNamespace
 
+import numpy as np
 import pandas as pd
 import pytest
 from PyQt6.QtCore import QObject, pyqtSignal
+from scipy.spatial.transform import Rotation
 
+import parallax.probe_calibration.probe_calibration as probe_calibration_module
 from parallax.model import Model  # Replace with the actual class that represents the model
 from parallax.probe_calibration.probe_calibration import ProbeCalibration
+from parallax.session.session_state import Session, StageSession
 
 
 @pytest.fixture
@@ -68,3 +73,106 @@ def test_probe_calibration_update(probe_calibration, sample_csv_file, monkeypatc
         probe_calibration.update(row)
 
     assert len(calls) == len(df)
+
+
+def test_update_keeps_points_in_memory_and_writes_them(model, monkeypatch, tmp_path):
+    monkeypatch.setattr(probe_calibration_module, "stages_dir", tmp_path)
+    model.session = Session()
+    model.session.stages["SN1"] = StageSession()
+    model.reset_stage_calib_info("SN1")
+    calibration = ProbeCalibration(model)
+    completed = []
+    calibration.calib_complete.connect(lambda: completed.append(True))
+
+    # local = R @ global + t
+    R = Rotation.from_euler("xyz", [2, -3, 30], degrees=True).as_matrix()
+    t = np.array([7000.0, 6500.0, 8000.0])
+    rng = np.random.default_rng(0)
+    global_pts = np.round(rng.uniform([-2500, -2500, 0], [2500, 2500, 2000], (40, 3)))
+    local_pts = global_pts @ R.T + t
+    for i, (g, loc) in enumerate(zip(global_pts, local_pts)):
+        stage = SimpleNamespace(
+            sn="SN1",
+            stage_x=loc[0],
+            stage_y=loc[1],
+            stage_z=loc[2],
+            stage_x_global=g[0],
+            stage_y_global=g[1],
+            stage_z_global=g[2],
+        )
+        calibration.update(stage, {"ts_local_coords": str(i), "cam0": "A", "cam1": "B"})
+        calibration.update(stage, {"ts_local_coords": str(i), "cam0": "A", "cam1": "B"})  # Duplicate
+        if completed:
+            break
+
+    n = calibration.points.count("SN1")
+    assert completed and 6 < n <= 40
+    np.testing.assert_allclose(calibration.transM_LR[:3, :3], R, atol=1e-6)
+    np.testing.assert_allclose(calibration.transM_LR[:3, 3], t, atol=1e-3)
+
+    assert calibration.points.flush(timeout=5)
+    df = pd.read_csv(calibration.points_file)
+    assert len(df) == n
+    np.testing.assert_allclose(df[["global_x", "global_y", "global_z"]], global_pts[:n])
+    np.testing.assert_allclose(df[["global_x_exp", "global_y_exp", "global_z_exp"]], global_pts[:n], atol=0.1)
+    calibration.points.close(timeout=5)
+
+
+def test_clear_removes_points_file(model, monkeypatch, tmp_path):
+    monkeypatch.setattr(probe_calibration_module, "stages_dir", tmp_path)
+    model.session = Session()
+    model.session.stages["SN1"] = StageSession()
+    model.reset_stage_calib_info("SN1")
+    calibration = ProbeCalibration(model)
+
+    def stage(g):
+        return SimpleNamespace(
+            sn="SN1",
+            stage_x=g[0],
+            stage_y=g[1],
+            stage_z=g[2],
+            stage_x_global=g[0],
+            stage_y_global=g[1],
+            stage_z_global=g[2],
+        )
+
+    calibration.update(stage([100.0, 200.0, 300.0]), {"ts_local_coords": "0"})
+    assert calibration.points.flush(timeout=5)
+    assert calibration.points_file.exists()
+
+    calibration.clear()
+    assert not calibration.points_file.exists()
+
+    calibration.update(stage([400.0, 500.0, 600.0]), {"ts_local_coords": "1"})
+    assert calibration.points.flush(timeout=5)
+    df = pd.read_csv(calibration.points_file)
+    assert df[["global_x", "global_y", "global_z"]].values.tolist() == [[400.0, 500.0, 600.0]]
+    calibration.points.close(timeout=5)
+
+
+def test_flush_points_writes_the_trajectory_file(model, monkeypatch, tmp_path):
+    monkeypatch.setattr(probe_calibration_module, "stages_dir", tmp_path)
+    model.session = Session()
+    model.session.stages["SN1"] = StageSession()
+    model.reset_stage_calib_info("SN1")
+    calibration = ProbeCalibration(model)
+    calibration.points.flush_interval = 60.0  # The writer alone would not write within the test
+
+    global_pts = [[100.0, 200.0, 300.0], [900.0, 200.0, 300.0], [100.0, 800.0, 500.0]]
+    for i, g in enumerate(global_pts):
+        stage = SimpleNamespace(
+            sn="SN1",
+            stage_x=g[0],
+            stage_y=g[1],
+            stage_z=g[2],
+            stage_x_global=g[0],
+            stage_y_global=g[1],
+            stage_z_global=g[2],
+        )
+        calibration.update(stage, {"ts_local_coords": str(i)})
+    trajectory_file = model.get_stage_calib_info("SN1").trajectory_file
+
+    assert calibration.flush_points()
+    df = pd.read_csv(trajectory_file)
+    assert df[["global_x", "global_y", "global_z"]].values.tolist() == global_pts
+    calibration.points.close(timeout=5)
@@ -0,0 +1,179 @@
+import os
+from collections import Counter
+
+import cv2
+import numpy as np
+import pytest
+
+from parallax.probe_detection.opencv.probe_detector import ProbeDetector
+
+IMG_SIZE = (1000, 750)
+IMG_SIZE_ORIGINAL = (4000, 3000)
+BASE_DIR = "tests/test_data/probe_detect_manager"
+
+
+@pytest.fixture
+def detector():
+    return ProbeDetector("SN1234", "MockCam", IMG_SIZE, IMG_SIZE_ORIGINAL)
+
+
+def reference_scan(detector, line_segments, height, neighboring_gradients=None):
+    """Per-segment loop the vectorized post-processing replaces."""
+    gradients = []
+    max_y, min_y = 0, height
+    lowest_point, highest_point = (0, 0), (0, 0)
+    for line in line_segments:
+        x2, y2, x1, y1 = line[0]
+        gradient = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+        gradient += 180
+        gradient %= 180
+        representing_gradient = detector._find_represent_gradient(gradient)
+        if neighboring_gradients is not None and representing_gradient not in neighboring_gradients:
+            continue
+        gradients.append(representing_gradient)
+        if y1 > max_y:
+            max_y = y1
+            lowest_point = (x1, y1)
+        if y2 > max_y:
+            max_y = y2
+            lowest_point = (x2, y2)
+        if y1 < min_y:
+            min_y = y1
+            highest_point = (x1, y1)
+        if y2 <= min_y:
+            min_y = y2
+            highest_point = (x2, y2)
+    return gradients, highest_point, lowest_point
+
+
+def frame_segments():
+    """Hough segments of every test frame, from a few to thousands per frame."""
+    for filename in sorted(os.listdir(BASE_DIR)):
+        img = cv2.imread(os.path.join(BASE_DIR, filename), cv2.IMREAD_GRAYSCALE)
+        edges = cv2.Canny(cv2.resize(img, IMG_SIZE), 50, 150)
+        for threshold in (10, 100):
+            segments = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold, minLineLength=10, maxLineGap=5)
+            if segments is not None:
+                yield segments
+
+
+def vectorized(detector, line_segments, height, neighboring_gradients=None):
+    segments = line_segments.reshape(-1, 4)
+    gradients = detector._represent_gradients(segments)
+    if neighboring_gradients is not None:
+        keep = np.isin(gradients, neighboring_gradients)
+        segments, gradients = segments[keep], gradients[keep]
+    if len(segments) == 0:
+        return [], (0, 0), (0, 0)
+    highest_point, lowest_point = detector._segment_extremes(segments, height)
+    return list(gradients), highest_point, lowest_point
+
+
+def test_vectorized_matches_scan_on_frames(detector):
+    n_sets = 0
+    for segments in frame_segments():
+        for neighbors in (None, detector._find_neighboring_gradients(126)):
+            expected = reference_scan(detector, segments, IMG_SIZE[1], neighbors)
+            assert vectorized(detector, segments, IMG_SIZE[1], neighbors) == expected
+        n_sets += 1
+    assert n_sets > 0
+
+
+def test_extremes_tie_breaking(detector):
+    segments = np.array(
+        [
+            [[10, 5, 20, 40]],
+            [[30, 40, 40, 5]],
+            [[50, 5, 60, 5]],
+        ]
+    )
+    assert vectorized(detector, segments, 100) == reference_scan(detector, segments, 100)
+
+
+def test_most_common_prefers_earliest_on_ties(detector):
+    values = [27, 18, 18, 27, 9]
+    assert detector._most_common(values) == Counter(values).most_common(1)[0][0] == 27
+
+
+def test_vectorized_matches_on_noisy_frame(detector):
+    rng = np.random.default_rng(0)
+    segments = rng.integers(0, 750, size=(5000, 1, 4), dtype=np.int32)
+    assert vectorized(detector, segments, IMG_SIZE[1]) == reference_scan(detector, segments, IMG_SIZE[1])
+
+
+def line_image(noise=0.0):
+    """Binary image of one thick probe-like line with optional speckle noise."""
+    img = np.zeros((IMG_SIZE[1], IMG_SIZE[0]), dtype=np.uint8)
+    cv2.line(img, (300, 80), (620, 640), 255, 3)
+    if noise:
+        rng = np.random.default_rng(0)
+        img[rng.random(img.shape) < noise] = 255
+    return img
+
+
+def test_pyramid_hough_matches_single_level(detector):
+    detector.update_parameters({"pyramid_scale": 2})
+    img = line_image(noise=0.002)
+    full = cv2.HoughLinesP(img, 1, np.pi / 180, 100, minLineLength=150, maxLineGap=0)
+    pyramid = detector._hough_lines(img, 100, minLineLength=150, maxLineGap=0)
+    assert pyramid is not None
+    expected = detector._segment_extremes(full.reshape(-1, 4), img.shape[0])
+    actual = detector._segment_extremes(pyramid.reshape(-1, 4), img.shape[0])
+    for a, b in zip(actual, expected):
+        assert np.hypot(a[0] - b[0], a[1] - b[1]) <= 3
+
+
+def test_pyramid_hough_falls_back_to_single_pass(detector):
+    img = line_image()
+    full = cv2.HoughLinesP(img, 1, np.pi / 180, 50, minLineLength=50, maxLineGap=10)
+    detector.update_parameters({"pyramid_scale": 1})
+    np.testing.assert_array_equal(detector._hough_lines(img, 50, minLineLength=50, maxLineGap=10), full)
+    # Small crops are never downsampled
+    detector.update_parameters({"pyramid_scale": 2})
+    crop = img[100:250, 300:450].copy()
+    full = cv2.HoughLinesP(crop, 1, np.pi / 180, 50, minLineLength=50, maxLineGap=10)
+    np.testing.assert_array_equal(detector._hough_lines(crop, 50, minLineLength=50, maxLineGap=10), full)
+
+
+def diff_masks():
+    """Thresholded diff images of the stored frames against the first one, as the probe detection feeds to Hough."""
+    filenames = sorted(os.listdir(BASE_DIR))
+    background = cv2.resize(cv2.imread(os.path.join(BASE_DIR, filenames[0]), cv2.IMREAD_GRAYSCALE), IMG_SIZE)
+    for filename in filenames[1:]:
+        img = cv2.resize(cv2.imread(os.path.join(BASE_DIR, filename), cv2.IMREAD_GRAYSCALE), IMG_SIZE)
+        diff = cv2.subtract(background, img)
+        if diff.max() < 20:
+            continue
+        diff[diff < 0.5 * diff.max()] = 0
+        yield cv2.threshold(diff, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+@pytest.mark.parametrize("threshold, min_length", [(100, 150), (50, 50)])
+def test_default_hough_unchanged_on_frames(detector, threshold, min_length):
+    n_found = 0
+    for mask in diff_masks():
+        expected = cv2.HoughLinesP(mask, 1, np.pi / 180, threshold, minLineLength=min_length, maxLineGap=0)
+        actual = detector._hough_lines(mask, threshold, minLineLength=min_length, maxLineGap=0)
+        if expected is None:
+            assert actual is None
+            continue
+        assert len(actual) == len(expected)
+        np.testing.assert_array_equal(
+            detector._segment_extremes(actual.reshape(-1, 4), mask.shape[0]),
+            detector._segment_extremes(expected.reshape(-1, 4), mask.shape[0]),
+        )
+        n_found += 1
+    assert n_found > 0
+
+
+def test_contour_noise_removal_matches_per_contour_loop(detector):
+    img = line_image(noise=0.01)
+    img[200:203, 700:703] = 255  # a blob above the noise threshold survives
+    expected = img.copy()
+    contours, _ = cv2.findContours(expected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        if cv2.contourArea(contour) < 4:
+            cv2.drawContours(expected, [contour], -1, (0, 0, 0), -1)
+    result = detector._contour_preprocessing(img.copy(), thresh=20, remove_noise=True, noise_threshold=2)
+    np.testing.assert_array_equal(result, expected)
+    assert detector._contour_preprocessing(np.zeros_like(img), thresh=20) is None
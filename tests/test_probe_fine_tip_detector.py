@@ -60,3 +60,43 @@ def test_get_precise_tip(load_tip_image):
         atol=30,
         err_msg=f"Precise tip {precise_tip} is not close to the expected tip {expected_tip}",
     )
+
+
+def test_get_precise_tips_matches_single_tip():
+    """Batched refinement gives the same result as refining each window separately."""
+    img = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151631-37.jpg")
+    h, w = img.shape[:2]
+    rng = np.random.default_rng(0)
+    tips = np.stack([rng.integers(25, w - 25, 30), rng.integers(25, h - 25, 30)], axis=1)
+
+    points, ok = ProbeFineTipDetector.get_precise_tips(img, tips, crop_size=25)
+    assert points.shape == (30, 2)
+    assert ok.shape == (30,) and ok.dtype == bool
+
+    for k, (x, y) in enumerate(tips.tolist()):
+        window = img[y - 25 : y + 25, x - 25 : x + 25]
+        ret, tip = ProbeFineTipDetector.get_precise_tip(window, tip=(x, y), offset_x=x - 25, offset_y=y - 25)
+        assert ret == ok[k]
+        if ret:
+            np.testing.assert_allclose(points[k], tip)
+        else:
+            np.testing.assert_allclose(points[k], (x, y))
+
+
+def test_get_precise_tips_border_and_empty():
+    img = cv2.imread("tests/test_data/probe_detect_manager/cam0-02232024151631-37.jpg")
+    h, w = img.shape[:2]
+    windows, origins = ProbeFineTipDetector._gather_windows(img, np.array([[0, 0], [w - 1, h - 1]]), 25)
+    assert windows.shape == (2, 50, 50, 3)
+    np.testing.assert_array_equal(origins, [[0, 0], [w - 50, h - 50]])
+    np.testing.assert_array_equal(windows[1], img[h - 50 :, w - 50 :])
+
+    points, ok = ProbeFineTipDetector.get_precise_tips(img, np.empty((0, 2)))
+    assert points.shape == (0, 2) and ok.shape == (0,)
+
+
+def test_is_valid_batch_matches_contour_check():
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        img = (rng.random((12, 10)) > rng.random()).astype(np.uint8) * 255
+        assert ProbeFineTipDetector._is_valid_batch(img[None])[0] == ProbeFineTipDetector._is_valid(img)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from parallax.probe_detection.utils.probe_tip_tracker import ProbeTipTracker
+
+
+@pytest.fixture
+def tracker():
+    return ProbeTipTracker(movement_threshold=8.0, process_noise=5.0, measurement_noise=2.0, max_age=30.0)
+
+
+def test_new_track_is_not_moving(tracker):
+    tracker.update(1, (100.0, 200.0), ts=0.0)
+    assert 1 in tracker
+    assert len(tracker) == 1
+    np.testing.assert_allclose(tracker.position(1), (100.0, 200.0))
+    assert tracker.is_moving(1) is False
+
+
+def test_jitter_is_classified_as_stopped(tracker):
+    rng = np.random.default_rng(0)
+    errors = []
+    for i in range(20):
+        noise = rng.normal(0, 2.0, size=2)
+        tracker.update(1, (100.0 + noise[0], 200.0 + noise[1]), ts=float(i))
+        assert tracker.is_moving(1) is False
+        errors.append(np.linalg.norm(tracker.position(1) - (100.0, 200.0)))
+    # Smoothed position settles below the raw measurement noise
+    assert np.mean(errors[-10:]) < 2.0
+
+
+def test_jump_is_classified_as_moving(tracker):
+    for i in range(5):
+        tracker.update(1, (100.0, 200.0), ts=float(i))
+    tracker.update(1, (160.0, 200.0), ts=5.0)
+    assert tracker.is_moving(1) is True
+    # Stopped as soon as the tip is seen at the same place again
+    tracker.update(1, (160.0, 200.0), ts=6.0)
+    assert tracker.is_moving(1) is False
+
+
+@pytest.mark.parametrize("gap", [10.0, 45.0])
+def test_sparse_stop_to_stop_updates(gap):
+    """One update per stage stop: each is classified by how far the tip went since the last stop."""
+    tracker = ProbeTipTracker(movement_threshold=8.0, max_age=None)
+    tips = [0.0, 100.0, 100.0, 0.0, 0.0, 3.0]
+    moving = []
+    for i, x in enumerate(tips):
+        tracker.update(1, (x, 0.0), ts=gap * i)
+        moving.append(tracker.is_moving(1))
+    assert moving == [False, True, False, True, False, False]
+
+
+def test_constant_velocity_prediction(tracker):
+    for i in range(10):
+        tracker.update(7, (10.0 * i, 50.0), ts=0.1 * i)
+    np.testing.assert_allclose(tracker.velocity(7), (100.0, 0.0), atol=5.0)
+    xy, std = tracker.predict(7, ts=1.0)
+    np.testing.assert_allclose(xy, (100.0, 50.0), atol=2.0)
+    assert np.all(std > 0)
+
+
+def test_stale_tracks_dropped_and_rows_reused():
+    tracker = ProbeTipTracker(max_age=1.0, capacity=2)
+    tracker.update(1, (0.0, 0.0), ts=0.0)
+    tracker.update(2, (10.0, 10.0), ts=0.0)
+    tracker.update(3, (20.0, 20.0), ts=0.5)  # grows past capacity
+    assert len(tracker) == 3
+    tracker.update(3, (20.0, 20.0), ts=5.0)  # tracks 1 and 2 expire
+    assert 1 not in tracker and 2 not in tracker
+    assert len(tracker) == 1
+    tracker.reset()
+    assert len(tracker) == 0
@@ -53,3 +53,80 @@ def test_get_coords(reticle_detection, test_image):
     assert (
         processed_img.shape == IMG_SIZE
     ), f"Processed image shape mismatch: expected {IMG_SIZE}, got {processed_img.shape}"
+
+
+def tick_grid(n=10, pitch=60, size=25, bridge=3):
+    """Binary image of n x n square ticks joined by thin bridges into one blob."""
+    img = np.zeros((n * pitch + 100, n * pitch + 100), np.uint8)
+    for i in range(n):
+        for j in range(n):
+            x, y = 50 + j * pitch, 50 + i * pitch
+            cv2.rectangle(img, (x, y), (x + size, y + size), 255, -1)
+    for i in range(n):
+        c = 50 + i * pitch + size // 2
+        cv2.line(img, (50, c), (50 + (n - 1) * pitch, c), 255, bridge)
+        cv2.line(img, (c, 50), (c, 50 + (n - 1) * pitch), 255, bridge)
+    return img
+
+
+def iterative_eroding(img):
+    """Reference erosion loop: erode and open until the tick blobs are separated."""
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    for _ in range(100):
+        contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            break
+        if 50 < len(contours) < 300 and max(cv2.contourArea(c) for c in contours) < 30 * 30:
+            break
+        img = cv2.morphologyEx(cv2.erode(img, kernel), cv2.MORPH_OPEN, kernel)
+    return img
+
+
+def centroids(img):
+    contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    points = [cv2.moments(c) for c in contours]
+    return np.array(sorted((m["m10"] / m["m00"], m["m01"] / m["m00"]) for m in points if m["m00"]))
+
+
+@pytest.mark.parametrize("size, bridge", [(25, 3), (25, 7), (21, 11)])
+def test_eroding_matches_iterative_erosion(reticle_detection, size, bridge):
+    img = tick_grid(size=size, bridge=bridge)
+    expected = iterative_eroding(img.copy())
+    eroded = reticle_detection._eroding(img.copy(), lambda: True)
+
+    n_blobs, largest_area = reticle_detection._blob_stats(eroded)
+    assert reticle_detection._is_blob_target(n_blobs, largest_area)
+    assert n_blobs == reticle_detection._blob_stats(expected)[0]
+    np.testing.assert_allclose(centroids(eroded), centroids(expected), atol=1.0)
+
+
+def test_eroding_keeps_separated_or_empty_images(reticle_detection):
+    empty = np.zeros((200, 200), np.uint8)
+    assert reticle_detection._eroding(empty, lambda: True) is empty
+    ticks = iterative_eroding(tick_grid(bridge=1))
+    assert reticle_detection._eroding(ticks, lambda: True) is ticks
+
+
+def test_eroding_evaluates_few_levels(reticle_detection, monkeypatch):
+    img = tick_grid(n=12, pitch=130, size=101, bridge=31)  # needs ~40 rounds of erosion
+    calls = []
+    blob_stats = ReticleDetection._blob_stats
+    monkeypatch.setattr(ReticleDetection, "_blob_stats", staticmethod(lambda x: calls.append(1) or blob_stats(x)))
+
+    eroded = reticle_detection._eroding(img, lambda: True)
+    assert reticle_detection._is_blob_target(*blob_stats(eroded))
+    assert len(calls) < 20
+
+
+def test_ransac_detect_lines_is_deterministic(reticle_detection):
+    img = np.zeros((1200, 1200), np.uint8)
+    for i in range(-15, 16):
+        cv2.circle(img, (600 + 35 * i, 600 + i), 4, 255, -1)
+        cv2.circle(img, (600 - i, 600 + 35 * i), 4, 255, -1)
+
+    ret, lines, pixels = reticle_detection._ransac_detect_lines(img, lambda: True)
+    assert ret
+    assert sorted(len(p) for p in pixels) == [30, 31]
+    _, _, pixels_again = reticle_detection._ransac_detect_lines(img, lambda: True)
+    for p, q in zip(pixels, pixels_again):
+        np.testing.assert_array_equal(p, q)
@@ -0,0 +1,169 @@
+import logging
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.base_manager import DetectionResult
+from parallax.reticle_detection.detection_pool import ReticleDetectionPool, _worker_detector, detect_reticle_coords
+from parallax.reticle_detection.mask_generator import MaskGenerator
+from parallax.reticle_detection.reticle_detection import ReticleDetection
+from parallax.reticle_detection.reticle_detection_coords_interests import ReticleDetectCoordsInterest
+
+IMG_SIZE = (4000, 3000)
+
+
+def reticle_frame(angle=3.0, pitch=55, seed=0):
+    """RGB frame of two perpendicular reticle axes with tick marks."""
+    img = np.full((IMG_SIZE[1], IMG_SIZE[0]), 200, np.uint8)
+    center = np.array([2000.0, 1500.0])
+    for a in (angle, angle + 90):
+        d = np.array([np.cos(np.radians(a)), np.sin(np.radians(a))])
+        n = np.array([-d[1], d[0]])
+        cv2.line(img, tuple((center - 1300 * d).astype(int)), tuple((center + 1300 * d).astype(int)), 60, 4)
+        for i in range(-22, 23):
+            q = center + i * pitch * d
+            length = 40 if i % 5 else 70
+            cv2.line(img, tuple((q - length * n).astype(int)), tuple((q + length * n).astype(int)), 60, 9)
+    img = cv2.GaussianBlur(img, (5, 5), 0)
+    noise = np.random.default_rng(seed).normal(0, 6, img.shape)
+    return cv2.cvtColor((img + noise).clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB)
+
+
+def detect_in_thread(frame, **kwargs):
+    detector = ReticleDetection(IMG_SIZE, MaskGenerator(initial_detect=True), "cam")
+    return detect_reticle_coords(detector, ReticleDetectCoordsInterest(), frame, lambda: True, **kwargs)
+
+
+class SeedRecorder(ReticleDetection):
+    """ReticleDetection that records the RANSAC seed of every attempt."""
+
+    def __init__(self):
+        super().__init__(IMG_SIZE, MaskGenerator(initial_detect=True), "cam")
+        self.seeds = []
+
+    def get_coords_from_ticks(self, centroids, running_flag=lambda: True, seed=None):
+        self.seeds.append(seed)
+        return super().get_coords_from_ticks(centroids, running_flag, seed)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ReticleDetectionPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_matches_in_thread_detection(pool):
+    frames = [reticle_frame(3.0, 55, 0), reticle_frame(20.0, 50, 1)]
+    jobs = [pool.submit(frame, f"cam{i}", IMG_SIZE) for i, frame in enumerate(frames)]
+
+    for frame, job in zip(frames, jobs):
+        result, x_coords, y_coords, params = job.result(timeout=60)
+        expected, x_expected, y_expected, params_expected = detect_in_thread(frame)
+        assert result == expected == DetectionResult.SUCCESS
+        assert x_coords.dtype == np.float32 and x_coords.shape == (21, 2)
+        np.testing.assert_allclose(x_coords, x_expected, atol=1e-3)
+        np.testing.assert_allclose(y_coords, y_expected, atol=1e-3)
+        np.testing.assert_allclose(params.tvec, params_expected.tvec, rtol=1e-6)
+
+
+def test_shared_memory_released(pool):
+    job = pool.submit(reticle_frame(), "cam", IMG_SIZE)
+    name = job._shm.name
+    job.result(timeout=60)
+    assert job._shm is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_cancelled_job_stops(pool):
+    job = pool.submit(reticle_frame(), "cam", IMG_SIZE)
+    job.cancel()
+    result, x_coords, y_coords, params = job.result(timeout=60)
+    assert result == DetectionResult.STOPPED
+    assert x_coords is None and y_coords is None and params is None
+
+
+def test_failed_detection_returns_no_coords(pool):
+    blank = np.full((IMG_SIZE[1], IMG_SIZE[0], 3), 128, np.uint8)
+    result, x_coords, y_coords, params = pool.submit(blank, "cam", IMG_SIZE).result(timeout=60)
+    assert result == DetectionResult.FAILED
+    assert x_coords is None and y_coords is None and params is None
+
+
+def test_first_attempt_below_target_is_accepted(caplog):
+    caplog.set_level(logging.INFO, logger="parallax.reticle_detection.detection_pool")
+    detector = SeedRecorder()
+    result, x_coords, _, params = detect_reticle_coords(
+        detector, ReticleDetectCoordsInterest(), reticle_frame(), lambda: True, error_target=5.0
+    )
+    assert result == DetectionResult.SUCCESS
+    assert detector.seeds == [0]
+    assert x_coords.shape == (21, 2) and params.rvec is not None
+    assert "reticle attempt 1 (seed 0): reprojection error" in caplog.text
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_unreached_target_tries_every_seed_and_keeps_the_best(caplog, max_workers):
+    caplog.set_level(logging.INFO, logger="parallax.reticle_detection.detection_pool")
+    detector = SeedRecorder()
+    result, _, _, params = detect_reticle_coords(
+        detector,
+        ReticleDetectCoordsInterest(),
+        reticle_frame(),
+        lambda: True,
+        max_retries=4,
+        error_target=0.0,
+        max_workers=max_workers,
+    )
+    assert result == DetectionResult.SUCCESS
+    assert sorted(detector.seeds) == [0, 1, 2, 3]
+    messages = [r.getMessage() for r in caplog.records if "reprojection error" in r.getMessage()]
+    errors = [float(m.split("reprojection error ")[1].split(" px")[0]) for m in messages]
+    assert len(errors) == 4
+    assert "no reticle attempt reached 0.0 px, using" in caplog.text
+    assert f"{min(errors):.3f} px" in caplog.text.splitlines()[-1]
+
+
+def test_progress_reports_each_improved_attempt():
+    progress = []
+    result, x_coords, _, params = detect_in_thread(
+        reticle_frame(),
+        max_retries=4,
+        error_target=0.0,
+        on_progress=lambda x, y, p, error: progress.append((x, p, error)),
+    )
+    assert result == DetectionResult.SUCCESS
+    errors = [error for _, _, error in progress]
+    assert 1 <= len(errors) <= 4
+    assert errors == sorted(errors, reverse=True) and len(set(errors)) == len(errors)
+    last_x, last_params, _ = progress[-1]
+    np.testing.assert_array_equal(last_x, x_coords)
+    assert last_params is params
+
+
+def test_pool_reports_progress(pool):
+    job = pool.submit(reticle_frame(), "cam", IMG_SIZE, progress=True)
+    result, x_coords, _, params = job.result(timeout=60)
+    progress = job.progress()  # Reports outlive the job until read
+    assert result == DetectionResult.SUCCESS
+    assert len(progress) >= 1
+    last_x, _, last_params, _ = progress[-1]
+    np.testing.assert_array_equal(last_x, x_coords)
+    np.testing.assert_allclose(last_params.tvec, params.tvec)
+    assert job.progress() == []
+
+
+def test_job_without_progress_reports_nothing(pool):
+    job = pool.submit(reticle_frame(), "cam", IMG_SIZE)
+    job.result(timeout=60)
+    assert job.progress() == []
+
+
+def test_worker_keeps_one_detector_per_camera():
+    detector = _worker_detector(IMG_SIZE, "cam_a", False)
+    assert _worker_detector(IMG_SIZE, "cam_a", False) is detector
+    other = _worker_detector(IMG_SIZE, "cam_b", False)
+    assert other is not detector and other.reticle_frame_detector is not detector.reticle_frame_detector
@@ -0,0 +1,156 @@
+import cv2
+import numpy as np
+import pytest
+
+from parallax.reticle_detection.base_manager import BaseProcessWorker, DetectionResult
+from parallax.reticle_detection.result_cache import ReticleResultCache, hamming_distance, perceptual_hash
+from parallax.session.session_state import CameraParams
+
+PARAMS = CameraParams(
+    mtx=[[15000.0, 0, 2000], [0, 15000.0, 1500], [0, 0, 1]],
+    dist=[0.0, 0.0, 0.0, 0.0, 0.0],
+    rvec=[0.1, -0.2, 0.05],
+    tvec=[1.0, 2.0, 100.0],
+)
+
+
+def scene(shift=(0, 0), seed=0, size=(800, 600)):
+    """Gray frame with a reticle cross and ticks, plus sensor noise."""
+    yy, xx = np.mgrid[: size[1], : size[0]]
+    img = 200 - 60 * (np.hypot(xx - 300, yy - 250) / 700) ** 2  # Vignetting
+    cx, cy = size[0] // 2 + shift[0], size[1] // 2 + shift[1]
+    cv2.line(img, (cx - 300, cy), (cx + 300, cy), 40, 3)
+    cv2.line(img, (cx, cy - 250), (cx, cy + 250), 40, 3)
+    for i in range(-10, 11):
+        cv2.line(img, (cx + 28 * i, cy - 10), (cx + 28 * i, cy + 10), 40, 2)
+        cv2.line(img, (cx - 10, cy + 22 * i), (cx + 10, cy + 22 * i), 40, 2)
+    noise = np.random.default_rng(seed).normal(0, 4, img.shape)
+    return cv2.cvtColor((img + noise).clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB)
+
+
+def coords():
+    x = np.stack([np.arange(21) * 28.0 + 120, np.full(21, 300.0)], axis=1)
+    y = np.stack([np.full(21, 400.0), np.arange(21) * 22.0 + 80], axis=1)
+    return x, y
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReticleResultCache(path=tmp_path / "reticle_cache.json")
+
+
+def test_hit_on_unchanged_scene(cache):
+    x, y = coords()
+    cache.store("cam1", "opencv", scene(seed=0), x, y, PARAMS)
+
+    hit = cache.lookup("cam1", "opencv", scene(seed=1))  # New noise, same scene
+    assert hit is not None
+    x_cached, y_cached, params = hit
+    np.testing.assert_array_equal(x_cached, x)
+    np.testing.assert_array_equal(y_cached, y)
+    np.testing.assert_allclose(params.tvec, PARAMS.tvec)
+
+
+def test_miss_on_changed_scene_or_other_key(cache):
+    x, y = coords()
+    cache.store("cam1", "opencv", scene(), x, y, PARAMS)
+
+    assert cache.lookup("cam1", "opencv", scene(shift=(60, -40))) is None
+    assert cache.lookup("cam1", "opencv", cv2.GaussianBlur(scene(), (31, 31), 0)) is None  # Refocused
+    assert cache.lookup("cam2", "opencv", scene()) is None
+    assert cache.lookup("cam1", "cnn", scene()) is None
+
+
+@pytest.mark.parametrize("shift", [(1, 0), (0, -2), (3, 2)])
+def test_miss_on_reticle_moved_by_a_few_pixels(cache, shift):
+    x, y = coords()
+    cache.store("cam1", "opencv", scene(seed=0), x, y, PARAMS)
+    assert cache.lookup("cam1", "opencv", scene(shift=shift, seed=1)) is None
+
+
+def full_size_frame(seed=0, pitch=55):
+    """4000x3000 RGB frame of two perpendicular ticked axes, and the tick coordinates."""
+    img = np.full((3000, 4000), 200, np.uint8)
+    centre = np.array([2000.0, 1500.0])
+    x = centre + pitch * np.arange(-10, 11)[:, None] * [1.0, 0.0]
+    y = centre + pitch * np.arange(-10, 11)[:, None] * [0.0, 1.0]
+    cv2.line(img, (700, 1500), (3300, 1500), 60, 4)
+    cv2.line(img, (2000, 200), (2000, 2800), 60, 4)
+    for (px, py), (qx, qy) in zip(x.astype(int), y.astype(int)):
+        cv2.line(img, (px, py - 40), (px, py + 40), 60, 9)
+        cv2.line(img, (qx - 40, qy), (qx + 40, qy), 60, 9)
+    img = cv2.GaussianBlur(img, (5, 5), 0) + np.random.default_rng(seed).normal(0, 6, img.shape)
+    return cv2.cvtColor(img.clip(0, 255).astype(np.uint8), cv2.COLOR_GRAY2RGB), x, y
+
+
+def test_miss_on_full_size_frame_moved_by_two_pixels(cache):
+    # Two pixels are 1/25 of a thumbnail pixel; the thumbnails still correlate at 0.99
+    frame, x, y = full_size_frame(seed=0)
+    cache.store("cam1", "opencv", frame, x, y, PARAMS)
+
+    frame, _, _ = full_size_frame(seed=1)
+    assert cache.lookup("cam1", "opencv", frame) is not None
+    moved = cv2.warpAffine(frame, np.float32([[1, 0, 2], [0, 1, 0]]), (4000, 3000), borderMode=cv2.BORDER_REFLECT)
+    assert cache.lookup("cam1", "opencv", moved) is None
+
+
+def test_reticle_at_frame_edge_is_not_cached(cache):
+    x, y = coords()
+    x[:, 1], y[:, 0] = 10.0, 10.0  # Axes along the top and left edges
+    cache.store("cam1", "opencv", scene(), x, y, PARAMS)
+    assert cache.lookup("cam1", "opencv", scene()) is None
+
+
+def test_persisted_across_instances(cache, tmp_path):
+    x, y = coords()
+    cache.store("cam1", "opencv", scene(), x, y, PARAMS)
+
+    reopened = ReticleResultCache(path=tmp_path / "reticle_cache.json")
+    hit = reopened.lookup("cam1", "opencv", scene(seed=2))
+    assert hit is not None
+    np.testing.assert_allclose(hit[2].mtx, PARAMS.mtx)
+    np.testing.assert_allclose(hit[2].rvec, PARAMS.rvec)
+
+    reopened.invalidate("cam1")
+    assert ReticleResultCache(path=tmp_path / "reticle_cache.json").lookup("cam1", "opencv", scene()) is None
+
+
+def test_same_scene_replaces_entry(cache):
+    x, y = coords()
+    cache.store("cam1", "opencv", scene(seed=0), x, y, PARAMS)
+    cache.store("cam1", "opencv", scene(seed=1), x + 1, y, PARAMS)
+    cache.store("cam1", "opencv", scene(shift=(80, 0)), x, y, PARAMS)
+    assert len(cache._entries["cam1/opencv"]) == 2
+    np.testing.assert_array_equal(cache.lookup("cam1", "opencv", scene())[0], x + 1)
+
+
+def test_perceptual_hash_tolerates_noise():
+    a, b = perceptual_hash(scene(seed=0)), perceptual_hash(scene(seed=1))
+    assert hamming_distance(a, b) <= 4
+
+
+class CountingWorker(BaseProcessWorker):
+    cache_method = "test"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = 0
+
+    def process(self, frame):
+        self.calls += 1
+        self.x_coords, self.y_coords = coords()
+        self.camera_params = PARAMS
+        return DetectionResult.SUCCESS
+
+
+def test_worker_reuses_cached_result(cache, monkeypatch):
+    monkeypatch.setattr(ReticleResultCache, "_instance", cache)
+    first, second = CountingWorker("cam1"), CountingWorker("cam1")
+    found = []
+    second.signals.found_coords.connect(lambda x, y, params: found.append(x))
+
+    assert first._process_cached(scene(seed=0)) == DetectionResult.SUCCESS
+    assert second._process_cached(scene(seed=1)) == DetectionResult.SUCCESS
+    assert (first.calls, second.calls) == (1, 0)
+    assert second.origin == (400, 300)  # Centre of the cached x-axis coordinates
+    assert len(found) == 1
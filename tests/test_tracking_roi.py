@@ -0,0 +1,42 @@
+import pytest
+
+from parallax.probe_detection.opencv.tracking_roi import TrackingROI
+
+IMG_SIZE = (1000, 750)
+
+
+@pytest.fixture
+def roi():
+    return TrackingROI(IMG_SIZE, margin=50, growth=2.0, max_misses=2, timeout_s=1.0)
+
+
+def test_full_frame_until_locked(roi):
+    assert not roi.is_locked
+    assert roi.region(now=0.0) is None
+    roi.miss()
+    assert roi.misses == 0
+
+
+def test_region_around_probe_line(roi):
+    roi.lock((500, 400), (600, 200), now=0.0)
+    assert roi.region(now=0.1) == (150, 450, 450, 650)
+
+
+def test_region_widens_on_misses_then_falls_back(roi):
+    roi.lock((500, 400), (600, 200), now=0.0)
+    roi.miss()
+    assert roi.region(now=0.1) == (100, 500, 400, 700)
+    roi.miss()
+    assert roi.region(now=0.1) == (0, 600, 300, 800)
+    roi.miss()
+    assert roi.region(now=0.1) is None
+    assert not roi.is_locked
+
+
+def test_lock_resets_misses_and_timeout(roi):
+    roi.lock((500, 400), (600, 200), now=0.0)
+    roi.miss()
+    roi.lock((510, 410), (610, 210), now=0.5)
+    assert roi.current_margin() == 50
+    assert roi.region(now=1.4) is not None
+    assert roi.region(now=1.6) is None
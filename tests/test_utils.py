@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from parallax.utils.utils import UtilsCoords, UtilsCrops
@@ -64,3 +65,15 @@ def test_is_point_on_crop_region():
     assert not UtilsCrops.is_point_on_crop_region(
         point_outside, top, bottom, left, right
     ), "Point should not be on the boundary."
+
+
+def test_crop_and_covers():
+    """Test cropping to a region and region containment."""
+    img = np.arange(100).reshape(10, 10)
+    np.testing.assert_array_equal(UtilsCrops.crop(img, (2, 4, 3, 6)), img[2:4, 3:6])
+    assert UtilsCrops.crop(img, None) is img
+    assert UtilsCrops.crop(None, (2, 4, 3, 6)) is None
+
+    assert UtilsCrops.covers((0, 10, 0, 10), (2, 4, 3, 6))
+    assert UtilsCrops.covers((2, 4, 3, 6), (2, 4, 3, 6))
+    assert not UtilsCrops.covers((3, 10, 0, 10), (2, 4, 3, 6))
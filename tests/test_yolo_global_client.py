@@ -1,3 +1,4 @@
+import logging
 from unittest.mock import MagicMock, patch
 
 import numpy as np
@@ -104,3 +105,50 @@ def test_frame_processing_flow(mock_dependencies):
 
     # check ts passed correctly
     assert kwargs["ts"] == timestamp
+
+
+def test_frame_rate_follows_stage_motion(mock_dependencies):
+    """Frames are sent at the full rate only while a stage moves, timed by their timestamps."""
+    _, worker_instance, _ = mock_dependencies
+    worker_instance.inference_latency = None
+    client = YOLOClient("Test", {"fps": 10, "idle_fps": 1, "fps_decay_s": 0.0, "yolo": {}})
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    with patch("parallax.probe_detection.yolo_global.yolo_client.time.time", return_value=0.0):
+        client.set_stage_moving(True)
+    for i in range(30):
+        client.newframe_captured(frame, current=i / 30.0)
+    moving_calls = worker_instance.process_frame.call_count
+
+    with patch("parallax.probe_detection.yolo_global.yolo_client.time.time", return_value=1.0):
+        client.set_stage_moving(False)
+    for i in range(30, 60):
+        client.newframe_captured(frame, current=i / 30.0)
+    idle_calls = worker_instance.process_frame.call_count - moving_calls
+
+    assert moving_calls >= 9
+    assert idle_calls <= 2
+    assert client.get_effective_fps() > 0
+
+
+def test_effective_fps_logged(mock_dependencies, caplog):
+    """The target rate is logged when the stages start or stop, and the sent rate periodically."""
+    _, worker_instance, _ = mock_dependencies
+    worker_instance.inference_latency = None
+    client = YOLOClient("Test", {"fps": 10, "idle_fps": 1, "fps_decay_s": 0.0, "fps_log_interval_s": 5.0, "yolo": {}})
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    with caplog.at_level(logging.INFO, logger="YOLOClient"):
+        with patch("parallax.probe_detection.yolo_global.yolo_client.time.time", return_value=0.0):
+            client.set_stage_moving(True)
+            client.set_stage_moving(True)
+        for i in range(181):
+            client.newframe_captured(frame, current=i / 30.0)
+        with patch("parallax.probe_detection.yolo_global.yolo_client.time.time", return_value=6.0):
+            client.set_stage_moving(False)
+    messages = [r.getMessage() for r in caplog.records]
+
+    assert messages[0] == "Test: stage moving, target 10.0 fps"
+    assert messages[1].startswith("Test: frames sent at 10.0 fps (target 10.0 fps)")
+    assert messages[2] == "Test: stage stopped, target 1.0 fps"
+    assert len(messages) == 3
@@ -0,0 +1,44 @@
+import pytest
+
+from parallax.probe_detection.yolo_global.rate_controller import AdaptiveFrameRate
+
+
+@pytest.fixture
+def rate():
+    return AdaptiveFrameRate(moving_fps=10.0, idle_fps=2.0, decay_s=1.0)
+
+
+def count_accepted(rate, start, duration, camera_fps=30.0):
+    n = int(duration * camera_fps)
+    return sum(rate.accept(start + i / camera_fps) for i in range(n))
+
+
+def test_idle_until_a_stage_moves(rate):
+    assert rate.target_fps(now=0.0) == pytest.approx(2.0)
+    assert count_accepted(rate, 0.0, 2.0) == pytest.approx(4, abs=1)
+
+
+def test_full_rate_while_moving_then_decays(rate):
+    rate.set_moving(True, now=0.0)
+    assert rate.target_fps(now=0.5) == pytest.approx(10.0)
+    assert count_accepted(rate, 0.0, 2.0) == pytest.approx(20, abs=2)
+
+    rate.set_moving(False, now=2.0)
+    assert rate.target_fps(now=2.0) == pytest.approx(10.0)
+    mid = rate.target_fps(now=3.0)
+    assert 2.0 < mid < 10.0
+    assert rate.target_fps(now=20.0) == pytest.approx(2.0, abs=1e-3)
+
+
+def test_rate_capped_by_inference_latency(rate):
+    rate.set_moving(True, now=0.0)
+    rate.record_latency(0.2)  # model can only do 5 fps
+    assert rate.target_fps(now=0.0) == pytest.approx(0.8 / 0.2)
+    rate.record_latency(0.4)
+    assert rate.latency == pytest.approx(0.24)
+
+
+def test_effective_fps_tracks_accepted_frames(rate):
+    rate.set_moving(True, now=0.0)
+    count_accepted(rate, 0.0, 5.0)
+    assert rate.effective_fps == pytest.approx(10.0, rel=0.2)
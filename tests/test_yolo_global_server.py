@@ -1,3 +1,4 @@
+import threading
 import time
 from unittest.mock import MagicMock, patch
 
@@ -5,11 +6,20 @@ import numpy as np
 import pytest
 
 # Adjust the import based on your actual file structure
+from parallax.probe_detection.utils.model_loader import ModelLoader
 from parallax.probe_detection.yolo_global.yolo_server import YoloSegmentation
 
 # --- Mocks & Fixtures ---
 
 
+@pytest.fixture(autouse=True)
+def fresh_model_loader():
+    """Models are cached per camera; start every test without cached models."""
+    ModelLoader.instance().forget()
+    yield
+    ModelLoader.instance().forget()
+
+
 @pytest.fixture
 def mock_yolo_lib():
     """
@@ -88,6 +98,7 @@ def test_initialization_loads_model(mock_yolo_lib):
     config = {"weights_path": "dummy.pt", "conf_thresh": 0.7, "img_dim": [100, 100]}
 
     worker = YoloSegmentation("TestWorker", config)
+    assert worker.wait_ready(timeout=5.0)
 
     # Check Model Init
     MockYOLO.assert_called_once_with("dummy.pt")
@@ -102,6 +113,7 @@ def test_initialization_failure_fallback(mock_yolo_lib):
 
     config = {}
     worker = YoloSegmentation("TestWorker", config)
+    assert worker.wait_ready(timeout=5.0)
 
     assert worker.model is None
     # Should still initialize basic attributes
@@ -136,6 +148,7 @@ def test_inference_pipeline_execution(mock_yolo_lib, dummy_frame, sample_yolo_re
     detection_cb = MagicMock()
 
     worker = YoloSegmentation("TestWorker", {}, detection_callback=detection_cb)
+    assert worker.wait_ready(timeout=5.0)
 
     # Start Worker
     worker.start()
@@ -179,6 +192,7 @@ def test_dummy_mode_execution(mock_yolo_lib, dummy_frame):
 
     detection_cb = MagicMock()
     worker = YoloSegmentation("TestWorker", {}, detection_callback=detection_cb)
+    assert worker.wait_ready(timeout=5.0)
 
     # Worker model should be None
     assert worker.model is None
@@ -221,8 +235,69 @@ def test_warmup_logic(mock_yolo_lib):
     """Verify warmup runs dummy inference 3 times."""
     _, model_instance = mock_yolo_lib
 
-    _ = YoloSegmentation("TestWorker", {})
-    # Warmup happens in __init__
+    worker = YoloSegmentation("TestWorker", {})
+    # Warmup runs in the background, started from __init__
+    assert worker.wait_ready(timeout=5.0)
 
     # Check that track was called 3 times during init
     assert model_instance.track.call_count == 3
+
+
+def test_frames_wait_until_model_ready(mock_yolo_lib, dummy_frame, sample_yolo_result):
+    """Frames queued while the model loads are processed once it is ready."""
+    MockYOLO, model_instance = mock_yolo_lib
+    model_instance.track.return_value = sample_yolo_result
+    release = threading.Event()
+
+    def slow_load(*args):
+        release.wait(5.0)
+        return model_instance
+
+    MockYOLO.side_effect = slow_load
+    detection_cb = MagicMock()
+    worker = YoloSegmentation("TestWorker", {}, detection_callback=detection_cb)
+    assert not worker.is_ready()
+
+    worker.start()
+    worker.process_frame(dummy_frame, {}, ts=1.0)
+    worker.process_frame(dummy_frame, {}, ts=2.0)
+    time.sleep(0.05)
+    detection_cb.assert_not_called()
+    assert len(worker.frame_queue) == 1  # only the latest frame is kept
+
+    release.set()
+    assert worker.wait_ready(timeout=5.0)
+    deadline = time.time() + 2.0
+    while not detection_cb.called and time.time() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+
+    detection_cb.assert_called_once()
+    assert detection_cb.call_args[0][2][0]["timestamp"] == 2.0
+    assert (
+        "yolo_global",
+        "TestWorker",
+        "external/YoloV11/tip_keypoint_detection_fast.pt",
+    ) in ModelLoader.instance().timings
+
+
+def test_same_camera_reuses_loaded_model(mock_yolo_lib):
+    """Preloading and later worker creation share one model load."""
+    MockYOLO, model_instance = mock_yolo_lib
+    future = YoloSegmentation.load_model("TestWorker", {})
+    future.result(timeout=5.0)
+    worker = YoloSegmentation("TestWorker", {})
+    assert worker.wait_ready(timeout=5.0)
+    assert worker.model is model_instance
+    MockYOLO.assert_called_once()
+
+
+def test_release_model_drops_the_cached_load(mock_yolo_lib):
+    """A released camera model is loaded again on the next request."""
+    MockYOLO, _ = mock_yolo_lib
+    YoloSegmentation.load_model("Old", {}).result(timeout=5.0)
+    YoloSegmentation.release_model("Old", {})
+    assert ModelLoader.instance().get(YoloSegmentation._model_key("Old", {})) is None
+
+    YoloSegmentation.load_model("Old", {}).result(timeout=5.0)
+    assert MockYOLO.call_count == 2
@@ -0,0 +1,64 @@
+import pytest
+
+from parallax.probe_detection.yolo_local.crop_queue import CropQueue
+
+
+@pytest.fixture
+def queue():
+    return CropQueue(maxlen=4)
+
+
+def drain(queue):
+    items = []
+    while (next_crop := queue.pop()) is not None:
+        items.append(next_crop[0])
+    return items
+
+
+def test_crops_served_in_detection_order(queue):
+    for i in range(3):
+        assert queue.put(f"crop{i}", ts=1.0, index=i, class_name="1shank")
+    assert len(queue) == 3
+    assert drain(queue) == ["crop0", "crop1", "crop2"]
+    assert queue.pop() is None
+
+
+def test_priority_class_served_first(queue):
+    queue.set_priority_class("4shanks")
+    queue.put("a", ts=1.0, index=0, class_name="1shank")
+    queue.put("b", ts=1.0, index=1, class_name="4shanks")
+    queue.put("c", ts=1.0, index=2, class_name="1shank")
+    queue.put("d", ts=1.0, index=3, class_name="4shanks")
+    assert drain(queue) == ["b", "d", "a", "c"]
+
+
+def test_newer_frame_sheds_older_crops(queue):
+    queue.put("old0", ts=1.0, index=0)
+    queue.put("old1", ts=1.0, index=1)
+    queue.put("new0", ts=2.0, index=0)
+    # A late crop from the older frame is rejected
+    assert not queue.put("old2", ts=1.0, index=2)
+    assert drain(queue) == ["new0"]
+    stats = queue.stats()
+    assert stats["dropped_stale"] == 3
+    assert stats["served"] == 1
+
+
+def test_overflow_drops_last_served(queue):
+    for i in range(5):
+        queue.put(f"crop{i}", ts=1.0, index=i)
+    assert queue.stats()["dropped_overflow"] == 1
+    assert drain(queue) == ["crop0", "crop1", "crop2", "crop3"]
+
+
+def test_latency_reported(queue):
+    queue.put("crop", ts=1.0)
+    item, latency = queue.pop()
+    assert item == "crop"
+    assert latency >= 0.0
+    stats = queue.stats()
+    assert stats["max_latency_s"] >= stats["mean_latency_s"] >= 0.0
+    queue.clear()
+    assert len(queue) == 0
+    # After clear, an older frame is accepted again
+    assert queue.put("crop", ts=0.5)